@@ -7,5 +7,6 @@ setup(
     install_requires=[
         'requests',
         'Pillow',
+        'lxml',
     ],
 ) 
\ No newline at end of file
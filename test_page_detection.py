@@ -2,59 +2,63 @@
 # -*- coding: utf-8 -*-
 """
 测试页面有效性检测功能
+（单个链接，启动浏览器；批量检测整个列表请使用 python -m utils.liveness_checker）
 """
 
-import re
-from playwright.sync_api import sync_playwright
+import asyncio
+from playwright.async_api import async_playwright
+from utils.invalid_page import READY_SELECTOR, detect_page_state, is_anti_bot_url
 
-def test_page_detection(url):
-    """测试页面有效性检测"""
-    print(f"🔍 测试页面: {url}")
-    
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
+async def _detect(url):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
         
         try:
-            page.goto(url, timeout=30000)
-            page.wait_for_load_state('domcontentloaded', timeout=15000)
-            page.wait_for_timeout(3000)
+            await page.goto(url, timeout=30000)
+            await page.wait_for_load_state('domcontentloaded', timeout=15000)
+            try:
+                # 正文或错误提示任意一个出现即可
+                await page.wait_for_selector(READY_SELECTOR, timeout=15000)
+            except Exception:
+                pass
             
-            # 获取页面内容
-            page_content = page.content()
-            
-            # 检测删除/违规页面的关键词
-            invalid_keywords = [
-                "此内容发送失败无法查看",
-                "此内容因涉嫌违反相关法律法规和政策发送失败",
-                "内容已删除",
-                "文章不存在",
-                "该内容已被删除",
-                "内容违规",
-                "无法查看",
-                "发送失败",
-                "违规内容",
-                "内容不存在"
-            ]
-            
-            is_invalid_page = any(keyword in page_content for keyword in invalid_keywords)
+            if is_anti_bot_url(page.url):
+                print(f"⚠️ 被重定向到验证页面: {page.url}")
+                return False
             
-            if is_invalid_page:
+            # 与抓取时使用相同的规则：只检查错误提示容器，没有正文和错误提示时才检查整个页面
+            state = await detect_page_state(page)
+            if state['anti_bot_keywords']:
+                print("⚠️ 检测到反爬验证页面")
+                for keyword in state['anti_bot_keywords']:
+                    print(f"   发现关键词: {keyword}")
+                return False
+            if state['invalid_keywords']:
                 print("❌ 检测到无效页面")
                 # 显示页面中的相关文本
-                for keyword in invalid_keywords:
-                    if keyword in page_content:
-                        print(f"   发现关键词: {keyword}")
+                for keyword in state['invalid_keywords']:
+                    print(f"   发现关键词: {keyword}")
+                return False
+            if not state['has_content']:
+                if state['has_error_container']:
+                    print("⚠️ 页面出现错误提示，未找到正文")
+                else:
+                    print("⚠️ 未找到正文，也没有识别出错误提示")
                 return False
-            else:
-                print("✅ 页面有效")
-                return True
+            print("✅ 页面有效")
+            return True
                 
         except Exception as e:
             print(f"❌ 访问失败: {e}")
             return False
         finally:
-            browser.close()
+            await browser.close()
+
+def test_page_detection(url):
+    """测试页面有效性检测"""
+    print(f"🔍 测试页面: {url}")
+    return asyncio.run(_detect(url))
 
 if __name__ == "__main__":
     # 测试一些已知的URL
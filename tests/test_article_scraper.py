@@ -0,0 +1,25 @@
+import os
+import asyncio
+from conftest import FIXTURES_DIR
+from utils.article_scraper import _fetch_via_http
+from utils.http_fetcher import parse_article_html
+
+class _FakeFetcher:
+    """用保存的页面代替网络请求"""
+
+    def __init__(self, name: str):
+        with open(os.path.join(FIXTURES_DIR, 'pages', name), 'r', encoding='utf-8') as f:
+            self.html = f.read()
+
+    def fetch_article(self, url: str):
+        return parse_article_html(self.html)
+
+def test_http_path_leaves_counters_pending(tmp_path):
+    url = 'https://mp.weixin.qq.com/s/abc'
+    article_data = asyncio.run(_fetch_via_http(_FakeFetcher('normal.html'), url, str(tmp_path / 'batch'), False))
+    assert article_data['title'] == '示例文章标题'
+    assert article_data['metadata']['fetch_mode'] == 'http'
+    # 初始 HTML 中没有计数器：留空并标记，由 metrics_refresher 补齐
+    assert article_data['read_count'] == ''
+    assert article_data['like_count'] == ''
+    assert article_data['metadata']['metrics_pending'] is True
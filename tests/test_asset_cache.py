@@ -0,0 +1,14 @@
+import os
+from utils.asset_cache import AssetCache
+
+def test_put_evicts_least_recently_used(tmp_path):
+    cache = AssetCache(str(tmp_path), max_mb=2500 / (1024 * 1024))
+    cache.put('https://res.wx.qq.com/a.js', b'a' * 1000, {})
+    cache.put('https://res.wx.qq.com/b.js', b'b' * 1000, {})
+    assert cache.get('https://res.wx.qq.com/a.js') is not None
+    # 超过上限时立即淘汰最久未使用的 b.js，不等到 save()
+    cache.put('https://res.wx.qq.com/c.js', b'c' * 1000, {})
+    assert set(cache.entries) == {'https://res.wx.qq.com/a.js', 'https://res.wx.qq.com/c.js'}
+    assert not os.path.exists(cache._path('https://res.wx.qq.com/b.js'))
+    assert cache.get_stats()['cached_bytes'] == 2000
+    assert cache.stats['evicted'] == 1
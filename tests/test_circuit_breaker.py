@@ -0,0 +1,33 @@
+from utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+def _tripped_breaker():
+    breaker = CircuitBreaker(threshold=2, cooldown=0)
+    for url in ('https://mp.weixin.qq.com/s/a', 'https://mp.weixin.qq.com/s/b'):
+        breaker.on_request(url)
+        breaker.record('anti_bot', url)
+    assert breaker.state == OPEN
+    # 冷却结束，进入半开状态并放行一个探测请求
+    assert breaker.time_until_ready() == 0
+    assert breaker.state == HALF_OPEN
+    breaker.on_request('https://mp.weixin.qq.com/s/probe')
+    return breaker
+
+def test_stale_result_does_not_close_half_open():
+    breaker = _tripped_breaker()
+    # 熔断前发出的请求在探测期间返回
+    breaker.record(None, 'https://mp.weixin.qq.com/s/stale')
+    assert breaker.state == HALF_OPEN
+    assert breaker.time_until_ready() > 0
+    breaker.record('anti_bot', 'https://mp.weixin.qq.com/s/stale')
+    assert breaker.state == HALF_OPEN
+    assert breaker.trip_count == 1
+
+    breaker.record(None, 'https://mp.weixin.qq.com/s/probe')
+    assert breaker.state == CLOSED
+    assert breaker.trips[0]['resumed_time'] is not None
+
+def test_blocked_probe_reopens():
+    breaker = _tripped_breaker()
+    breaker.record('anti_bot', 'https://mp.weixin.qq.com/s/probe')
+    assert breaker.state == OPEN
+    assert breaker.trip_count == 2
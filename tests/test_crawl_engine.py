@@ -0,0 +1,82 @@
+import time
+import asyncio
+from utils import crawl_engine
+from utils.crawl_engine import CrawlEngine
+from utils.circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker
+from utils.errors import NETWORK, TIMEOUT, Deadline
+from utils.invalid_page import ANTI_BOT_ERROR_PREFIX
+from utils.rate_limiter import AimdRateLimiter
+
+def _engine(article_deadline):
+    errors, retries = [], []
+    engine = CrawlEngine('', article_deadline=article_deadline,
+                         on_error=lambda url, error, error_class: errors.append((url, error, error_class)),
+                         on_retry=lambda url, error, attempts, eligible_at, error_class: retries.append(url))
+    return engine, errors, retries
+
+def test_retry_while_budget_remains():
+    engine, errors, retries = _engine(60)
+    url = 'https://mp.weixin.qq.com/s/abc'
+    engine._attempts[url] = 1
+    engine._deadlines[url] = Deadline(60)
+    engine._handle_failure(url, 'net::ERR_CONNECTION_RESET', error_class=NETWORK)
+    assert retries == [url]
+    assert errors == []
+
+def test_no_retry_after_budget_expired():
+    engine, errors, retries = _engine(0.01)
+    url = 'https://mp.weixin.qq.com/s/abc'
+    engine._attempts[url] = 1
+    engine._deadlines[url] = Deadline(0.01)
+    time.sleep(0.02)
+    engine._handle_failure(url, 'net::ERR_CONNECTION_RESET', error_class=NETWORK)
+    assert retries == []
+    assert errors and errors[0][2] == TIMEOUT
+    assert url not in engine._deadlines
+
+def test_deadline_paused_between_attempts():
+    deadline = Deadline(0.05)
+    deadline.pause()
+    time.sleep(0.1)
+    assert not deadline.expired
+    deadline.resume()
+    time.sleep(0.1)
+    assert deadline.expired
+
+def test_breaker_trip_cooldown_probe_recovery(monkeypatch):
+    # 冷却时间比单篇文章的预算长：等待熔断的时间不能用掉预算
+    breaker = CircuitBreaker(threshold=3, cooldown=0.5)
+    results, errors = {}, []
+    engine = CrawlEngine('', circuit_breaker=breaker, article_deadline=0.2,
+                         rate_limiter=AimdRateLimiter(initial_rate=1000, min_rate=1000, max_rate=1000, burst=10),
+                         on_result=lambda url, article_data: results.setdefault(url, article_data),
+                         on_error=lambda url, error, error_class: errors.append((url, error, error_class)))
+    engine.retry_queue.base_delay = 0.05
+
+    async def no_op():
+        pass
+    monkeypatch.setattr(engine.pool, 'start', no_op)
+    monkeypatch.setattr(engine.pool, 'close', no_op)
+
+    calls = []
+    async def fake_fetch(url, *args, deadline=None, **kwargs):
+        # 与真实抓取一样，预算用完时在发出请求前抛出 DeadlineExceeded
+        deadline.timeout_ms(45000)
+        calls.append((url, breaker.state))
+        await asyncio.sleep(0.01)
+        if len(calls) <= 3:
+            return {'url': url, 'title': '', 'status': 'blocked', 'error': f"{ANTI_BOT_ERROR_PREFIX}: 环境异常"}
+        return {'url': url, 'title': '标题', 'content': '正文'}
+    monkeypatch.setattr(crawl_engine, 'fetch_article_content_async', fake_fetch)
+
+    urls = [f'https://mp.weixin.qq.com/s/{name}' for name in ('a', 'b', 'c')]
+    engine.crawl(urls)
+
+    assert errors == []
+    assert set(results) == set(urls)
+    assert breaker.trip_count == 1
+    assert breaker.state == CLOSED
+    # 熔断后的第一个请求是探测请求，探测成功后其余文章恢复抓取
+    assert len(calls) == 6
+    assert calls[3][1] == HALF_OPEN
+    assert all(state == CLOSED for _, state in calls[4:])
@@ -0,0 +1,16 @@
+from utils.errors import NETWORK, NOT_FOUND, TIMEOUT, classify_error
+
+def test_dns_failures_are_network_errors():
+    # 域名无法解析可能只是暂时的网络问题，不能当作文章不存在
+    assert classify_error('page.goto: net::ERR_NAME_NOT_RESOLVED at https://mp.weixin.qq.com/s/abc') == NETWORK
+    assert classify_error('[Errno 11001] getaddrinfo failed') == NETWORK
+    assert classify_error('[Errno -2] Name or service not known') == NETWORK
+    assert classify_error("Failed to resolve 'mp.weixin.qq.com'") == NETWORK
+
+def test_missing_pages_are_not_found():
+    assert classify_error('HTTP 404') == NOT_FOUND
+    assert classify_error('410 Client Error: Gone for url: https://mp.weixin.qq.com/s/abc') == NOT_FOUND
+    assert classify_error('page.goto: net::ERR_INVALID_URL') == NOT_FOUND
+
+def test_timeout():
+    assert classify_error('page.goto: Timeout 30000ms exceeded.') == TIMEOUT
@@ -0,0 +1,48 @@
+import os
+from datetime import datetime
+from conftest import FIXTURES_DIR
+from utils.http_fetcher import parse_article_html
+
+def _load(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, 'pages', name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def test_normal_page():
+    result = parse_article_html(_load('normal.html'))
+    assert result['status'] == 'ok'
+    assert result['title'] == '示例文章标题'
+    assert result['author'] == '示例公众号'
+    assert result['publish_time'] == datetime.fromtimestamp(1700000000).strftime('%Y-%m-%d %H:%M')
+    assert 'js_content' in result['content_html']
+    assert '第一段正文。' in result['content_html']
+    assert result['missing'] == []
+
+def test_deleted_page():
+    result = parse_article_html(_load('deleted.html'))
+    assert result['status'] == 'deleted'
+    assert '该内容已被删除' in result['invalid_keywords']
+    assert result['anti_bot_keywords'] == []
+
+def test_anti_bot_page():
+    result = parse_article_html(_load('anti_bot.html'))
+    assert result['status'] == 'blocked'
+    assert '环境异常' in result['anti_bot_keywords']
+    # 验证页面优先于删除判断
+    assert result['invalid_keywords'] == []
+
+def test_out_of_range_timestamp_is_left_empty():
+    result = parse_article_html(_load('bad_timestamp.html'))
+    assert result['status'] == 'ok'
+    assert result['publish_time'] == ''
+    assert result['title'] == '示例文章标题'
+
+def test_page_without_content_is_incomplete():
+    html = _load('normal.html').replace('id="js_content"', 'id="js_other"')
+    result = parse_article_html(html)
+    assert result['status'] == 'incomplete'
+    assert 'content_html' in result['missing']
+
+def test_empty_html_is_incomplete():
+    result = parse_article_html('')
+    assert result['status'] == 'incomplete'
+    assert result['missing'] == ['html']
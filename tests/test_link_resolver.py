@@ -0,0 +1,19 @@
+from utils import link_resolver
+from utils.link_resolver import LinkResolver
+
+FULL_URL = 'https://mp.weixin.qq.com/s?__biz=MzA5&mid=2650&idx=1&sn=abc'
+SHORT_URL = 'https://mp.weixin.qq.com/s/AbCdEf'
+CACHED_URL = 'https://mp.weixin.qq.com/s/Cached'
+
+def test_offline_resolver_does_not_fetch(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('离线模式不应发出请求')
+    monkeypatch.setattr(link_resolver, 'HttpArticleFetcher', fail)
+
+    resolver = LinkResolver(str(tmp_path), offline=True)
+    resolver._cache[CACHED_URL] = {'key': 'MzA5_2650_2', 'canonical_url': ''}
+    resolved, stats = resolver.resolve_many([FULL_URL, SHORT_URL, CACHED_URL])
+    assert resolved[FULL_URL]['key'] == 'MzA5_2650_1'
+    assert resolved[CACHED_URL]['key'] == 'MzA5_2650_2'
+    assert resolved[SHORT_URL] is None
+    assert stats == {'parsed': 1, 'cached': 1, 'fetched': 0, 'unresolved': 1}
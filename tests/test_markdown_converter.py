@@ -0,0 +1,31 @@
+import os
+import pytest
+from conftest import FIXTURES_DIR
+from utils.markdown_converter import convert_html_to_markdown, extract_content_payload
+
+# 样例正文 HTML 和页面内转换脚本（MARKDOWN_CONVERTER_JS）的输出 <样例名>.md
+MARKDOWN_FIXTURES_DIR = os.path.join(FIXTURES_DIR, 'markdown')
+FIXTURE_NAMES = sorted(name[:-5] for name in os.listdir(MARKDOWN_FIXTURES_DIR) if name.endswith('.html'))
+
+def _load(name: str) -> str:
+    with open(os.path.join(MARKDOWN_FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize('name', FIXTURE_NAMES)
+@pytest.mark.parametrize('save_images', [False, True])
+def test_matches_browser_output(name, save_images):
+    # 页面脚本中 img 没有子内容，保存图片与否输出相同
+    expected = _load(f'{name}.md').rstrip('\n')
+    assert convert_html_to_markdown(_load(f'{name}.html'), save_images=save_images) == expected
+
+def test_payload_text_excludes_script_and_style():
+    payload = extract_content_payload(_load('media.html'))
+    assert payload['has_content']
+    assert '图片前的文字' in payload['text']
+    assert '脚本内容不应出现' not in payload['text']
+    assert 'color: red' not in payload['text']
+
+def test_payload_images():
+    payload = extract_content_payload(_load('media.html'), save_images=True)
+    assert [image['alt'] for image in payload['images']] == ['封面', None, '动图']
+    assert payload['images'][0]['data_src'].startswith('https://mmbiz.qpic.cn/')
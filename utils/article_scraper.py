@@ -1,81 +1,339 @@
 import os
-import time
+import asyncio
 from datetime import datetime
-from playwright.sync_api import sync_playwright
-from .html_to_markdown import html_to_markdown
+from .browser_pool import BrowserPool
+from .image_downloader import image_entries
+from .image_store import IMAGE_STORE_DIR_NAME
+from .image_capture import ImageResponseCapture
+from .page_extractor import extract_article_payload, extract_article_metrics
+from .markdown_converter import extract_content_payload
+from .page_readiness import wait_for_content_stable, DEFAULT_MAX_WAIT_MS
+from .invalid_page import READY_SELECTOR, ANTI_BOT_ERROR_PREFIX, detect_page_state, is_anti_bot_url
 from .text_utils import extract_summary
-import re
+from .errors import (DEFAULT_ARTICLE_DEADLINE, PERMANENT_ERROR_CLASSES, ArticleError, Deadline,
+                     NotFoundError, classify_error)
 
-def fetch_article_content(url, folder_name, save_images=False, retry_count=5):
+def fetch_article_content(url, folder_name, save_images=False, retry_count=5, har_mode=None, har_dir=None):
+    """
+    抓取单篇文章的详细信息，支持重试（同步接口，临时启动一个浏览器）
+    save_images: 是否保存图片
+    har_mode: 'record' 时把完整的网络交互录制到 har_dir 下的 HAR 文件，'replay' 时从 HAR 回放，不访问网络
+    """
+    return asyncio.run(fetch_article_content_async(url, folder_name, save_images, retry_count,
+                                                   har_mode=har_mode, har_dir=har_dir))
+
+async def fetch_article_content_async(url, folder_name, save_images=False, retry_count=5, pool=None,
+                                     http_fetcher=None, collect_html=False, capture_images=False,
+                                     deadline=DEFAULT_ARTICLE_DEADLINE, har_mode=None, har_dir=None):
     """
     抓取单篇文章的详细信息，支持重试
     save_images: 是否保存图片
+    pool: 可复用的浏览器池（BrowserPool），为 None 时临时启动一个浏览器
+    http_fetcher: 传入 HttpArticleFetcher 时先走 HTTP 快速抓取，字段缺失或需要 JavaScript 时再用浏览器
+    collect_html: 在结果的 '_raw_html' 字段中附带正文原始 HTML，由调用方归档后移除
+    capture_images: 保存图片时，直接把浏览器加载页面时收到的图片响应写入图片库，不再重复下载
+    deadline: 单篇文章的总时间预算（秒），所有等待步骤共用，None 表示不限制；
+              也可以传入 Deadline，多次尝试共用同一个预算
+    har_mode/har_dir: 临时启动浏览器时的 HAR 录制或回放设置（传入 pool 时使用浏览器池自己的设置）
+    """
+    budget = deadline if isinstance(deadline, Deadline) else Deadline(deadline)
+    own_pool = pool is None
+    if own_pool:
+        # 浏览器在第一次需要页面时才启动
+        pool = BrowserPool(har_mode=har_mode, har_dir=har_dir)
+
+    try:
+        if http_fetcher:
+            article_data = await _fetch_via_http(http_fetcher, url, folder_name, save_images, collect_html)
+            if article_data:
+                return article_data
+
+        page = await pool.acquire_page(url)
+        policy = pool.resource_policy
+        if policy:
+            policy.reset_page(page)
+        capture = ImageResponseCapture(page) if save_images and capture_images else None
+        try:
+            article_data = await _fetch_with_page(page, url, folder_name, save_images, retry_count,
+                                                  javascript_enabled=policy.javascript_enabled if policy else True,
+                                                  collect_html=collect_html, deadline=budget)
+            if capture and article_data.get('images'):
+                captured = await capture.store_into(article_data['images'], _image_store_root(folder_name))
+                if captured:
+                    print(f"    📸 从页面响应中保存了 {captured} 张图片")
+            if policy:
+                # 记录本篇文章拦截的请求数和估算节省的流量
+                article_data.setdefault('metadata', {})['resource_policy'] = policy.pop_page_stats(page)
+            return article_data
+        finally:
+            if capture:
+                capture.detach()
+            await pool.release_page(page)
+    finally:
+        if own_pool:
+            await pool.close()
+
+async def fetch_article_metrics_async(url, pool, wait_ms=3000):
+    """
+    只刷新阅读量和点赞量：打开页面后不等待正文稳定、不转换 Markdown、不下载图片
+    返回: {'url', 'title', 'read_count', 'like_count', 'metadata'}，
+          已删除或被拦截时返回与完整抓取相同的 deleted/blocked 结果；页面异常时抛出异常
     """
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
+    page = await pool.acquire_page(url)
+    if pool.resource_policy:
+        pool.resource_policy.reset_page(page)
+    try:
+        await page.goto(url, timeout=45000, wait_until='domcontentloaded')
+        if is_anti_bot_url(page.url):
+            print(f"    ⛔ 检测到反爬验证页面")
+            return _blocked_article(url, "验证页面")
+
+        try:
+            await page.wait_for_selector(READY_SELECTOR, timeout=20000)
+        except Exception:
+            if (await detect_page_state(page))['anti_bot_keywords']:
+                print(f"    ⛔ 检测到反爬验证页面")
+                return _blocked_article(url, "验证页面")
+            raise
+
+        page_state = await detect_page_state(page)
+        if page_state['anti_bot_keywords']:
+            print(f"    ⛔ 检测到反爬验证页面 ({page_state['anti_bot_keywords'][0]})")
+            return _blocked_article(url, page_state['anti_bot_keywords'][0])
+        if page_state['invalid_keywords']:
+            print(f"    ⚠️  检测到无效页面，文章可能已被删除或违规 ({page_state['invalid_keywords'][0]})")
+            return _deleted_article(url)
+
+        metrics = await extract_article_metrics(page, wait_ms)
+        if not metrics['title']:
+            raise Exception("未抓取到文章标题，可能页面未完全加载")
+        metrics['url'] = url
+        metrics['metadata'] = {'metrics_time': datetime.now().isoformat()}
+        return metrics
+    finally:
+        await pool.release_page(page)
+
+def _new_article_data(url, save_images, fetch_mode='browser'):
+    """创建空的文章数据结构"""
+    return {
+        'url': url,
+        'title': '',
+        'author': '',
+        'publish_time': '',
+        'read_count': '',
+        'like_count': '',
+        'content': '',
+        'summary': '',
+        'content_format': 'markdown',
+        'images': [] if save_images else None,  # 只在需要时初始化图片列表
+        'metadata': {
+            'crawl_time': datetime.now().isoformat(),
+            'markdown_enabled': True,
+            'images_saved': False,
+            'image_count': 0,
+            'fetch_mode': fetch_mode,
+            'version': '1.0'
+        }
+    }
+
+def _deleted_article(url):
+    """已删除/违规文章的返回结果"""
+    return {
+        'url': url,
+        'title': '',
+        'author': '',
+        'publish_time': '',
+        'read_count': '',
+        'like_count': '',
+        'content': '',
+        'error': '文章已被删除或违规，无法查看',
+        'status': 'deleted'
+    }
+
+def _blocked_article(url, keyword):
+    """被反爬验证页面拦截时的返回结果（由熔断器决定何时恢复抓取）"""
+    return {
+        'url': url,
+        'title': '',
+        'author': '',
+        'publish_time': '',
+        'read_count': '',
+        'like_count': '',
+        'content': '',
+        'error': f"{ANTI_BOT_ERROR_PREFIX}: {keyword}",
+        'status': 'blocked'
+    }
+
+def _image_store_root(folder_name):
+    """批次文件夹旁边的共享图片库目录"""
+    return os.path.join(os.path.dirname(os.path.normpath(folder_name)), IMAGE_STORE_DIR_NAME)
+
+async def _apply_content(article_data, payload, folder_name, save_images):
+    """把提取到的正文（Markdown 或纯文本）和图片写入文章数据"""
+    # 图片保存在批次文件夹旁边的共享图片库中（由 ImageDownloader 下载）
+    if save_images:
+        article_data['images_dir'] = os.path.relpath(_image_store_root(folder_name), folder_name)
+    
+    if not payload.get('has_content'):
+        return
+    
+    try:
+        if payload.get('markdown') is None:
+            raise Exception(payload.get('markdown_error') or "Markdown转换出错")
+        content = payload['markdown']
+        article_data['content'] = content
+        if save_images:
+            # 只记录图片链接，由调用方的 ImageDownloader 在独立的下载阶段中下载
+            article_data['images'] = image_entries(payload.get('images', []))
         
-        # 注入辅助函数
-        page.add_init_script("""
-            window.getComputedStyle = window.getComputedStyle || function(element) {
-                return element.currentStyle;
-            };
-        """)
+        # 提取摘要
+        article_data['summary'] = extract_summary(content)
         
-        # 设置更长的超时时间
-        page.set_default_timeout(45000)
+        if not content:
+            raise Exception("内容转换后为空")
         
-        for attempt in range(retry_count):
+    except Exception as e:
+        print(f"    ⚠️ 内容转换失败: {e}")
+        # 退回页面内提取的纯文本
+        content = payload.get('text', '')
+        article_data['content'] = content
+        article_data['content_format'] = 'plain'
+        article_data['metadata']['markdown_enabled'] = False
+        # 即使是纯文本也尝试提取摘要
+        article_data['summary'] = extract_summary(content)
+
+async def _fetch_via_http(http_fetcher, url, folder_name, save_images, collect_html=False):
+    """
+    HTTP 快速抓取：直接解析页面初始 HTML
+    成功时返回文章数据；字段缺失、需要 JavaScript 或请求失败时返回 None，由浏览器接手
+    阅读量和点赞量由页面脚本加载，初始 HTML 中没有，结果中留空并标记 metadata['metrics_pending']，
+    之后可以用 metrics_refresher 补齐
+    """
+    print(f"    ⚡ HTTP 快速抓取...")
+    parsed = await asyncio.to_thread(http_fetcher.fetch_article, url)
+    
+    if parsed['status'] == 'blocked':
+        # 验证页面不再改用浏览器，避免加重限制
+        print(f"    ⛔ 检测到反爬验证页面 ({parsed['anti_bot_keywords'][0]})")
+        return _blocked_article(url, parsed['anti_bot_keywords'][0])
+    
+    if parsed['status'] == 'deleted':
+        print(f"    ⚠️  检测到无效页面，文章可能已被删除或违规 ({parsed['invalid_keywords'][0]})")
+        return _deleted_article(url)
+    
+    if parsed['status'] != 'ok':
+        print(f"    ↪️ HTTP 结果不完整（缺少 {', '.join(parsed['missing'])}），改用浏览器抓取")
+        return None
+    
+    # 离线转换正文，规则与页面内转换脚本一致，不需要浏览器
+    payload = extract_content_payload(parsed['content_html'], url, save_images)
+    
+    article_data = _new_article_data(url, save_images, fetch_mode='http')
+    for field in ('title', 'author', 'publish_time'):
+        article_data[field] = parsed.get(field) or ''
+    article_data['metadata']['content_wait_ms'] = 0
+    article_data['metadata']['metrics_pending'] = True
+    await _apply_content(article_data, payload, folder_name, save_images)
+    
+    if not article_data['content']:
+        print(f"    ↪️ HTTP 结果正文为空，改用浏览器抓取")
+        return None
+    if collect_html:
+        article_data['_raw_html'] = parsed['content_html']
+    return article_data
+
+async def _fetch_with_page(page, url, folder_name, save_images, retry_count, javascript_enabled=True,
+                           collect_html=False, deadline=None):
+    """
+    使用给定页面抓取文章，失败时在同一页面上重试
+    javascript_enabled: 页面是否启用了 JavaScript（lite 档位下关闭）
+    collect_html: 是否附带正文原始 HTML（'_raw_html'）
+    deadline: 时间预算（Deadline），各步骤的超时从剩余时间中扣除
+    失败结果的 'error_class' 记录错误分类，链接无效等永久性错误不再重试
+    """
+    deadline = deadline or Deadline(None)
+    for attempt in range(retry_count):
+        try:
+            print(f"    尝试第 {attempt + 1} 次访问...")
+            response = await page.goto(url, timeout=deadline.timeout_ms(45000))
+            if response is not None and response.status in (404, 410):
+                raise NotFoundError(f"HTTP {response.status}")
+            
+            # 等待页面基本加载完成
+            await page.wait_for_load_state('domcontentloaded', timeout=deadline.timeout_ms(20000))
+            
+            # 被重定向到验证页面
+            if is_anti_bot_url(page.url):
+                print(f"    ⛔ 检测到反爬验证页面")
+                return _blocked_article(url, "验证页面")
+            
+            # 正文和错误提示容器竞速等待，已删除的文章不必等满正文超时
             try:
-                print(f"    尝试第 {attempt + 1} 次访问...")
-                page.goto(url, timeout=45000)
-                
-                # 等待页面基本加载完成
-                page.wait_for_load_state('domcontentloaded', timeout=20000)
-                
-                # 等待主要内容加载
-                page.wait_for_selector('div#js_content', timeout=20000)
-                
-                # 额外等待一下，确保内容加载
-                page.wait_for_timeout(5000)
-                
-                # 检查页面是否有效（文章是否存在）
-                page_content = page.content()
-                
-                # 检测删除/违规页面的关键词
-                invalid_keywords = [
-                    "此内容发送失败无法查看",
-                    "此内容因涉嫌违反相关法律法规和政策发送失败",
-                    "内容已删除",
-                    "文章不存在",
-                    "该内容已被删除",
-                    "内容违规",
-                    "无法查看",
-                    "发送失败",
-                    "违规内容",
-                    "内容不存在"
-                ]
-                
-                is_invalid_page = any(keyword in page_content for keyword in invalid_keywords)
-                
-                if is_invalid_page:
-                    print(f"    ⚠️  检测到无效页面，文章可能已被删除或违规")
-                    browser.close()
-                    return {
-                        'url': url,
-                        'title': '',
-                        'author': '',
-                        'publish_time': '',
-                        'read_count': '',
-                        'like_count': '',
-                        'content': '',
-                        'error': '文章已被删除或违规，无法查看',
-                        'status': 'deleted'
-                    }
-                
-                # 提取文章信息
-                article_data = {
+                await page.wait_for_selector(READY_SELECTOR, timeout=deadline.timeout_ms(20000))
+            except Exception:
+                # 验证页面既没有正文也没有错误提示容器，超时后检查页面文本
+                if (await detect_page_state(page))['anti_bot_keywords']:
+                    print(f"    ⛔ 检测到反爬验证页面")
+                    return _blocked_article(url, "验证页面")
+                raise
+            
+            # 检查页面是否有效（只扫描错误提示容器的文本）
+            page_state = await detect_page_state(page)
+            
+            if page_state['anti_bot_keywords']:
+                print(f"    ⛔ 检测到反爬验证页面 ({page_state['anti_bot_keywords'][0]})")
+                # 由调用方的熔断器统一暂停，不在这里重试
+                return _blocked_article(url, page_state['anti_bot_keywords'][0])
+            
+            if page_state['invalid_keywords']:
+                print(f"    ⚠️  检测到无效页面，文章可能已被删除或违规 ({page_state['invalid_keywords'][0]})")
+                # 已确认删除的文章直接返回，不再重试
+                return _deleted_article(url)
+            
+            if not page_state['has_content']:
+                raise ArticleError("页面出现错误提示，未找到正文")
+            
+            # 等待正文稳定（DOM 不再变化、懒加载图片替换完成），而不是固定等待 5 秒
+            # 关闭 JavaScript 时正文由服务端渲染，不会再变化，无需等待
+            if javascript_enabled:
+                readiness = await wait_for_content_stable(page, max_ms=int(deadline.timeout_ms(DEFAULT_MAX_WAIT_MS)))
+            else:
+                readiness = {'waited_ms': 0, 'stable': True}
+            
+            # 提取文章信息
+            article_data = _new_article_data(url, save_images)
+            article_data['metadata']['content_wait_ms'] = readiness.get('waited_ms')
+            article_data['metadata']['content_stable'] = readiness.get('stable')
+            
+            # 一次 page.evaluate 提取全部字段（元数据、图片列表、正文 Markdown）
+            payload = await extract_article_payload(page, save_images, collect_html)
+            for field in ('title', 'author', 'publish_time', 'read_count', 'like_count'):
+                article_data[field] = payload.get(field) or ''
+            
+            # 提取正文内容
+            await _apply_content(article_data, payload, folder_name, save_images)
+            
+            # 检查是否成功抓取到有效内容
+            if article_data.get('title') and len(article_data.get('title', '').strip()) > 0:
+                if collect_html and payload.get('html'):
+                    article_data['_raw_html'] = payload['html']
+                return article_data
+            else:
+                # 如果没有抓取到标题，继续重试
+                raise ArticleError("未抓取到文章标题，可能页面未完全加载")
+            
+        except Exception as e:
+            print(f"    第 {attempt + 1} 次尝试失败: {e}")
+            error_class = classify_error(exception=e)
+            # 递增等待时间，避免频繁请求
+            wait_time = (attempt + 1) * 3
+            if (attempt < retry_count - 1 and error_class not in PERMANENT_ERROR_CLASSES
+                    and deadline.remaining() > wait_time):
+                print(f"    等待 {wait_time} 秒后重试...")
+                await asyncio.sleep(wait_time)
+            else:
+                print(f"    所有重试都失败了" if attempt == retry_count - 1 else f"    不再重试 ({error_class})")
+                return {
                     'url': url,
                     'title': '',
                     'author': '',
@@ -84,129 +342,7 @@ def fetch_article_content(url, folder_name, save_images=False, retry_count=5):
                     'like_count': '',
                     'content': '',
                     'summary': '',
-                    'content_format': 'markdown',
-                    'images': [] if save_images else None,  # 只在需要时初始化图片列表
-                    'metadata': {
-                        'crawl_time': datetime.now().isoformat(),
-                        'markdown_enabled': True,
-                        'images_saved': False,
-                        'image_count': 0,
-                        'version': '1.0'
-                    }
-                }
-                
-                # 提取标题
-                try:
-                    title_element = page.query_selector('h1.rich_media_title')
-                    if title_element:
-                        article_data['title'] = title_element.inner_text().strip()
-                except:
-                    pass
-                
-                # 提取作者
-                try:
-                    author_element = page.query_selector('a#js_name')
-                    if author_element:
-                        article_data['author'] = author_element.inner_text().strip()
-                except:
-                    pass
-                
-                # 提取发布时间
-                try:
-                    time_element = page.query_selector('em#publish_time')
-                    if time_element:
-                        article_data['publish_time'] = time_element.inner_text().strip()
-                except:
-                    pass
-                
-                # 提取阅读量和点赞量
-                try:
-                    read_element = page.query_selector('span#js_read_area')
-                    if read_element:
-                        read_text = read_element.inner_text().strip()
-                        read_match = re.search(r'(\d+)', read_text)
-                        if read_match:
-                            article_data['read_count'] = read_match.group(1)
-                except:
-                    pass
-                
-                try:
-                    like_element = page.query_selector('span#like_area')
-                    if like_element:
-                        like_text = like_element.inner_text().strip()
-                        like_match = re.search(r'(\d+)', like_text)
-                        if like_match:
-                            article_data['like_count'] = like_match.group(1)
-                except:
-                    pass
-                
-                # 创建图片保存目录（仅在需要时）
-                images_dir = os.path.join(folder_name, 'images') if save_images else None
-                if save_images:
-                    os.makedirs(images_dir, exist_ok=True)
-                    article_data['images_dir'] = os.path.relpath(images_dir, folder_name)
-                
-                # 提取正文内容
-                try:
-                    content_element = page.query_selector('div#js_content')
-                    if content_element:
-                        # 将内容转换为Markdown格式
-                        content, images = html_to_markdown(content_element, page, images_dir, save_images)
-                        article_data['content'] = content
-                        if save_images:
-                            article_data['images'] = images
-                            if images:
-                                article_data['metadata']['images_saved'] = True
-                                article_data['metadata']['image_count'] = len(images)
-                        
-                        # 提取摘要
-                        article_data['summary'] = extract_summary(content)
-                        
-                        if not content:
-                            raise Exception("内容转换后为空")
-                        
-                except Exception as e:
-                    print(f"    ⚠️ 内容转换失败: {e}")
-                    # 尝试基本的文本提取
-                    try:
-                        content_element = page.query_selector('div#js_content')
-                        if content_element:
-                            content = content_element.inner_text().strip()
-                            article_data['content'] = content
-                            article_data['content_format'] = 'plain'
-                            article_data['metadata']['markdown_enabled'] = False
-                            # 即使是纯文本也尝试提取摘要
-                            article_data['summary'] = extract_summary(content)
-                    except:
-                        pass
-                
-                # 检查是否成功抓取到有效内容
-                if article_data.get('title') and len(article_data.get('title', '').strip()) > 0:
-                    browser.close()
-                    return article_data
-                else:
-                    # 如果没有抓取到标题，继续重试
-                    raise Exception("未抓取到文章标题，可能页面未完全加载")
-                
-            except Exception as e:
-                print(f"    第 {attempt + 1} 次尝试失败: {e}")
-                if attempt < retry_count - 1:
-                    # 递增等待时间，避免频繁请求
-                    wait_time = (attempt + 1) * 3
-                    print(f"    等待 {wait_time} 秒后重试...")
-                    time.sleep(wait_time)
-                else:
-                    print(f"    所有重试都失败了")
-                    browser.close()
-                    return {
-                        'url': url,
-                        'title': '',
-                        'author': '',
-                        'publish_time': '',
-                        'read_count': '',
-                        'like_count': '',
-                        'content': '',
-                        'summary': '',
-                        'error': f"重试 {retry_count} 次后仍然失败: {str(e)}",
-                        'images': [] if save_images else None
-                    } 
\ No newline at end of file
+                    'error': f"重试 {attempt + 1} 次后仍然失败: {str(e)}" if attempt > 0 else str(e),
+                    'error_class': error_class,
+                    'images': [] if save_images else None
+                } 
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+跨批次的文章库索引
+
+按文章规范标识（__biz_mid_idx）记录每篇已成功抓取的文章保存在哪个批次文件夹中，
+新的批次抓取前先查索引，已有的文章直接从原批次复制，不再重复抓取
+
+重建索引（扫描 Output 下的所有批次）:
+    python -m utils.article_store --reindex
+"""
+import os
+import json
+import copy
+import shutil
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from .html_archive import ARCHIVE_DIR_NAME
+from .link_resolver import LinkResolver, CACHE_DIR_NAME
+
+STORE_DIR_NAME = '.store'
+INDEX_FILE_NAME = 'index.json'
+INDEX_VERSION = 1
+
+def _unique_path(src: str, dst: str) -> str:
+    """目标位置已有其他同名文件时添加数字后缀（与下载图片时的命名方式一致）"""
+    base, ext = os.path.splitext(dst)
+    counter = 1
+    while os.path.exists(dst) and not os.path.samefile(src, dst):
+        dst = f"{base}_{counter}{ext}"
+        counter += 1
+    return dst
+
+def _link_or_copy(src: str, dst: str) -> bool:
+    """优先创建硬链接（不占额外空间），跨磁盘等情况下退回复制"""
+    if os.path.exists(dst):
+        return True
+    try:
+        os.link(src, dst)
+    except OSError:
+        try:
+            shutil.copy2(src, dst)
+        except OSError as e:
+            print(f"    ⚠️ 复制文件失败 ({os.path.basename(src)}): {e}")
+            return False
+    return True
+
+class ArticleStore:
+    """
+    文章库索引: Output/.store/index.json
+    {规范标识: {'batch': 批次文件夹名, 'url', 'title', 'crawl_time', 'has_images'}}
+    索引只记录位置，文章内容仍保存在各批次的 articles_detailed.json 中
+    """
+
+    def __init__(self, output_dir: str, link_resolver: Optional[LinkResolver] = None):
+        self.output_dir = output_dir
+        self.index_file = os.path.join(output_dir, STORE_DIR_NAME, INDEX_FILE_NAME)
+        self.link_resolver = link_resolver or LinkResolver(os.path.join(output_dir, CACHE_DIR_NAME))
+        # 已读取的批次文章: 批次文件夹名 -> {url: 文章}
+        self._batch_cache: Dict[str, Dict[str, Dict]] = {}
+        self.articles: Dict[str, Dict] = {}
+        if os.path.exists(self.index_file):
+            self._load()
+        else:
+            self.reindex()
+
+    def _load(self) -> None:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.articles = data.get('articles', {})
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 读取文章库索引失败，重新建立: {e}")
+            self.reindex()
+
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+            tmp_file = self.index_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': INDEX_VERSION,
+                    'updated_time': datetime.now().isoformat(),
+                    'articles': self.articles,
+                }, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            print(f"⚠️ 保存文章库索引失败: {e}")
+
+    def key_for(self, url: str) -> Optional[str]:
+        return self.link_resolver.key_for(url)
+
+    def reindex(self) -> int:
+        """扫描 Output 下所有批次的 articles_detailed.json 重建索引，返回收录的文章数"""
+        self.articles = {}
+        if os.path.isdir(self.output_dir):
+            # 按文件夹名（含时间戳）排序，同一篇文章以最新的批次为准
+            for batch_name in sorted(os.listdir(self.output_dir)):
+                for article in self._read_batch(batch_name).values():
+                    self.add(os.path.join(self.output_dir, batch_name), article)
+        self.save()
+        print(f"📚 文章库索引已建立: {len(self.articles)} 篇文章")
+        return len(self.articles)
+
+    def _read_batch(self, batch_name: str) -> Dict[str, Dict]:
+        """读取批次的文章（按链接索引），结果缓存在内存中"""
+        if batch_name not in self._batch_cache:
+            articles_file = os.path.join(self.output_dir, batch_name, "articles_detailed.json")
+            articles = {}
+            if os.path.isfile(articles_file):
+                try:
+                    with open(articles_file, 'r', encoding='utf-8') as f:
+                        articles = {a['url']: a for a in json.load(f) if a.get('url')}
+                except (OSError, ValueError, TypeError):
+                    articles = {}
+            self._batch_cache[batch_name] = articles
+        return self._batch_cache[batch_name]
+
+    def add(self, batch_folder: str, article: Dict, key: Optional[str] = None) -> None:
+        """把成功抓取的文章记入索引"""
+        url = article.get('url')
+        if not url or not article.get('title'):
+            return
+        key = key or self.key_for(url)
+        if not key:
+            return
+        self.articles[key] = {
+            'batch': os.path.basename(os.path.normpath(batch_folder)),
+            'url': url,
+            'title': article.get('title'),
+            'crawl_time': article.get('metadata', {}).get('crawl_time'),
+            'has_images': article.get('images') is not None,
+        }
+
+    def lookup(self, url: str, need_images: bool = False) -> Optional[Tuple[str, Dict]]:
+        """
+        查找已保存的文章
+        need_images: 本次需要图片时，只接受当时也保存了图片的记录
+        返回: (源批次文件夹名, 文章数据) 或 None
+        """
+        key = self.key_for(url)
+        entry = self.articles.get(key) if key else None
+        if not entry or (need_images and not entry.get('has_images')):
+            return None
+        article = self._read_batch(entry['batch']).get(entry['url'])
+        if not article or not article.get('title'):
+            # 源批次已被删除或修改
+            return None
+        return entry['batch'], article
+
+    def partition(self, urls: List[str], need_images: bool = False) -> Tuple[List[str], List[Tuple[str, str, Dict]]]:
+        """
+        把链接分为需要抓取的和可以复用的
+        返回: (待抓取链接, [(链接, 源批次文件夹名, 文章数据), ...])
+        """
+        to_fetch, reused = [], []
+        for url in urls:
+            found = self.lookup(url, need_images)
+            if found:
+                reused.append((url, found[0], found[1]))
+            else:
+                to_fetch.append(url)
+        return to_fetch, reused
+
+    def copy_into_batch(self, url: str, source_batch: str, article: Dict, batch_folder: str) -> Dict:
+        """
+        把已保存的文章复制到新批次：旧版批次内的图片和原始 HTML 归档以硬链接（或复制）方式带过来
+        返回新批次中的文章数据
+        """
+        source_folder = os.path.join(self.output_dir, source_batch)
+        article = copy.deepcopy(article)
+        article['url'] = url
+
+        # 图片库中的图片（带 sha256）所有批次共用，不需要复制；只处理旧版保存在批次 images/ 下的图片
+        images = [image for image in article.get('images') or [] if not image.get('sha256')]
+        if images:
+            images_dir = os.path.join(batch_folder, 'images')
+            os.makedirs(images_dir, exist_ok=True)
+            for image in images:
+                filename = image.get('filename') or os.path.basename(image.get('local_path') or '')
+                src = os.path.join(source_folder, 'images', filename)
+                if filename and os.path.isfile(src):
+                    dst = _unique_path(src, os.path.join(images_dir, filename))
+                    if _link_or_copy(src, dst):
+                        image['local_path'] = dst
+                        image['filename'] = os.path.basename(dst)
+
+        metadata = article.setdefault('metadata', {})
+        raw_html = metadata.get('raw_html')
+        if raw_html and os.path.isfile(os.path.join(source_folder, raw_html)):
+            os.makedirs(os.path.join(batch_folder, ARCHIVE_DIR_NAME), exist_ok=True)
+            _link_or_copy(os.path.join(source_folder, raw_html), os.path.join(batch_folder, raw_html))
+
+        metadata['reused_from'] = source_batch
+        metadata['reused_time'] = datetime.now().isoformat()
+        return article
+
+def main():
+    parser = argparse.ArgumentParser(description='跨批次文章库索引')
+    parser.add_argument('--reindex', action='store_true', help='扫描 Output 下的所有批次，重建索引')
+    args = parser.parse_args()
+
+    output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Output")
+    # 索引不存在时创建 ArticleStore 会自动扫描一次，不必重复
+    index_exists = os.path.exists(os.path.join(output_dir, STORE_DIR_NAME, INDEX_FILE_NAME))
+    store = ArticleStore(output_dir)
+    if args.reindex and index_exists:
+        store.reindex()
+    print(f"📚 文章库共 {len(store.articles)} 篇文章: {store.index_file}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import hashlib
+from typing import Dict, Optional
+
+# 静态资源缓存，位于 Output 目录下，所有批次共用
+ASSET_CACHE_DIR_NAME = '.assets'
+INDEX_FILE_NAME = 'index.json'
+# 缓存大小上限（MB），超过后按最近使用时间淘汰
+DEFAULT_ASSET_CACHE_MB = 256
+# 单个资源的大小上限（字节），更大的资源不缓存
+MAX_ASSET_BYTES = 5 * 1024 * 1024
+
+# 可以缓存的资源：微信静态资源域名下的脚本、样式表和字体
+# 这些文件名中带有版本号，内容不会变化；文章 HTML、图片和接口请求不缓存
+STATIC_ASSET_HOSTS = (
+    'res.wx.qq.com',
+)
+CACHEABLE_TYPES = {'script', 'stylesheet', 'font'}
+# 回放时保留的响应头
+KEPT_HEADERS = ('content-type', 'access-control-allow-origin', 'timing-allow-origin')
+
+def is_static_asset(resource_type: str, url: str) -> bool:
+    if resource_type not in CACHEABLE_TYPES:
+        return False
+    host = url.split('://', 1)[-1].split('/', 1)[0].lower()
+    return any(host == static_host or host.endswith('.' + static_host) for static_host in STATIC_ASSET_HOSTS)
+
+class AssetCache:
+    """
+    浏览器静态资源的磁盘缓存：Output/.assets/<sha1(url)>
+    每篇文章都会加载相同的微信 JS/CSS 和字体，浏览器 context 重启后内存缓存失效，
+    这里通过路由拦截直接用本地文件响应，只有文章 HTML 和各篇文章独有的资源才请求网络
+    缓存总大小超过上限时按最近使用时间淘汰
+    多进程抓取时各工作进程共用缓存目录，保存索引时合并其他进程写入的条目
+    """
+
+    def __init__(self, cache_dir: str, max_mb: float = DEFAULT_ASSET_CACHE_MB):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, INDEX_FILE_NAME)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries: Dict[str, Dict] = self._load_index()
+        # 当前缓存总大小，写入时累加，超过上限立即淘汰
+        self._total_bytes = self._sum_sizes()
+        self._dirty = False
+        self.stats = {'hits': 0, 'misses': 0, 'stored': 0, 'evicted': 0,
+                      'bytes_served': 0, 'bytes_fetched': 0}
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _sum_sizes(self) -> int:
+        return sum(entry.get('size', 0) for entry in self.entries.values())
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def get(self, url: str) -> Optional[Dict]:
+        """返回 {'body', 'headers'}，未缓存或文件丢失时返回 None"""
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        try:
+            with open(self._path(url), 'rb') as f:
+                body = f.read()
+        except OSError:
+            self.entries.pop(url, None)
+            self._total_bytes -= entry.get('size', 0)
+            self._dirty = True
+            return None
+        entry['last_used'] = time.time()
+        self._dirty = True
+        return {'body': body, 'headers': entry['headers']}
+
+    def put(self, url: str, body: bytes, headers: Dict[str, str]) -> None:
+        path = self._path(url)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"    ⚠️ 写入静态资源缓存失败: {e}")
+            return
+        previous = self.entries.get(url)
+        if previous:
+            self._total_bytes -= previous.get('size', 0)
+        self.entries[url] = {
+            'headers': {name: value for name, value in headers.items() if name.lower() in KEPT_HEADERS},
+            'size': len(body),
+            'last_used': time.time(),
+        }
+        self._total_bytes += len(body)
+        self.stats['stored'] += 1
+        self._dirty = True
+        # 长时间运行的批次不等到保存索引时才淘汰，避免缓存目录在运行期间无限增长
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    async def handle_route(self, route) -> None:
+        """路由回调：静态资源优先使用本地缓存，未缓存时请求网络并写入缓存，其他请求交给后续路由"""
+        request = route.request
+        url = request.url
+        if request.method != 'GET' or not is_static_asset(request.resource_type, url):
+            await route.fallback()
+            return
+
+        cached = self.get(url)
+        if cached is not None:
+            self.stats['hits'] += 1
+            self.stats['bytes_served'] += len(cached['body'])
+            await route.fulfill(status=200, headers=cached['headers'], body=cached['body'])
+            return
+
+        self.stats['misses'] += 1
+        try:
+            response = await route.fetch()
+        except Exception:
+            # 请求失败时交给浏览器自己处理（页面会看到原本的网络错误）
+            await route.fallback()
+            return
+        try:
+            body = await response.body()
+        except Exception:
+            await route.fulfill(response=response)
+            return
+        self.stats['bytes_fetched'] += len(body)
+        cache_control = response.headers.get('cache-control', '').lower()
+        if response.status == 200 and body and len(body) <= MAX_ASSET_BYTES and 'no-store' not in cache_control:
+            self.put(url, body, response.headers)
+        await route.fulfill(response=response, body=body)
+
+    def _evict(self) -> None:
+        """按最近使用时间淘汰，直到总大小不超过上限"""
+        total = self._total_bytes
+        if total <= self.max_bytes:
+            return
+        for url, entry in sorted(self.entries.items(), key=lambda item: item[1].get('last_used', 0)):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(url))
+            except OSError:
+                pass
+            total -= entry.get('size', 0)
+            del self.entries[url]
+            self.stats['evicted'] += 1
+        self._total_bytes = total
+
+    def save(self) -> None:
+        """合并磁盘上的索引（其他工作进程可能写入了新条目），淘汰超出上限的资源后写回"""
+        if not self._dirty:
+            return
+        merged = self._load_index()
+        for url, entry in self.entries.items():
+            existing = merged.get(url)
+            if not existing or existing.get('last_used', 0) < entry.get('last_used', 0):
+                merged[url] = entry
+        # 其他进程已淘汰的条目（文件不存在）不再保留
+        self.entries = {url: entry for url, entry in merged.items() if os.path.exists(self._path(url))}
+        self._total_bytes = self._sum_sizes()
+        self._evict()
+        try:
+            tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_file, self.index_file)
+            self._dirty = False
+        except OSError as e:
+            print(f"⚠️ 保存静态资源缓存索引失败: {e}")
+
+    def get_stats(self) -> Dict:
+        """本批次的缓存命中情况，写入 crawl_info.json"""
+        requests = self.stats['hits'] + self.stats['misses']
+        return dict(
+            self.stats,
+            hit_rate=round(self.stats['hits'] / requests, 3) if requests else None,
+            cached_assets=len(self.entries),
+            cached_bytes=self._total_bytes,
+            max_bytes=self.max_bytes,
+        )
@@ -0,0 +1,223 @@
+import os
+import json
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import psutil
+except ImportError:  # psutil 为可选依赖，缺失时只按失败率和耗时调整
+    psutil = None
+
+# 两次评估之间的间隔（秒）
+DEFAULT_AUTOSCALE_INTERVAL = 15
+# 每次评估至少需要的新样本数（篇），样本太少时保持不变
+DEFAULT_MIN_SAMPLES = 4
+# 用于计算失败率和耗时的最近样本数
+DEFAULT_WINDOW = 20
+# 主机 CPU 占用率阈值（%）：高于上限时减少页面，低于下限时才允许增加
+DEFAULT_CPU_HIGH = 85.0
+DEFAULT_CPU_LOW = 65.0
+# 主机至少保留的可用内存（MB），低于该值时页面数减半
+DEFAULT_MIN_FREE_MB = 1024
+# 最近失败率阈值：高于上限时减少页面，不高于下限时才允许增加
+DEFAULT_ERROR_HIGH = 0.3
+DEFAULT_ERROR_LOW = 0.1
+# 最近耗时中位数超过历史最好值的倍数时视为变慢，减少页面
+DEFAULT_LATENCY_FACTOR = 2.0
+# 决策日志文件名，位于批次文件夹中，每行一条 JSON
+AUTOSCALE_LOG_NAME = 'autoscale_log.jsonl'
+# crawl_info.json 中最多保留的调整记录数
+MAX_AUTOSCALE_EVENTS = 100
+
+class ConcurrencyAutoscaler:
+    """
+    按资源和抓取情况自动调整同时抓取的页面数（在 min_pages 和 max_pages 之间）
+    从 min_pages 开始，每隔 interval 秒评估一次：
+    - 可用内存低于下限时页面数减半；CPU 过高、失败率过高或耗时明显变长时减少一个
+    - 页面数已用满，且 CPU、内存（按单页内存估算再开一个页面后）、失败率都有余量时增加一个
+    每次评估的指标和决定都写入决策日志，便于根据实际数据调整上下限
+    多进程模式下每个工作进程各自调整，主机 CPU 和内存为所有进程共用
+    """
+
+    def __init__(self, min_pages: int = 1, max_pages: int = 4,
+                 interval: float = DEFAULT_AUTOSCALE_INTERVAL,
+                 min_samples: int = DEFAULT_MIN_SAMPLES,
+                 window: int = DEFAULT_WINDOW,
+                 cpu_high: float = DEFAULT_CPU_HIGH,
+                 cpu_low: float = DEFAULT_CPU_LOW,
+                 min_free_mb: float = DEFAULT_MIN_FREE_MB,
+                 error_high: float = DEFAULT_ERROR_HIGH,
+                 error_low: float = DEFAULT_ERROR_LOW,
+                 latency_factor: float = DEFAULT_LATENCY_FACTOR,
+                 log_file: Optional[str] = None):
+        self.max_pages = max(1, max_pages)
+        self.min_pages = min(max(1, min_pages), self.max_pages)
+        self.interval = interval
+        self.min_samples = max(1, min_samples)
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.min_free_mb = min_free_mb
+        self.error_high = error_high
+        self.error_low = error_low
+        self.latency_factor = latency_factor
+        self.log_file = log_file
+
+        self.limit = self.min_pages
+        self.peak_limit = self.limit
+        self._active = 0
+        # 评估间隔内同时在用的最多页面数，用于判断页面数是否已用满
+        self._peak_active = 0
+        self._cond = asyncio.Condition()
+        # 最近的样本: (耗时秒数, 是否成功)
+        self._samples = deque(maxlen=max(1, window))
+        self._new_samples = 0
+        self._best_latency: Optional[float] = None
+        self.change_count = 0
+        self.events: List[Dict] = []
+
+        if psutil is None:
+            print("⚠️ 未安装 psutil，自动并发只按失败率和耗时调整")
+        else:
+            # 第一次调用返回无意义的 0，先初始化
+            psutil.cpu_percent(interval=None)
+
+    @asynccontextmanager
+    async def slot(self):
+        """占用一个页面名额，在用页面数达到当前上限时等待"""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+            self._peak_active = max(self._peak_active, self._active)
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def record(self, latency: float, ok: bool) -> None:
+        """记录一篇文章的抓取耗时和结果"""
+        self._samples.append((latency, ok))
+        self._new_samples += 1
+
+    def _snapshot(self, browser_rss_mb: Optional[float], open_pages: int) -> Dict:
+        """采集本次评估使用的指标"""
+        samples = list(self._samples)
+        ok_latencies = [latency for latency, ok in samples if ok]
+        metrics = {
+            'limit': self.limit,
+            'peak_active': self._peak_active,
+            'samples': len(samples),
+            'new_samples': self._new_samples,
+            'error_rate': round(sum(1 for _, ok in samples if not ok) / len(samples), 3) if samples else None,
+            'latency_median': round(median(ok_latencies), 2) if ok_latencies else None,
+            'best_latency': round(self._best_latency, 2) if self._best_latency else None,
+            'cpu_percent': None,
+            'free_mb': None,
+            'browser_rss_mb': round(browser_rss_mb, 1) if browser_rss_mb is not None else None,
+            'rss_per_page_mb': round(browser_rss_mb / open_pages, 1) if browser_rss_mb and open_pages else None,
+        }
+        if psutil is not None:
+            try:
+                metrics['cpu_percent'] = psutil.cpu_percent(interval=None)
+                metrics['free_mb'] = round(psutil.virtual_memory().available / (1024 * 1024), 1)
+            except Exception:
+                pass
+        return metrics
+
+    def _decide(self, metrics: Dict) -> Tuple[int, str]:
+        """根据指标决定新的页面数，返回 (页面数, 原因)"""
+        limit = self.limit
+        free_mb = metrics['free_mb']
+        cpu = metrics['cpu_percent']
+        error_rate = metrics['error_rate']
+        latency = metrics['latency_median']
+
+        if free_mb is not None and free_mb < self.min_free_mb:
+            return max(self.min_pages, limit // 2), f"可用内存 {free_mb:.0f}MB 低于 {self.min_free_mb:.0f}MB"
+        if metrics['new_samples'] < self.min_samples:
+            return limit, "样本不足"
+        if cpu is not None and cpu > self.cpu_high:
+            return max(self.min_pages, limit - 1), f"CPU {cpu:.0f}% 高于 {self.cpu_high:.0f}%"
+        if error_rate is not None and error_rate > self.error_high:
+            return max(self.min_pages, limit - 1), f"失败率 {error_rate:.0%} 高于 {self.error_high:.0%}"
+        if latency and self._best_latency and latency > self._best_latency * self.latency_factor:
+            return max(self.min_pages, limit - 1), \
+                f"耗时中位数 {latency:.1f}s 超过最好值 {self._best_latency:.1f}s 的 {self.latency_factor:g} 倍"
+
+        if limit >= self.max_pages:
+            return limit, "已达上限"
+        if metrics['peak_active'] < limit:
+            return limit, "页面未用满"
+        if cpu is not None and cpu > self.cpu_low:
+            return limit, f"CPU {cpu:.0f}% 余量不足"
+        if free_mb is not None and free_mb - (metrics['rss_per_page_mb'] or 0) < self.min_free_mb:
+            return limit, "内存余量不足以再开一个页面"
+        if error_rate is not None and error_rate > self.error_low:
+            return limit, f"失败率 {error_rate:.0%} 偏高"
+        return limit + 1, "资源有余量"
+
+    async def evaluate(self, browser_rss_mb: Optional[float] = None, open_pages: int = 0) -> int:
+        """评估一次并调整页面数，返回调整后的页面数"""
+        metrics = self._snapshot(browser_rss_mb, open_pages)
+        new_limit, reason = self._decide(metrics)
+        action = 'up' if new_limit > self.limit else 'down' if new_limit < self.limit else 'hold'
+
+        if metrics['latency_median'] and action != 'down':
+            # 只在状态正常时更新最好耗时，变慢期间的耗时不作为基准
+            self._best_latency = min(self._best_latency or metrics['latency_median'], metrics['latency_median'])
+        self._write_log(dict(metrics, time=datetime.now().isoformat(), pid=os.getpid(),
+                             action=action, new_limit=new_limit, reason=reason))
+
+        if action != 'hold':
+            print(f"    📐 自动并发: {self.limit} → {new_limit} 个页面（{reason}）")
+            self.change_count += 1
+            self.events.append({
+                'time': datetime.now().isoformat(),
+                'from': self.limit,
+                'to': new_limit,
+                'reason': reason,
+            })
+            del self.events[:-MAX_AUTOSCALE_EVENTS]
+            async with self._cond:
+                self.limit = new_limit
+                self.peak_limit = max(self.peak_limit, new_limit)
+                self._cond.notify_all()
+            # 调整后重新积累样本，避免用调整前的结果再次决策
+            self._samples.clear()
+        if reason != "样本不足":
+            self._new_samples = 0
+        self._peak_active = self._active
+        return self.limit
+
+    def _write_log(self, record: Dict) -> None:
+        if not self.log_file:
+            return
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError:
+            pass
+
+    async def monitor(self, pool) -> None:
+        """后台任务：定期读取浏览器内存并评估，由抓取引擎启动和取消"""
+        while True:
+            await asyncio.sleep(self.interval)
+            rss = await asyncio.to_thread(pool.get_rss_mb)
+            await self.evaluate(rss, pool.open_pages)
+
+    def get_stats(self) -> Dict:
+        """调整记录，写入 crawl_info.json"""
+        return {
+            'min_pages': self.min_pages,
+            'max_pages': self.max_pages,
+            'final_limit': self.limit,
+            'peak_limit': self.peak_limit,
+            'change_count': self.change_count,
+            'events': self.events,
+            'log_file': os.path.basename(self.log_file) if self.log_file else None,
+        }
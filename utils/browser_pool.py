@@ -0,0 +1,291 @@
+import os
+import time
+import asyncio
+from typing import Dict, List, Optional
+from playwright.async_api import async_playwright
+from .resource_policy import ResourcePolicy
+from .asset_cache import AssetCache, DEFAULT_ASSET_CACHE_MB
+from .har_replay import HAR_MODES, HAR_RECORD, HAR_REPLAY, har_path_for
+from .errors import NotFoundError
+
+try:
+    import psutil
+except ImportError:  # psutil 为可选依赖，缺失时不做内存上限检查
+    psutil = None
+
+# 默认每个浏览器实例处理多少个页面后重启
+DEFAULT_MAX_PAGES_PER_BROWSER = 200
+# 默认浏览器进程树内存上限（MB），超过后重启
+DEFAULT_MAX_RSS_MB = 2048
+
+# 注入到每个页面的辅助函数
+PAGE_INIT_SCRIPT = """
+    window.getComputedStyle = window.getComputedStyle || function(element) {
+        return element.currentStyle;
+    };
+"""
+
+class BrowserPool:
+    """
+    可复用的浏览器池：整个批次共用一个 Chromium 进程和 context，
+    页面在文章之间回收复用，并在处理页面数或内存超过上限后自动重启浏览器。
+    支持多个协程并发获取页面，重启会等待所有在用页面归还后再进行
+    """
+
+    def __init__(self, headless: bool = True,
+                 max_pages_per_browser: int = DEFAULT_MAX_PAGES_PER_BROWSER,
+                 max_rss_mb: Optional[int] = DEFAULT_MAX_RSS_MB,
+                 default_timeout: int = 45000,
+                 resource_profile: Optional[str] = None,
+                 asset_cache_dir: Optional[str] = None,
+                 asset_cache_mb: float = DEFAULT_ASSET_CACHE_MB,
+                 har_mode: Optional[str] = None,
+                 har_dir: Optional[str] = None):
+        """
+        Args:
+            headless: 是否使用无头模式
+            max_pages_per_browser: 每个浏览器实例处理的最大页面数，<=0 表示不限制
+            max_rss_mb: 浏览器进程树的内存上限（MB），None 表示不限制
+            default_timeout: 页面默认超时时间（毫秒）
+            resource_profile: 请求拦截档位（full/text/lite），None 表示不拦截
+            asset_cache_dir: 静态资源磁盘缓存目录，None 表示不缓存
+            asset_cache_mb: 静态资源缓存大小上限（MB）
+            har_mode: record 时每篇文章使用独立的 context 并录制 HAR，replay 时从 HAR 回放（不访问网络），None 表示正常抓取
+            har_dir: HAR 文件目录（每篇文章一个文件，见 har_replay.har_path_for）
+        """
+        self.headless = headless
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_rss_mb = max_rss_mb
+        self.default_timeout = default_timeout
+        self.resource_policy = ResourcePolicy(resource_profile) if resource_profile else None
+        if har_mode and har_mode not in HAR_MODES:
+            raise ValueError(f"未知的 HAR 模式: {har_mode}")
+        if har_mode and not har_dir:
+            raise ValueError("HAR 模式需要指定 HAR 目录")
+        self.har_mode = har_mode
+        self.har_dir = har_dir
+        self.har_stats = {'recorded': 0, 'replayed': 0, 'missing': 0}
+        if har_mode == HAR_RECORD:
+            os.makedirs(har_dir, exist_ok=True)
+        # 录制和回放时不使用静态资源缓存，保证 HAR 中是完整的网络交互
+        self.asset_cache = AssetCache(asset_cache_dir, asset_cache_mb) if asset_cache_dir and not har_mode else None
+
+        self._playwright = None
+        self.browser = None
+        self.context = None
+        self._idle_pages: List = []
+
+        self.pages_since_restart = 0
+        self.total_pages = 0
+        self.launch_count = 0
+        self.startup_seconds = 0.0
+        self.restart_reasons: List[str] = []
+
+        # 在用页面计数，重启浏览器前需要等待其归零
+        self._active = 0
+        self._cond = asyncio.Condition()
+
+        if self.max_rss_mb and psutil is None:
+            print("⚠️ 未安装 psutil，浏览器内存上限检查已禁用")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    async def start(self) -> None:
+        """启动 Playwright 和浏览器"""
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        if self.browser is None:
+            await self._launch()
+
+    async def _launch(self) -> None:
+        """启动浏览器和 context，并记录启动耗时"""
+        start = time.perf_counter()
+        self.browser = await self._playwright.chromium.launch(headless=self.headless)
+        self.context = await self.browser.new_context(java_script_enabled=self._javascript_enabled)
+        await self._configure_context(self.context)
+        self.startup_seconds += time.perf_counter() - start
+        self.launch_count += 1
+        self.pages_since_restart = 0
+
+    @property
+    def _javascript_enabled(self) -> bool:
+        return self.resource_policy.javascript_enabled if self.resource_policy else True
+
+    async def _configure_context(self, context) -> None:
+        """注入辅助脚本、注册路由、设置默认超时"""
+        await context.add_init_script(PAGE_INIT_SCRIPT)
+        # 后注册的路由先执行：拦截策略先中止不需要的请求，其余请求再交给静态资源缓存或 HAR 回放
+        if self.asset_cache:
+            await context.route("**/*", self.asset_cache.handle_route)
+        if self.resource_policy:
+            await self.resource_policy.attach(context)
+        context.set_default_timeout(self.default_timeout)
+
+    async def _new_har_page(self, url: str):
+        """HAR 模式：为一篇文章创建独立的 context，关闭 context 时录制的 HAR 写入文件"""
+        har_path = har_path_for(self.har_dir, url)
+        if self.har_mode == HAR_REPLAY:
+            if not os.path.isfile(har_path):
+                self.har_stats['missing'] += 1
+                raise NotFoundError(f"没有录制该文章的 HAR ({os.path.basename(har_path)})")
+            context = await self.browser.new_context(java_script_enabled=self._javascript_enabled)
+            # HAR 中没有的请求直接中止，回放时不访问网络
+            await context.route_from_har(har_path, not_found='abort')
+            self.har_stats['replayed'] += 1
+        else:
+            context = await self.browser.new_context(java_script_enabled=self._javascript_enabled,
+                                                     record_har_path=har_path, record_har_content='embed')
+            self.har_stats['recorded'] += 1
+        await self._configure_context(context)
+        return await context.new_page()
+
+    async def _shutdown_browser(self) -> None:
+        """关闭当前浏览器实例（保留 Playwright 驱动）"""
+        self._idle_pages = []
+        try:
+            if self.context:
+                await self.context.close()
+        except Exception:
+            pass
+        try:
+            if self.browser:
+                await self.browser.close()
+        except Exception:
+            pass
+        self.context = None
+        self.browser = None
+
+    async def restart(self, reason: str) -> None:
+        """重启浏览器（调用方需保证没有在用页面）"""
+        print(f"    🔄 重启浏览器: {reason}")
+        self.restart_reasons.append(reason)
+        await self._shutdown_browser()
+        if self.asset_cache:
+            self.asset_cache.save()
+        await self._launch()
+
+    @property
+    def open_pages(self) -> int:
+        """当前打开的页面数（在用和空闲），用于估算单个页面的内存占用"""
+        return self._active + len(self._idle_pages)
+
+    def get_rss_mb(self) -> Optional[float]:
+        """获取浏览器相关子进程的内存占用（MB），无法获取时返回 None"""
+        if psutil is None:
+            return None
+        try:
+            total = 0
+            for child in psutil.Process().children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    def _restart_reason(self) -> Optional[str]:
+        """判断是否需要重启浏览器，返回原因"""
+        if self.max_pages_per_browser and self.max_pages_per_browser > 0 \
+                and self.pages_since_restart >= self.max_pages_per_browser:
+            return f"已处理 {self.pages_since_restart} 个页面"
+        if self.max_rss_mb:
+            rss = self.get_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                return f"内存占用 {rss:.0f}MB 超过上限 {self.max_rss_mb}MB"
+        return None
+
+    async def acquire_page(self, url: Optional[str] = None):
+        """
+        获取一个可用页面（优先复用空闲页面）
+        url: 将要打开的文章链接，HAR 模式下据此确定录制或回放的 HAR 文件
+        """
+        async with self._cond:
+            # 在锁内启动，避免多个协程同时首次获取页面时重复启动浏览器
+            await self.start()
+            if self._restart_reason():
+                # 等待其他协程归还页面后再重启，避免中断正在抓取的文章
+                await self._cond.wait_for(lambda: self._active == 0)
+                reason = self._restart_reason()
+                if reason:
+                    await self.restart(reason)
+
+            page = None
+            if self.har_mode and url:
+                page = await self._new_har_page(url)
+            while self._idle_pages and page is None:
+                candidate = self._idle_pages.pop()
+                if not candidate.is_closed():
+                    page = candidate
+            if page is None:
+                page = await self.context.new_page()
+
+            self._active += 1
+            self.pages_since_restart += 1
+            self.total_pages += 1
+            return page
+
+    async def release_page(self, page) -> None:
+        """归还页面，清空页面状态以便下一篇文章复用"""
+        try:
+            if page is None or page.is_closed():
+                return
+            if self.context is None or page.context != self.context:
+                # 浏览器已重启的旧页面直接丢弃；HAR 模式下关闭文章独立的 context（录制的 HAR 此时写入文件）
+                try:
+                    await (page.context.close() if self.har_mode else page.close())
+                except Exception:
+                    pass
+                return
+            try:
+                await page.goto("about:blank")
+                self._idle_pages.append(page)
+            except Exception:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+        finally:
+            async with self._cond:
+                self._active = max(self._active - 1, 0)
+                self._cond.notify_all()
+
+    async def close(self) -> None:
+        """关闭浏览器和 Playwright"""
+        await self._shutdown_browser()
+        if self.asset_cache:
+            self.asset_cache.save()
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def get_stats(self, article_count: int) -> Dict:
+        """
+        统计浏览器启动开销
+        article_count: 本批次处理的文章数，用于估算旧方式（每篇文章启动一次浏览器）的开销
+        """
+        avg_startup = self.startup_seconds / self.launch_count if self.launch_count else 0.0
+        per_url_estimate = avg_startup * article_count
+        return {
+            "launch_count": self.launch_count,
+            "pages_served": self.total_pages,
+            "startup_seconds": round(self.startup_seconds, 2),
+            "avg_startup_seconds": round(avg_startup, 2),
+            "per_url_launch_estimate_seconds": round(per_url_estimate, 2),
+            "saved_seconds_estimate": round(max(per_url_estimate - self.startup_seconds, 0.0), 2),
+            "max_pages_per_browser": self.max_pages_per_browser,
+            "max_rss_mb": self.max_rss_mb,
+            "restart_reasons": self.restart_reasons,
+            "resource_profile": self.resource_policy.profile if self.resource_policy else None,
+            "asset_cache": self.asset_cache.get_stats() if self.asset_cache else None,
+            "har": dict(self.har_stats, mode=self.har_mode, dir=self.har_dir) if self.har_mode else None,
+        }
@@ -0,0 +1,149 @@
+import time
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# 连续多少次遇到反爬验证页面后熔断
+DEFAULT_TRIP_THRESHOLD = 3
+# 熔断后暂停的时间（秒），探测仍被拦截时翻倍
+DEFAULT_COOLDOWN_SECONDS = 300
+DEFAULT_MAX_COOLDOWN_SECONDS = 3600
+# crawl_info.json 中最多保留的熔断记录数
+MAX_TRIP_RECORDS = 50
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """
+    反爬验证页面的全局熔断器
+    closed: 正常抓取；连续 threshold 次被拦截后进入 open
+    open: 所有页面暂停 cooldown 秒，之后进入 half_open
+    half_open: 只放行一个探测请求，探测成功恢复 closed，仍被拦截则重新 open 并延长冷却时间
+    探测请求以链接标识，只有它的结果决定恢复还是重新熔断，熔断前发出的请求的结果不影响状态
+    与限速器一样只在一个进程中维护状态，多进程抓取时由协调进程在发放令牌前检查
+    """
+
+    def __init__(self, threshold: int = DEFAULT_TRIP_THRESHOLD,
+                 cooldown: float = DEFAULT_COOLDOWN_SECONDS,
+                 max_cooldown: float = DEFAULT_MAX_COOLDOWN_SECONDS):
+        self.threshold = max(1, threshold)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max(max_cooldown, cooldown)
+        self.state = CLOSED
+        self.cooldown = cooldown
+        self._consecutive_blocked = 0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        # 占用探测名额的请求（链接）
+        self._probe_key: Optional[str] = None
+        self.blocked_count = 0
+        self.paused_seconds = 0.0
+        self.trips: List[Dict] = []
+        self.trip_count = 0
+
+    def time_until_ready(self) -> float:
+        """距离允许发出下一个请求的秒数（不占用探测名额），0 表示可以发出"""
+        if self.state == CLOSED:
+            return 0.0
+        if self.state == OPEN:
+            wait = self._open_until - time.monotonic()
+            if wait > 0:
+                return wait
+            self.state = HALF_OPEN
+            print(f"🔎 熔断冷却结束，发送一个探测请求...")
+        # half_open：探测请求返回前其他请求继续等待
+        return 1.0 if self._probe_in_flight else 0.0
+
+    def on_request(self, key: Optional[str] = None) -> None:
+        """
+        即将发出请求时调用，half_open 状态下占用唯一的探测名额
+        key: 请求的链接，结果返回时用 record(reason, key) 对应
+        """
+        if self.state == HALF_OPEN:
+            self._probe_in_flight = True
+            self._probe_key = key
+
+    async def wait_ready(self) -> None:
+        """等待熔断器允许发出请求"""
+        while True:
+            wait = self.time_until_ready()
+            if wait <= 0:
+                return
+            await asyncio.sleep(min(wait, 5))
+
+    def record(self, reason: Optional[str] = None, key: Optional[str] = None) -> None:
+        """
+        记录一次抓取结果
+        reason: 限速器的退避原因，'anti_bot' 表示遇到反爬验证页面，
+                'deadline' 表示时间预算用完（不一定发出了请求），不作为任何判断依据
+        key: 请求的链接（与 on_request 的 key 相同）
+        """
+        blocked = reason == 'anti_bot'
+        if blocked:
+            self.blocked_count += 1
+
+        if self.state == HALF_OPEN and self._probe_in_flight:
+            if key != self._probe_key:
+                # 熔断前发出的请求，不是探测请求的结果
+                return
+            self._probe_in_flight = False
+            self._probe_key = None
+            if reason == 'deadline':
+                # 探测请求没有得到结果，释放名额，由下一个请求重新探测
+                return
+            if blocked:
+                self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+                self._trip('探测请求仍被拦截')
+            else:
+                self._close()
+            return
+
+        if self.state != CLOSED or reason == 'deadline':
+            # 熔断前已经发出的请求和时间预算用完的结果不影响状态
+            return
+        if not blocked:
+            self._consecutive_blocked = 0
+            return
+        self._consecutive_blocked += 1
+        if self._consecutive_blocked >= self.threshold:
+            self._trip(f"连续 {self._consecutive_blocked} 次遇到反爬验证页面")
+
+    def _trip(self, reason: str) -> None:
+        self.state = OPEN
+        self._open_until = time.monotonic() + self.cooldown
+        self.trip_count += 1
+        self.trips.append({
+            'time': datetime.now().isoformat(),
+            'reason': reason,
+            'cooldown_seconds': self.cooldown,
+            'resumed_time': None,
+        })
+        del self.trips[:-MAX_TRIP_RECORDS]
+        print(f"\n⛔ 熔断: {reason}，暂停所有抓取 {self.cooldown:.0f} 秒")
+
+    def _close(self) -> None:
+        self.state = CLOSED
+        self._consecutive_blocked = 0
+        # 探测失败会连续熔断多次，暂停时长从第一次熔断算起
+        unresolved = [trip for trip in self.trips if trip['resumed_time'] is None]
+        now = datetime.now()
+        if unresolved:
+            self.paused_seconds += (now - datetime.fromisoformat(unresolved[0]['time'])).total_seconds()
+        for trip in unresolved:
+            trip['resumed_time'] = now.isoformat()
+        self.cooldown = self.base_cooldown
+        print(f"✅ 探测请求成功，恢复抓取")
+
+    def get_stats(self) -> Dict:
+        """熔断记录，写入 crawl_info.json"""
+        return {
+            'state': self.state,
+            'threshold': self.threshold,
+            'cooldown_seconds': self.base_cooldown,
+            'blocked_count': self.blocked_count,
+            'trip_count': self.trip_count,
+            'paused_seconds': round(self.paused_seconds, 1),
+            'trips': self.trips,
+        }
@@ -0,0 +1,283 @@
+import os
+import time
+import asyncio
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional
+from .article_scraper import fetch_article_content_async, fetch_article_metrics_async
+from .browser_pool import BrowserPool
+from .http_fetcher import HttpArticleFetcher
+from .rate_limiter import AimdRateLimiter, classify_outcome, host_of
+from .retry_queue import RetryQueue, DEFAULT_MAX_ATTEMPTS, to_isoformat, to_timestamp
+from .errors import DEFAULT_ARTICLE_DEADLINE, DEADLINE_ERROR_PREFIX, TIMEOUT, Deadline, classify_error, retry_limit
+from .autoscaler import ConcurrencyAutoscaler, AUTOSCALE_LOG_NAME
+
+# 默认并发页面数（1 即逐篇抓取，与旧版行为一致）
+DEFAULT_CONCURRENCY = 1
+
+class CrawlEngine:
+    """
+    基于 Playwright 异步 API 的抓取引擎
+    同时最多打开 concurrency 个页面，抓取结果通过回调交给调用方处理
+    （写入进度文件、打印信息等），引擎本身不关心结果如何保存
+    请求节奏由自适应限速器控制，所有并发页面共用同一个令牌桶；
+    遇到反爬验证页面时由熔断器暂停所有页面
+    """
+
+    def __init__(self, batch_folder: str, save_images: bool = False,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 rate_limiter=None,
+                 circuit_breaker=None,
+                 pool_options: Optional[Dict] = None,
+                 on_result: Optional[Callable[[str, Dict], None]] = None,
+                 on_error: Optional[Callable[[str, str, str], None]] = None,
+                 on_retry: Optional[Callable[[str, str, int, str, str], None]] = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 http_first: bool = False,
+                 archive_html: bool = False,
+                 metrics_only: bool = False,
+                 capture_images: bool = False,
+                 article_deadline: Optional[float] = DEFAULT_ARTICLE_DEADLINE,
+                 autoscale: Optional[Dict] = None):
+        """
+        Args:
+            batch_folder: 批次输出文件夹
+            save_images: 是否保存图片
+            concurrency: 同时抓取的页面数
+            rate_limiter: 限速器（AimdRateLimiter 或 RemoteRateLimiter），为 None 时使用默认参数的 AimdRateLimiter
+            circuit_breaker: 反爬熔断器（CircuitBreaker），为 None 时不熔断（多进程模式下由协调进程熔断）
+            pool_options: 传给 BrowserPool 的参数
+            on_result: 抓取完成回调 on_result(url, article_data)
+            on_error: 抓取异常回调 on_error(url, error_message, error_class)（重试次数用完后）
+            on_retry: 失败后进入重试队列的回调 on_retry(url, error_message, attempts, next_eligible_at, error_class)
+            max_attempts: 每篇文章最多尝试的次数（各类错误另有上限，见 utils.errors.RETRY_LIMITS）
+            http_first: 是否先用 HTTP 快速抓取，失败时再使用浏览器
+            archive_html: 是否在结果中附带正文原始 HTML（'_raw_html'），由回调方归档
+            metrics_only: 只刷新阅读量和点赞量（fetch_article_metrics_async），不抓取正文
+            capture_images: 保存图片时直接使用浏览器收到的图片响应，只有未加载的懒加载图片交给下载阶段
+            article_deadline: 单篇文章的时间预算（秒），各次尝试共用，只计算抓取本身的时间
+                              （不计重试等待、限速器和熔断器的等待），用完后不再重试（续传时重新计时）
+            autoscale: 自动调整并发页面数，传给 ConcurrencyAutoscaler 的参数（如 {'min_pages': 1}），
+                       concurrency 作为页面数上限；None 表示固定使用 concurrency 个页面
+        """
+        self.batch_folder = batch_folder
+        self.save_images = save_images
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = rate_limiter or AimdRateLimiter()
+        self.circuit_breaker = circuit_breaker
+        self.pool = BrowserPool(**(pool_options or {}))
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_retry = on_retry
+        self.retry_queue = RetryQueue(max_attempts)
+        self._attempts: Dict[str, int] = {}
+        # 每篇文章的时间预算，第一次尝试时创建，两次尝试之间暂停计时，之后的重试使用剩余时间
+        self._deadlines: Dict[str, Deadline] = {}
+        self._in_flight = 0
+        # 阅读量和点赞量由页面脚本加载，HTTP 快速抓取拿不到
+        self.http_fetcher = HttpArticleFetcher(pool_size=self.concurrency) if http_first and not metrics_only else None
+        self.metrics_only = metrics_only
+        self.archive_html = archive_html
+        self.capture_images = capture_images
+        self.article_deadline = article_deadline
+        self._started = 0
+        self._total = 0
+        self.autoscaler = None
+        if autoscale is not None:
+            log_file = os.path.join(batch_folder, AUTOSCALE_LOG_NAME) if batch_folder else None
+            self.autoscaler = ConcurrencyAutoscaler(**dict({'max_pages': self.concurrency, 'log_file': log_file},
+                                                           **autoscale))
+
+    def crawl(self, urls: List[str], retry_state: Optional[Dict[str, Dict]] = None) -> None:
+        """同步入口：抓取所有链接，Ctrl+C 时抛出 KeyboardInterrupt"""
+        asyncio.run(self.run(urls, retry_state))
+
+    async def run(self, urls: List[str], retry_state: Optional[Dict[str, Dict]] = None) -> None:
+        """
+        抓取所有链接，直到队列和重试队列都清空
+        retry_state: 续传时恢复的重试状态 {url: {'attempts', 'next_eligible_at'}}，
+                     这些链接在 next_eligible_at 之后才会再次抓取
+        """
+        if not urls:
+            return
+        queue: asyncio.Queue = asyncio.Queue()
+        retry_state = retry_state or {}
+        for url in urls:
+            state = retry_state.get(url)
+            if state:
+                self._attempts[url] = state.get('attempts', 0)
+                self.retry_queue.push(url, to_timestamp(state.get('next_eligible_at')))
+            else:
+                queue.put_nowait(url)
+        self._started = 0
+        self._total = queue.qsize()
+        self._in_flight = 0
+
+        monitor = None
+        try:
+            if not self.http_fetcher:
+                # HTTP 优先模式下浏览器按需启动（第一次需要页面时）
+                await self.pool.start()
+            worker_count = min(self.concurrency, len(urls)) or 1
+            if self.autoscaler:
+                # 按上限启动工作协程，由自动调整器控制同时抓取的数量
+                print(f"📐 自动并发: {self.autoscaler.limit} 个页面起步，范围 "
+                      f"{self.autoscaler.min_pages}-{self.autoscaler.max_pages}")
+                monitor = asyncio.create_task(self.autoscaler.monitor(self.pool))
+            workers = [asyncio.create_task(self._worker(queue)) for _ in range(worker_count)]
+            await asyncio.gather(*workers)
+        finally:
+            if monitor:
+                monitor.cancel()
+            await self.pool.close()
+            if self.http_fetcher:
+                self.http_fetcher.close()
+
+    async def _next_url(self, queue: asyncio.Queue) -> Optional[str]:
+        """
+        取下一个要抓取的链接：优先已到期的重试，其次新链接；
+        只剩未到期的重试时等待，全部完成时返回 None
+        """
+        while True:
+            url = self.retry_queue.pop_ready()
+            if url:
+                return url
+            if not queue.empty():
+                return queue.get_nowait()
+            # 正在抓取的页面可能还会产生新的重试
+            if not self.retry_queue and not self._in_flight:
+                return None
+            wait = self.retry_queue.next_wait()
+            await asyncio.sleep(min(wait if wait is not None else 1, 1))
+
+    def _handle_failure(self, url: str, error: str, article_data: Optional[Dict] = None,
+                        error_class: Optional[str] = None) -> None:
+        """
+        失败时放入延迟重试队列，超过该类错误的最大尝试次数后才交给回调
+        链接无效、文章已删除等永久性错误只尝试一次
+        """
+        error_class = error_class or classify_error(error, article_data)
+        attempts = self._attempts.get(url, 0)
+        deadline = self._deadlines.get(url)
+        if deadline is not None and deadline.expired:
+            # 时间预算已用完，不再重试
+            if error_class != TIMEOUT:
+                error = f"{error}（单篇文章时间预算 {deadline.seconds:.0f} 秒已用完）"
+            error_class = TIMEOUT
+        elif attempts < retry_limit(error_class, self.retry_queue.max_attempts):
+            eligible_at = self.retry_queue.schedule(url, attempts)
+            print(f"    ⏳ 第 {attempts} 次尝试失败 ({error_class})，{eligible_at - time.time():.0f} 秒后重试: {error}")
+            if self.on_retry:
+                self.on_retry(url, error, attempts, to_isoformat(eligible_at), error_class)
+            return
+
+        self._deadlines.pop(url, None)
+        if attempts > 1:
+            error = f"重试 {attempts} 次后仍然失败: {error}"
+        if article_data is not None:
+            article_data['error'] = error
+            article_data['error_class'] = error_class
+            if self.on_result:
+                self.on_result(url, article_data)
+        elif self.on_error:
+            self.on_error(url, error, error_class)
+
+    async def _acquire(self, url: str) -> None:
+        """等待熔断器和限速器都允许后再发出请求"""
+        while True:
+            if self.circuit_breaker:
+                await self.circuit_breaker.wait_ready()
+            await self.rate_limiter.acquire(host_of(url), url)
+            # 等待令牌期间可能已经熔断
+            if not self.circuit_breaker:
+                return
+            if self.circuit_breaker.time_until_ready() <= 0:
+                self.circuit_breaker.on_request(url)
+                return
+
+    def _record(self, url: str, article_data: Optional[Dict] = None, error: Optional[str] = None) -> None:
+        """把抓取结果反馈给限速器和熔断器"""
+        if error is not None:
+            self.rate_limiter.record_error(url, error)
+        else:
+            self.rate_limiter.record_result(url, article_data)
+        if self.circuit_breaker:
+            self.circuit_breaker.record(classify_outcome(article_data, error), url)
+
+    def _slot(self):
+        """自动并发时占用一个页面名额，固定并发时不限制"""
+        return self.autoscaler.slot() if self.autoscaler else nullcontext()
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        """单个并发页面的工作循环"""
+        while True:
+            async with self._slot():
+                url = await self._next_url(queue)
+                if url is None:
+                    return
+                await self._crawl_url(url)
+
+    async def _crawl_url(self, url: str) -> None:
+        """抓取一个链接，结果交给回调或重试队列"""
+        self._in_flight += 1
+        try:
+            deadline = self._deadlines.get(url)
+            if deadline is not None and deadline.expired:
+                # 之前的尝试已经用完预算
+                self._handle_failure(url, f"{DEADLINE_ERROR_PREFIX} ({deadline.seconds:.0f} 秒)", error_class=TIMEOUT)
+                return
+
+            # 防止过快被封，按限速器的当前速率发出请求；熔断期间暂停
+            await self._acquire(url)
+
+            self._attempts[url] = self._attempts.get(url, 0) + 1
+            if self._attempts[url] > 1:
+                print(f"\n[重试 第 {self._attempts[url]} 次] 正在抓取: {url}")
+            else:
+                self._started += 1
+                print(f"\n[{self._started}/{self._total}] 正在抓取: {url}")
+            started = time.monotonic()
+            deadline = self._deadlines.get(url)
+            if deadline is None:
+                deadline = self._deadlines[url] = Deadline(self.article_deadline)
+            else:
+                # 重试：从上次暂停处继续计时
+                deadline.resume()
+            try:
+                # 同一页面内只尝试一次，失败的链接进入延迟重试队列，不阻塞其他链接
+                if self.metrics_only:
+                    article_data = await fetch_article_metrics_async(url, self.pool)
+                else:
+                    article_data = await fetch_article_content_async(
+                        url, self.batch_folder, self.save_images, retry_count=1, pool=self.pool,
+                        http_fetcher=self.http_fetcher, collect_html=self.archive_html,
+                        capture_images=self.capture_images, deadline=deadline)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # 等待重试、限速器和熔断器的时间不计入预算
+                deadline.pause()
+                if self.autoscaler:
+                    self.autoscaler.record(time.monotonic() - started, False)
+                self._record(url, error=str(e))
+                self._handle_failure(url, str(e), error_class=classify_error(exception=e))
+            else:
+                deadline.pause()
+                ok = bool(article_data.get('title')) or article_data.get('status') == 'deleted'
+                if self.autoscaler:
+                    self.autoscaler.record(time.monotonic() - started, ok)
+                self._record(url, article_data)
+                if ok:
+                    self._deadlines.pop(url, None)
+                    if self.on_result:
+                        self.on_result(url, article_data)
+                else:
+                    self._handle_failure(url, article_data.get('error') or "未获取到标题", article_data)
+        finally:
+            self._in_flight -= 1
+
+    def get_stats(self, article_count: int) -> Dict:
+        """浏览器池统计，开启自动并发时附带调整记录"""
+        stats = self.pool.get_stats(article_count)
+        if self.autoscaler:
+            stats['autoscale'] = self.autoscaler.get_stats()
+        return stats
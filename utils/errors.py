@@ -0,0 +1,119 @@
+import time
+from typing import Dict, Optional
+from .invalid_page import ANTI_BOT_ERROR_PREFIX
+
+# 单篇文章的总时间预算（秒）：页面跳转、加载、等待正文、等待稳定共用
+DEFAULT_ARTICLE_DEADLINE = 90
+# 预算用完时的错误信息前缀，限速器和熔断器据此识别（可能根本没有发出请求）
+DEADLINE_ERROR_PREFIX = "超过单篇文章时间预算"
+
+# 错误分类
+NETWORK = 'network'
+TIMEOUT = 'timeout'
+NOT_FOUND = 'not_found'
+DELETED = 'deleted'
+BLOCKED = 'blocked'
+PARSE = 'parse'
+ERROR_CLASSES = (NETWORK, TIMEOUT, NOT_FOUND, DELETED, BLOCKED, PARSE)
+
+# 各类错误最多尝试的次数（不超过重试队列的上限）
+# 链接无效、文章不存在或已删除等永久性错误只尝试一次；
+# 域名无法解析通常是本地网络或 DNS 的临时问题，按网络错误重试；
+# 反爬验证由熔断器统一暂停，恢复后仍按普通次数重试
+RETRY_LIMITS = {
+    NETWORK: 5,
+    TIMEOUT: 3,
+    NOT_FOUND: 1,
+    DELETED: 1,
+    BLOCKED: 5,
+    PARSE: 2,
+}
+PERMANENT_ERROR_CLASSES = (NOT_FOUND, DELETED)
+
+# 错误信息中的特征片段（Playwright / requests 的异常信息）
+_NOT_FOUND_MARKERS = ('err_invalid_url', 'invalid url', 'http 404', 'http 410',
+                      '404 client error', '410 client error', '链接不存在')
+_TIMEOUT_MARKERS = ('timeout', 'timed out', '超时', 'err_timed_out', DEADLINE_ERROR_PREFIX)
+_NETWORK_MARKERS = ('net::err_', 'connection', 'err_connection', 'err_network', 'ssl', 'socket',
+                    'max retries exceeded', 'remote end closed',
+                    'err_name_not_resolved', 'name or service not known', 'nodename nor servname',
+                    'getaddrinfo failed', 'failed to resolve', 'temporary failure in name resolution')
+
+class ArticleError(Exception):
+    """带错误分类的抓取异常"""
+    error_class = PARSE
+
+class NotFoundError(ArticleError):
+    error_class = NOT_FOUND
+
+class DeadlineExceeded(ArticleError):
+    error_class = TIMEOUT
+
+def classify_error(error: Optional[str] = None, article_data: Optional[Dict] = None,
+                   exception: Optional[BaseException] = None) -> str:
+    """
+    判断失败的类别
+    优先使用异常自带的分类和文章数据的状态，其次按错误信息中的特征判断，无法判断时归为 parse
+    """
+    if isinstance(exception, ArticleError):
+        return exception.error_class
+    if article_data:
+        if article_data.get('error_class'):
+            return article_data['error_class']
+        if article_data.get('status') in (DELETED, BLOCKED):
+            return article_data['status']
+        error = error or article_data.get('error')
+    if exception is not None and error is None:
+        error = str(exception)
+    text = (error or '').lower()
+    if ANTI_BOT_ERROR_PREFIX.lower() in text:
+        return BLOCKED
+    if any(marker in text for marker in _NOT_FOUND_MARKERS):
+        return NOT_FOUND
+    if any(marker in text for marker in _TIMEOUT_MARKERS):
+        return TIMEOUT
+    if any(marker in text for marker in _NETWORK_MARKERS):
+        return NETWORK
+    return PARSE
+
+def retry_limit(error_class: str, default: int) -> int:
+    """该类错误最多尝试的次数"""
+    return min(default, RETRY_LIMITS.get(error_class, default))
+
+class Deadline:
+    """
+    单篇文章的时间预算：各个等待步骤的超时从剩余时间中扣除，
+    而不是每一步各自使用完整的超时时间
+    暂停期间（等待重试、限速器和熔断器）不计时，只扣除实际抓取的时间
+    """
+
+    def __init__(self, seconds: Optional[float] = DEFAULT_ARTICLE_DEADLINE):
+        self.seconds = seconds
+        self._expires = time.monotonic() + seconds if seconds else None
+        self._paused_at: Optional[float] = None
+
+    def pause(self) -> None:
+        if self._expires is not None and self._paused_at is None:
+            self._paused_at = time.monotonic()
+
+    def resume(self) -> None:
+        if self._paused_at is not None:
+            self._expires += time.monotonic() - self._paused_at
+            self._paused_at = None
+
+    def remaining(self) -> float:
+        if self._expires is None:
+            return float('inf')
+        now = self._paused_at if self._paused_at is not None else time.monotonic()
+        return max(0.0, self._expires - now)
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout_ms(self, step_ms: float) -> float:
+        """某一步的超时（毫秒）：取该步的上限和剩余预算中较小的一个，预算已用完时抛出 DeadlineExceeded"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{DEADLINE_ERROR_PREFIX} ({self.seconds:.0f} 秒)")
+        return min(step_ms, remaining * 1000)
@@ -0,0 +1,13 @@
+import os
+import hashlib
+
+# HAR 模式
+#   record: 每篇文章使用独立的浏览器 context，把完整的网络交互录制为一个 HAR 文件
+#   replay: 通过 Playwright 路由从 HAR 文件回放，不访问网络，用于离线基准测试和回归测试
+HAR_RECORD = 'record'
+HAR_REPLAY = 'replay'
+HAR_MODES = (HAR_RECORD, HAR_REPLAY)
+
+def har_path_for(har_dir: str, url: str) -> str:
+    """文章对应的 HAR 文件（按链接命名，录制和回放使用同一规则）"""
+    return os.path.join(har_dir, hashlib.sha1(url.encode('utf-8')).hexdigest() + '.har')
@@ -0,0 +1,75 @@
+import os
+import gzip
+import hashlib
+from typing import Optional
+import lxml.html
+
+# 批次文件夹下保存原始正文 HTML 的目录
+ARCHIVE_DIR_NAME = 'raw_html'
+
+# 归档前去掉的元素（脚本、嵌入内容），正文转换不需要它们
+_DROP_TAGS = ('script', 'noscript', 'iframe', 'object', 'embed')
+
+def archive_key(url: str) -> str:
+    """根据文章链接生成归档文件名"""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+def sanitize_html(html: str) -> str:
+    """
+    清理正文 HTML：去掉脚本和嵌入内容、事件属性和 javascript: 链接，
+    保留转换 Markdown 需要的结构和属性
+    """
+    root = lxml.html.fragment_fromstring(html, create_parent='div')
+    for element in list(root.iter(*_DROP_TAGS)):
+        element.drop_tree()
+    for element in root.iter():
+        if not isinstance(element.tag, str):
+            continue
+        for name in list(element.attrib):
+            value = element.attrib[name]
+            if name.lower().startswith('on') or value.strip().lower().startswith('javascript:'):
+                del element.attrib[name]
+    found = root.xpath("./div[@id='js_content']")
+    target = found[0] if len(root) == 1 and found else root
+    return lxml.html.tostring(target, encoding='unicode')
+
+class RawHtmlArchive:
+    """
+    每个批次的原始正文归档：raw_html/<链接哈希>.html.gz
+    只由协调进程写入，改进转换逻辑后可用 rebuild_articles 从归档重新生成结果
+    """
+
+    def __init__(self, batch_folder: str):
+        self.archive_dir = os.path.join(batch_folder, ARCHIVE_DIR_NAME)
+        self.saved_count = 0
+        self.saved_bytes = 0
+
+    def path_for(self, url: str) -> str:
+        return os.path.join(self.archive_dir, f"{archive_key(url)}.html.gz")
+
+    def save(self, url: str, html: str) -> Optional[str]:
+        """清理并压缩保存正文 HTML，返回相对批次文件夹的路径"""
+        if not html:
+            return None
+        try:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            data = gzip.compress(sanitize_html(html).encode('utf-8'))
+            path = self.path_for(url)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self.saved_count += 1
+            self.saved_bytes += len(data)
+            return os.path.join(ARCHIVE_DIR_NAME, os.path.basename(path))
+        except Exception as e:
+            print(f"    ⚠️ 保存原始 HTML 失败: {e}")
+            return None
+
+    def load(self, url: str) -> Optional[str]:
+        """读取归档的正文 HTML，不存在时返回 None"""
+        return load_archived_html(self.path_for(url))
+
+def load_archived_html(path: str) -> Optional[str]:
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, 'rb') as f:
+        return f.read().decode('utf-8')
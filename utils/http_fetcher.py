@@ -0,0 +1,161 @@
+import re
+from html import unescape
+from datetime import datetime
+from typing import Dict, Optional
+import requests
+from requests.adapters import HTTPAdapter
+import lxml.html
+from .invalid_page import ERROR_PAGE_SELECTORS, invalid_matcher, anti_bot_matcher, is_anti_bot_url
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+}
+
+# 页面脚本中的变量，正文元素里没有时用作兜底
+_SCRIPT_VARS = {
+    'title': [r'var\s+msg_title\s*=\s*[\'"](.*?)[\'"]', r'<meta\s+property="og:title"\s+content="(.*?)"'],
+    'author': [r'var\s+nickname\s*=\s*(?:htmlDecode\()?[\'"](.*?)[\'"]'],
+    'ct': [r'var\s+ct\s*=\s*[\'"]?(\d{9,})', r'var\s+create_time\s*=\s*[\'"]?(\d{9,})'],
+}
+
+def _css_class_xpath(selector: str) -> str:
+    """把 '.class' 形式的选择器转换为 XPath"""
+    class_name = selector.lstrip('.')
+    return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')]"
+
+def _search_script_var(html: str, name: str) -> str:
+    for pattern in _SCRIPT_VARS[name]:
+        match = re.search(pattern, html, re.S)
+        if match:
+            return unescape(match.group(1)).strip()
+    return ''
+
+def _element_text(tree, xpath: str) -> str:
+    elements = tree.xpath(xpath)
+    return elements[0].text_content().strip() if elements else ''
+
+def parse_article_html(html: str) -> Dict:
+    """
+    解析文章页面的初始 HTML（不执行 JavaScript）
+
+    返回: {
+        'status': 'ok' | 'deleted' | 'blocked' | 'incomplete',
+        'title', 'author', 'publish_time', 'content_html',
+        'invalid_keywords', 'anti_bot_keywords', 'missing'
+    }
+    status 为 incomplete 时说明页面缺少字段或依赖 JavaScript 渲染，需要用浏览器抓取
+    status 为 blocked 时说明返回的是反爬验证页面
+    """
+    result = {
+        'status': 'incomplete',
+        'title': '',
+        'author': '',
+        'publish_time': '',
+        'content_html': '',
+        'invalid_keywords': [],
+        'anti_bot_keywords': [],
+        'missing': [],
+    }
+    if not html:
+        result['missing'].append('html')
+        return result
+
+    try:
+        tree = lxml.html.fromstring(html)
+    except Exception:
+        result['missing'].append('html')
+        return result
+    content_elements = tree.xpath("//div[@id='js_content']")
+
+    # 删除/违规页面：只检查错误提示容器（没有正文时才检查整个页面文本）
+    error_texts = []
+    for selector in ERROR_PAGE_SELECTORS:
+        error_texts.extend(el.text_content() for el in tree.xpath(_css_class_xpath(selector)))
+    if not content_elements and not error_texts:
+        body = tree.find('body')
+        if body is not None:
+            error_texts.append(body.text_content())
+    error_text = '\n'.join(error_texts)
+    anti_bot_keywords = anti_bot_matcher.find_all(error_text)
+    if anti_bot_keywords:
+        result['status'] = 'blocked'
+        result['anti_bot_keywords'] = anti_bot_keywords
+        return result
+    invalid_keywords = invalid_matcher.find_all(error_text)
+    if invalid_keywords:
+        result['status'] = 'deleted'
+        result['invalid_keywords'] = invalid_keywords
+        return result
+
+    result['title'] = _element_text(tree, "//h1[contains(@class, 'rich_media_title')]") \
+        or _search_script_var(html, 'title')
+    result['author'] = _element_text(tree, "//a[@id='js_name']") \
+        or _search_script_var(html, 'author')
+
+    # 发布时间由页面脚本根据 ct 变量填充，初始 HTML 中通常为空
+    result['publish_time'] = _element_text(tree, "//em[@id='publish_time']")
+    if not result['publish_time']:
+        ct = _search_script_var(html, 'ct')
+        if ct:
+            try:
+                result['publish_time'] = datetime.fromtimestamp(int(ct)).strftime('%Y-%m-%d %H:%M')
+            except (OverflowError, ValueError, OSError):
+                # 时间戳超出范围时留空，不影响其他字段
+                pass
+
+    if content_elements:
+        result['content_html'] = lxml.html.tostring(content_elements[0], encoding='unicode')
+
+    for field in ('title', 'content_html'):
+        if not result[field]:
+            result['missing'].append(field)
+    if not result['missing']:
+        result['status'] = 'ok'
+    return result
+
+class HttpArticleFetcher:
+    """
+    基于连接池的 HTTP 抓取客户端（不启动浏览器）
+    同一个实例在整个批次中复用，保持与微信服务器的长连接
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float = 15):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _get(self, url: str) -> Optional[requests.Response]:
+        """发送请求，失败时返回 None"""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+            if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+                response.encoding = 'utf-8'
+            return response
+        except Exception as e:
+            print(f"    ⚠️ HTTP 抓取失败: {e}")
+            return None
+
+    def fetch_html(self, url: str) -> Optional[str]:
+        """获取页面 HTML，失败时返回 None"""
+        response = self._get(url)
+        return response.text if response is not None else None
+
+    def fetch_article(self, url: str) -> Dict:
+        """获取并解析文章页面，返回 parse_article_html 的结果"""
+        response = self._get(url)
+        if response is not None and is_anti_bot_url(response.url):
+            # 被重定向到验证页面
+            result = parse_article_html('')
+            result['status'] = 'blocked'
+            result['anti_bot_keywords'] = ['验证页面']
+            return result
+        return parse_article_html(response.text if response is not None else None)
+
+    def close(self) -> None:
+        self.session.close()
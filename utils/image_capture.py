@@ -0,0 +1,70 @@
+import os
+from typing import Dict, List
+from urllib.parse import urlparse
+from .image_store import write_image_bytes
+
+def image_key(url: str) -> str:
+    """
+    图片的匹配键：域名 + 路径
+    页面懒加载时会在 data-src 的基础上追加 tp=webp、wx_lazy 等参数，查询参数不参与匹配
+    """
+    parsed = urlparse(url or '')
+    return f"{parsed.netloc}{parsed.path}"
+
+class ImageResponseCapture:
+    """
+    记录页面加载过程中收到的图片响应
+    浏览器渲染页面时已经下载过首屏图片，抓取结束后直接把响应内容写入图片库，
+    只有浏览器没有加载的懒加载图片才交给 ImageDownloader 重新下载
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._responses: Dict[str, object] = {}
+        page.on("response", self._on_response)
+
+    def _on_response(self, response) -> None:
+        try:
+            if response.request.resource_type == "image" and response.ok:
+                self._responses[image_key(response.url)] = response
+        except Exception:
+            pass
+
+    def detach(self) -> None:
+        self.page.remove_listener("response", self._on_response)
+        self._responses.clear()
+
+    async def store_into(self, entries: List[Dict], store_root: str) -> int:
+        """
+        把匹配的图片响应写入图片库，更新对应的待下载条目
+        返回: 写入的图片数
+        """
+        captured = 0
+        for entry in entries:
+            if entry.get('status') != 'pending':
+                continue
+            response = self._responses.get(image_key(entry['original_url']))
+            if response is None:
+                continue
+            try:
+                content_type = response.headers.get('content-type', '')
+                if not content_type.startswith('image/'):
+                    continue
+                body = await response.body()
+                if not body:
+                    continue
+                stored = write_image_bytes(store_root, body, content_type)
+            except Exception as e:
+                # 响应内容已被浏览器释放等情况，交给下载阶段重新下载
+                print(f"    ⚠️ 读取页面图片响应失败 ({entry['original_url']}): {e}")
+                continue
+            entry.update({
+                'status': 'downloaded',
+                'source': 'browser',
+                'sha256': stored['sha256'],
+                'local_path': os.path.join(store_root, stored['path']),
+                'filename': stored['path'],
+                'size': stored['size'],
+            })
+            captured += 1
+        return captured
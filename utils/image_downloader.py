@@ -0,0 +1,214 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from .html_to_markdown import normalize_image_url
+from .image_store import ImageStore
+
+# 同时下载的图片数
+DEFAULT_IMAGE_WORKERS = 8
+# 单张图片大小上限（字节），超过时放弃
+DEFAULT_MAX_IMAGE_BYTES = 20 * 1024 * 1024
+# 每张图片最多尝试的次数，重试时从已下载的部分继续
+DEFAULT_IMAGE_ATTEMPTS = 3
+CHUNK_SIZE = 64 * 1024
+
+IMAGE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Referer': 'https://mp.weixin.qq.com/',
+}
+
+class ImageTooLarge(Exception):
+    pass
+
+def image_entries(images: List[Dict]) -> List[Dict]:
+    """
+    把页面中提取到的图片元素转换为待下载的图片条目
+    images: [{'data_src', 'src', 'alt'}, ...]
+    返回: [{'original_url', 'alt_text', 'status': 'pending'}, ...]（同一篇文章中重复的图片只保留一次）
+    """
+    entries, seen = [], set()
+    for img in images or []:
+        img_url = normalize_image_url(img.get('data_src') or img.get('src'))
+        if not img_url or img_url in seen:
+            continue
+        seen.add(img_url)
+        entries.append({'original_url': img_url, 'alt_text': img.get('alt') or '图片', 'status': 'pending'})
+    return entries
+
+class ImageDownloader:
+    """
+    独立的图片下载阶段：抓取流程只把图片链接放入队列，由线程池并发下载，
+    文本抓取不必等待图片 CDN
+    所有下载共用一个连接池；图片以流式写入磁盘，超过大小上限时放弃，
+    重试时通过 Range 请求从已下载的部分继续
+    下载结果保存在按内容寻址的图片库（ImageStore）中，图库中已有的链接不再请求网络
+    """
+
+    def __init__(self, image_store: ImageStore, workers: int = DEFAULT_IMAGE_WORKERS,
+                 max_bytes: int = DEFAULT_MAX_IMAGE_BYTES,
+                 max_attempts: int = DEFAULT_IMAGE_ATTEMPTS,
+                 timeout: float = 30):
+        self.image_store = image_store
+        self.max_bytes = max_bytes
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        self.workers = max(1, workers)
+        self.session = requests.Session()
+        self.session.headers.update(IMAGE_HEADERS)
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        self._lock = threading.Lock()
+        # 每个链接一把锁：多篇文章同时引用同一张图片时只下载一次
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self.stats = {'queued': 0, 'captured': 0, 'downloaded': 0, 'cached': 0, 'deduplicated': 0,
+                      'failed': 0, 'too_large': 0, 'resumed': 0, 'bytes': 0}
+
+    def _url_lock(self, img_url: str) -> threading.Lock:
+        with self._lock:
+            return self._url_locks.setdefault(img_url, threading.Lock())
+
+    def enqueue(self, article_data: Dict) -> int:
+        """
+        把文章中待下载的图片放入队列，下载完成后直接更新文章数据中的图片条目和 metadata
+        返回: 放入队列的图片数
+        """
+        images = article_data.get('images') or []
+        # 抓取时已经从浏览器响应中写入图片库的图片（可能来自工作进程），只需登记索引
+        captured = [entry for entry in images if entry.get('source') == 'browser' and entry.get('sha256')]
+        for entry in captured:
+            self.image_store.register(entry['original_url'], entry['sha256'], entry['filename'], entry.get('size', 0))
+        entries = [entry for entry in images if entry.get('status') == 'pending']
+        with self._lock:
+            self.stats['captured'] += len(captured)
+        if not entries:
+            if captured:
+                with self._lock:
+                    self._update_metadata(article_data)
+            return 0
+        counter = {'remaining': len(entries)}
+        for entry in entries:
+            self._executor.submit(self._download_entry, entry, article_data, counter)
+        with self._lock:
+            self.stats['queued'] += len(entries)
+        return len(entries)
+
+    def _download_entry(self, entry: Dict, article_data: Dict, counter: Dict) -> None:
+        try:
+            stored = self._fetch(entry['original_url'])
+            entry.update({
+                'status': 'downloaded',
+                'sha256': stored['sha256'],
+                'local_path': self.image_store.path_for(stored['path']),
+                'filename': stored['path'],
+                'size': stored['size'],
+            })
+        except Exception as e:
+            entry['status'] = 'failed'
+            entry['error'] = str(e)
+            print(f"    ⚠️ 图片下载失败 ({entry['original_url']}): {e}")
+            if isinstance(e, ImageTooLarge):
+                with self._lock:
+                    self.stats['too_large'] += 1
+        with self._lock:
+            self.stats['downloaded' if entry['status'] == 'downloaded' else 'failed'] += 1
+            counter['remaining'] -= 1
+            if counter['remaining'] == 0:
+                self._update_metadata(article_data)
+
+    def _update_metadata(self, article_data: Dict) -> None:
+        """整篇文章的图片都处理完后更新 metadata"""
+        downloaded = sum(1 for image in article_data['images'] if image.get('status') == 'downloaded')
+        metadata = article_data.setdefault('metadata', {})
+        metadata['images_saved'] = downloaded > 0
+        metadata['image_count'] = downloaded
+
+    def _fetch(self, img_url: str) -> Dict:
+        """从图片库取图片，没有时下载并放入图片库"""
+        with self._url_lock(img_url):
+            stored = self.image_store.lookup(img_url)
+            if stored:
+                with self._lock:
+                    self.stats['cached'] += 1
+                return stored
+            stored = self._download(img_url)
+            if stored['deduplicated']:
+                with self._lock:
+                    self.stats['deduplicated'] += 1
+            return stored
+
+    def _download(self, img_url: str) -> Dict:
+        """流式下载到临时文件，完成后按内容哈希放入图片库；失败时保留临时文件供下次尝试续传"""
+        part_path = self.image_store.part_path(img_url)
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                time.sleep(2 ** (attempt - 1))
+            try:
+                content_type = self._stream_to_part(img_url, part_path)
+                return self.image_store.commit(img_url, part_path, content_type)
+            except ImageTooLarge:
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                raise
+            except Exception as e:
+                last_error = e
+        raise last_error
+
+    def _stream_to_part(self, img_url: str, part_path: str) -> Optional[str]:
+        """下载到临时文件，返回响应的 content-type"""
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        with self.session.get(img_url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                # 已经下载完整
+                return None
+            response.raise_for_status()
+            content_type = response.headers.get('content-type', '')
+            if not content_type.startswith('image/'):
+                raise Exception(f"Invalid content type: {content_type}")
+
+            if offset and response.status_code == 206:
+                mode = 'ab'
+                with self._lock:
+                    self.stats['resumed'] += 1
+            else:
+                # 服务器不支持续传时从头下载
+                offset, mode = 0, 'wb'
+            length = response.headers.get('content-length')
+            if length and length.isdigit() and offset + int(length) > self.max_bytes:
+                raise ImageTooLarge(f"图片超过大小上限 ({(offset + int(length)) / 1024 / 1024:.1f} MB)")
+
+            written = offset
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    written += len(chunk)
+                    if written > self.max_bytes:
+                        raise ImageTooLarge(f"图片超过大小上限 ({self.max_bytes / 1024 / 1024:.0f} MB)")
+                    f.write(chunk)
+            with self._lock:
+                self.stats['bytes'] += written - offset
+            return content_type
+
+    def close(self, cancel_pending: bool = False) -> Dict:
+        """
+        等待队列中的图片下载完成
+        cancel_pending=True 时取消尚未开始的下载（条目保留 pending 状态），只等待正在进行的下载，
+        返回后不会再有线程修改文章数据中的图片条目
+        返回统计信息
+        """
+        pending = self.stats['queued'] - self.stats['downloaded'] - self.stats['failed']
+        if pending:
+            if cancel_pending:
+                print("\n🖼️ 取消未开始的图片下载，等待正在进行的下载结束...")
+            else:
+                print(f"\n🖼️ 等待 {pending} 张图片下载完成...")
+        self._executor.shutdown(wait=True, cancel_futures=cancel_pending)
+        self.session.close()
+        self.image_store.save()
+        return dict(self.stats)
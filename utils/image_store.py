@@ -0,0 +1,124 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Dict, Optional
+
+# 按内容寻址的图片库，位于 Output 目录下，所有批次共用
+IMAGE_STORE_DIR_NAME = '.images'
+INDEX_FILE_NAME = 'index.json'
+PARTS_DIR_NAME = 'parts'
+
+# 响应的 content-type 对应的扩展名（微信图片链接通常没有扩展名，如 .../640?wx_fmt=png）
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+    'image/bmp': '.bmp',
+}
+
+def extension_for(content_type: Optional[str]) -> str:
+    content_type = (content_type or '').split(';')[0].strip().lower()
+    return CONTENT_TYPE_EXTENSIONS.get(content_type, '.jpg')
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def relative_image_path(sha256: str, ext: str) -> str:
+    """两级散列目录，避免单个目录下文件过多"""
+    return os.path.join(sha256[:2], sha256[2:4], sha256 + ext)
+
+def write_image_bytes(root: str, data: bytes, content_type: Optional[str]) -> Dict:
+    """
+    把已经在内存中的图片（例如浏览器加载页面时收到的响应）直接写入图片库目录，不读写索引
+    工作进程中也可以调用，索引由持有 ImageStore 的进程通过 register 更新
+    返回: {'sha256', 'path', 'size', 'deduplicated'}
+    """
+    sha256 = hashlib.sha256(data).hexdigest()
+    relative_path = relative_image_path(sha256, extension_for(content_type))
+    path = os.path.join(root, relative_path)
+    deduplicated = os.path.exists(path)
+    if not deduplicated:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return {'sha256': sha256, 'path': relative_path, 'size': len(data), 'deduplicated': deduplicated}
+
+class ImageStore:
+    """
+    图片库: Output/.images/ab/cd/<sha256>.<ext>
+    相同内容的图片只保存一份；index.json 记录 图片链接 -> 内容哈希，
+    已知的链接不再请求网络（公众号的横幅、二维码、签名图在每篇文章中反复出现）
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self.root = os.path.join(output_dir, IMAGE_STORE_DIR_NAME)
+        self.index_file = os.path.join(self.root, INDEX_FILE_NAME)
+        self._lock = threading.Lock()
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.urls: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self.urls = {}
+        os.makedirs(os.path.join(self.root, PARTS_DIR_NAME), exist_ok=True)
+
+    def path_for(self, relative_path: str) -> str:
+        return os.path.join(self.root, relative_path)
+
+    def part_path(self, url: str) -> str:
+        """下载中的临时文件（按链接命名，中断后再次下载同一链接时可以续传）"""
+        return os.path.join(self.root, PARTS_DIR_NAME, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """已下载过的链接返回 {'sha256', 'path', 'size'}，文件丢失时返回 None"""
+        with self._lock:
+            entry = self.urls.get(url)
+        if entry and os.path.isfile(self.path_for(entry['path'])):
+            return entry
+        return None
+
+    def commit(self, url: str, part_path: str, content_type: Optional[str]) -> Dict:
+        """
+        把下载完成的临时文件按内容哈希放入图片库；内容相同的文件已存在时直接丢弃临时文件
+        返回: {'sha256', 'path', 'size', 'deduplicated'}
+        """
+        sha256 = file_sha256(part_path)
+        relative_path = relative_image_path(sha256, extension_for(content_type))
+        path = self.path_for(relative_path)
+        size = os.path.getsize(part_path)
+        deduplicated = os.path.exists(path)
+        if deduplicated:
+            os.remove(part_path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(part_path, path)
+        entry = {'sha256': sha256, 'path': relative_path, 'size': size}
+        with self._lock:
+            self.urls[url] = entry
+        return dict(entry, deduplicated=deduplicated)
+
+    def register(self, url: str, sha256: str, relative_path: str, size: int) -> None:
+        """记录已经写入图片库的图片（write_image_bytes 的结果）"""
+        with self._lock:
+            self.urls[url] = {'sha256': sha256, 'path': relative_path, 'size': size}
+
+    def save(self) -> None:
+        with self._lock:
+            data = dict(self.urls)
+        try:
+            tmp_file = self.index_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.index_file)
+        except OSError as e:
+            print(f"⚠️ 保存图片库索引失败: {e}")
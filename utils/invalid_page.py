@@ -0,0 +1,150 @@
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+# 检测删除/违规页面的关键词
+INVALID_KEYWORDS = [
+    "此内容发送失败无法查看",
+    "此内容因涉嫌违反相关法律法规和政策发送失败",
+    "内容已删除",
+    "文章不存在",
+    "该内容已被删除",
+    "内容违规",
+    "无法查看",
+    "发送失败",
+    "违规内容",
+    "内容不存在"
+]
+
+# 检测反爬/验证页面的关键词（访问过于频繁时微信返回的页面）
+ANTI_BOT_KEYWORDS = [
+    "访问过于频繁",
+    "操作过于频繁",
+    "环境异常",
+    "完成验证后即可继续访问",
+    "去验证",
+    "请输入验证码",
+    "安全验证"
+]
+# 验证页面的地址特征（被重定向到验证码页面）
+ANTI_BOT_URL_MARKERS = [
+    'wappoc_appmsgcaptcha',
+    'mp/verifycode',
+    'antispam',
+]
+# 被反爬拦截的文章的错误信息前缀，限速器和熔断器据此识别
+ANTI_BOT_ERROR_PREFIX = "触发反爬验证"
+
+# 微信错误页的提示容器，和正文容器一起竞速等待
+ERROR_PAGE_SELECTORS = [
+    '.weui-msg',
+    '.global_error_msg',
+    '.warn_msg',
+    '.page_msg',
+]
+CONTENT_SELECTOR = 'div#js_content'
+# 正文或错误提示任意一个出现即可继续
+READY_SELECTOR = ', '.join([CONTENT_SELECTOR] + ERROR_PAGE_SELECTORS)
+
+# 只取错误提示容器的文本；没有正文时才退回整个 body（错误页内容很少），
+# 避免正文里出现“无法查看”之类的字样被误判
+PAGE_STATE_JS = """(errorSelectors) => {
+    const hasContent = !!document.querySelector('div#js_content');
+    const texts = [];
+    for (const selector of errorSelectors) {
+        for (const el of document.querySelectorAll(selector)) {
+            texts.push(el.innerText || el.textContent || '');
+        }
+    }
+    const hasErrorContainer = texts.length > 0;
+    if (!hasContent && !hasErrorContainer && document.body) {
+        texts.push(document.body.innerText || document.body.textContent || '');
+    }
+    return {
+        has_content: hasContent,
+        has_error_container: hasErrorContainer,
+        error_text: texts.join('\\n').slice(0, 5000)
+    };
+}"""
+
+class KeywordMatcher:
+    """
+    多关键词匹配器（Aho-Corasick 自动机）
+    一次扫描文本即可找出所有出现的关键词
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = [k for k in dict.fromkeys(keywords) if k]
+        # 每个状态: 转移表、失败指针、在该状态结束的关键词
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[str]] = [[]]
+        for keyword in self.keywords:
+            self._add(keyword)
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append(keyword)
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find_all(self, text: str) -> List[str]:
+        """返回文本中出现的所有关键词（按首次出现顺序，去重）"""
+        found = {}
+        state = 0
+        for ch in text or '':
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for keyword in self._output[state]:
+                found.setdefault(keyword, None)
+        return list(found)
+
+    def search(self, text: str) -> Optional[str]:
+        """返回文本中出现的第一个关键词，没有则返回 None"""
+        state = 0
+        for ch in text or '':
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            if self._output[state]:
+                return self._output[state][0]
+        return None
+
+invalid_matcher = KeywordMatcher(INVALID_KEYWORDS)
+anti_bot_matcher = KeywordMatcher(ANTI_BOT_KEYWORDS)
+
+def is_anti_bot_url(url: str) -> bool:
+    """页面是否被重定向到了验证页面"""
+    return any(marker in (url or '') for marker in ANTI_BOT_URL_MARKERS)
+
+async def detect_page_state(page) -> Dict:
+    """
+    读取页面状态：是否有正文，以及错误提示中命中的删除/违规关键词和反爬验证关键词
+    返回: {'has_content', 'has_error_container', 'invalid_keywords', 'anti_bot_keywords'}
+    """
+    state = await page.evaluate(PAGE_STATE_JS, ERROR_PAGE_SELECTORS)
+    error_text = state.pop('error_text', '')
+    state['invalid_keywords'] = invalid_matcher.find_all(error_text)
+    state['anti_bot_keywords'] = anti_bot_matcher.find_all(error_text)
+    return state
@@ -0,0 +1,177 @@
+import os
+import re
+import json
+from html import unescape
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+from .http_fetcher import HttpArticleFetcher
+
+# 解析短链接的并发请求数（不经过限速器，保持较小的值）
+DEFAULT_RESOLVE_WORKERS = 4
+# 链接映射缓存，位于 Output 目录下，所有批次共用
+CACHE_DIR_NAME = '.cache'
+CACHE_FILE_NAME = 'link_map.json'
+
+# 页面中的完整文章链接（og:url / msg_link），其中包含 __biz、mid、idx、sn
+_CANONICAL_LINK_PATTERNS = [
+    r'<meta\s+property="og:url"\s+content="([^"]+)"',
+    r'var\s+msg_link\s*=\s*"([^"]+)"',
+]
+# 页面脚本中的文章标识变量，例如 var mid = "2650..." || "" || "";
+_ID_VAR_PATTERNS = {
+    'biz': r'var\s+biz\s*=\s*"([^"]*)"',
+    'mid': r'var\s+mid\s*=\s*"([^"]*)"',
+    'idx': r'var\s+idx\s*=\s*"([^"]*)"',
+    'sn': r'var\s+sn\s*=\s*"([^"]*)"',
+}
+
+def make_article_key(biz: str, mid: str, idx: str) -> str:
+    """文章的规范标识：同一篇文章的各种链接形式得到相同的值"""
+    return f"{biz}_{mid}_{idx}"
+
+def _identity(biz: str, mid: str, idx: str, sn: str = '') -> Dict:
+    return {
+        'key': make_article_key(biz, mid, idx),
+        'canonical_url': f"https://mp.weixin.qq.com/s?__biz={biz}&mid={mid}&idx={idx}&sn={sn}",
+    }
+
+def parse_article_id(url: str) -> Optional[Dict]:
+    """
+    从完整链接中直接解析文章标识（不需要请求）
+    短链接（/s/xxxx）无法解析，返回 None
+    """
+    try:
+        query = parse_qs(urlparse(unescape(url or '')).query)
+    except ValueError:
+        return None
+    values = {name: (query.get(name) or [''])[0] for name in ('__biz', 'mid', 'idx', 'sn')}
+    if not (values['__biz'] and values['mid'] and values['idx']):
+        return None
+    return _identity(values['__biz'], values['mid'], values['idx'], values['sn'])
+
+def parse_article_id_from_html(html: str) -> Optional[Dict]:
+    """从文章页面 HTML 中解析文章标识"""
+    if not html:
+        return None
+    for pattern in _CANONICAL_LINK_PATTERNS:
+        match = re.search(pattern, html)
+        if match:
+            identity = parse_article_id(match.group(1))
+            if identity:
+                return identity
+    values = {}
+    for name, pattern in _ID_VAR_PATTERNS.items():
+        match = re.search(pattern, html)
+        values[name] = match.group(1) if match else ''
+    if not (values['biz'] and values['mid'] and values['idx']):
+        return None
+    return _identity(values['biz'], values['mid'], values['idx'], values['sn'])
+
+class LinkResolver:
+    """
+    抓取前的链接解析和去重
+    把短链接、带不同参数的链接解析为规范的 __biz/mid/idx/sn 标识，
+    解析结果缓存在磁盘上；同一次运行中已经出现过的文章（包括其他列表文件中的）不再抓取
+    offline=True 时不发请求（HAR 回放），短链接只使用缓存中的结果，缓存中没有的按原链接去重
+    """
+
+    def __init__(self, cache_dir: str, workers: int = DEFAULT_RESOLVE_WORKERS, offline: bool = False):
+        self.cache_file = os.path.join(cache_dir, CACHE_FILE_NAME)
+        self.workers = max(1, workers)
+        self.offline = offline
+        self._cache: Dict[str, Dict] = self._load_cache()
+        # 本次运行中已经安排抓取的文章: 规范标识 -> 首次出现的链接
+        self._seen: Dict[str, str] = {}
+
+    def _load_cache(self) -> Dict[str, Dict]:
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = self.cache_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._cache, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"⚠️ 保存链接缓存失败: {e}")
+
+    def key_for(self, url: str) -> Optional[str]:
+        """链接对应的文章规范标识（只查完整链接和缓存，不发请求），未知时返回 None"""
+        identity = parse_article_id(url) or self._cache.get(url)
+        return identity['key'] if identity else None
+
+    def resolve_many(self, urls: List[str]) -> Tuple[Dict[str, Optional[Dict]], Dict]:
+        """
+        并发解析链接
+        返回: ({url: 标识或 None}, 统计信息)
+        """
+        resolved: Dict[str, Optional[Dict]] = {}
+        stats = {'parsed': 0, 'cached': 0, 'fetched': 0, 'unresolved': 0}
+        to_fetch = []
+        for url in dict.fromkeys(urls):
+            identity = parse_article_id(url)
+            if identity:
+                resolved[url] = identity
+                stats['parsed'] += 1
+            elif url in self._cache:
+                resolved[url] = self._cache[url]
+                stats['cached'] += 1
+            else:
+                to_fetch.append(url)
+
+        if to_fetch and self.offline:
+            print(f"🔗 离线模式，{len(to_fetch)} 个短链接不在缓存中，不解析")
+            for url in to_fetch:
+                resolved[url] = None
+            stats['unresolved'] += len(to_fetch)
+        elif to_fetch:
+            print(f"🔗 解析 {len(to_fetch)} 个短链接...")
+            fetcher = HttpArticleFetcher(pool_size=self.workers)
+            try:
+                with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                    htmls = executor.map(fetcher.fetch_html, to_fetch)
+                    for url, html in zip(to_fetch, htmls):
+                        identity = parse_article_id_from_html(html)
+                        resolved[url] = identity
+                        if identity:
+                            # 只缓存解析成功的结果，失败的链接下次重新解析
+                            self._cache[url] = identity
+                            stats['fetched'] += 1
+                        else:
+                            stats['unresolved'] += 1
+            finally:
+                fetcher.close()
+            self._save_cache()
+        return resolved, stats
+
+    def dedupe(self, urls: List[str]) -> Tuple[List[str], Dict]:
+        """
+        解析并去重，保留每篇文章第一次出现的链接
+        无法解析的链接按原链接去重
+        返回: (去重后的链接, 统计信息)
+        """
+        resolved, stats = self.resolve_many(urls)
+        unique = []
+        batch_keys = set()
+        stats.update({'duplicates_in_list': 0, 'duplicates_across_lists': 0})
+        for url in urls:
+            identity = resolved.get(url)
+            key = identity['key'] if identity else url
+            if key in batch_keys:
+                stats['duplicates_in_list'] += 1
+                continue
+            if key in self._seen:
+                stats['duplicates_across_lists'] += 1
+                continue
+            batch_keys.add(key)
+            unique.append(url)
+        for url in unique:
+            identity = resolved.get(url)
+            self._seen[identity['key'] if identity else url] = url
+        return unique, stats
@@ -0,0 +1,251 @@
+"""
+批量检测文章链接是否仍然有效
+
+大规模补抓之前先剔除已删除、违规或不存在的文章：只发送 HTTP 请求解析页面初始 HTML，
+不启动浏览器，判断规则与抓取时相同（invalid_page 中的关键词和错误提示容器）。
+输出去掉失效链接的列表文件和失效链接报告：
+    python -m utils.liveness_checker ArticleList/某个列表.json
+    python -m utils.liveness_checker --all --workers 16
+去掉失效链接的列表默认写入 ArticleList/pruned/，加 --in-place 时直接替换原列表（原文件保留为 .bak）
+"""
+import os
+import json
+import asyncio
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional
+import requests
+from .http_fetcher import HttpArticleFetcher, parse_article_html
+from .invalid_page import is_anti_bot_url
+from .rate_limiter import AimdRateLimiter, classify_outcome, host_of
+from .circuit_breaker import CircuitBreaker
+
+# 同时进行的请求数
+DEFAULT_CHECK_WORKERS = 16
+# 只请求一次页面，比完整抓取轻得多，初始速率和上限都比抓取高
+DEFAULT_CHECK_INITIAL_RATE = 1.0
+DEFAULT_CHECK_MAX_RATE = 5.0
+PRUNED_DIR_NAME = 'pruned'
+
+# 检测结果
+ALIVE = 'alive'
+DEAD = 'dead'
+BLOCKED = 'blocked'
+UNKNOWN = 'unknown'
+
+def item_url(item: Dict) -> Optional[str]:
+    """列表条目中的文章链接（与抓取时一致，优先 link 字段）"""
+    return item.get('link') or item.get('url')
+
+def check_url(fetcher: HttpArticleFetcher, url: str) -> Dict:
+    """
+    请求一次页面并判断文章状态
+    返回: {'status': alive | dead | blocked | unknown, 'http_status', 'reason'}
+    只有确定失效的链接（404/410、链接格式无效、删除/违规页面）才是 dead；
+    请求失败、服务器错误、反爬验证等无法判断的情况为 unknown/blocked，保留在列表中
+    """
+    try:
+        response = fetcher.session.get(url, timeout=fetcher.timeout)
+    except (requests.exceptions.InvalidURL, requests.exceptions.MissingSchema) as e:
+        return {'status': DEAD, 'http_status': None, 'reason': f"链接无效: {e}"[:200]}
+    except Exception as e:
+        # 域名无法解析、连接失败等更可能是本地网络问题，不据此判定文章失效
+        return {'status': UNKNOWN, 'http_status': None, 'reason': str(e)[:200]}
+
+    result = {'status': UNKNOWN, 'http_status': response.status_code, 'reason': ''}
+    if response.status_code in (404, 410):
+        result.update(status=DEAD, reason=f"HTTP {response.status_code}")
+        return result
+    if is_anti_bot_url(response.url) or response.status_code in (403, 429):
+        result.update(status=BLOCKED, reason=f"验证页面 (HTTP {response.status_code})")
+        return result
+    if not response.ok:
+        result['reason'] = f"HTTP {response.status_code}"
+        return result
+
+    if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+        response.encoding = 'utf-8'
+    parsed = parse_article_html(response.text)
+    if parsed['status'] == 'blocked':
+        result.update(status=BLOCKED, reason=parsed['anti_bot_keywords'][0])
+    elif parsed['status'] == 'deleted':
+        result.update(status=DEAD, reason=parsed['invalid_keywords'][0])
+    else:
+        # 字段不完整（需要 JavaScript 渲染）的页面也视为有效，交给浏览器抓取
+        result['status'] = ALIVE
+    return result
+
+class LivenessChecker:
+    """
+    并发检测一批链接：请求在线程中执行，共用一个连接池；
+    与抓取一样经过按域名的 AIMD 限速器和反爬熔断器，遇到验证页面时自动减速、暂停
+    """
+
+    def __init__(self, workers: int = DEFAULT_CHECK_WORKERS,
+                 initial_rate: float = DEFAULT_CHECK_INITIAL_RATE,
+                 max_rate: float = DEFAULT_CHECK_MAX_RATE):
+        self.workers = max(1, workers)
+        self.rate_limiter = AimdRateLimiter(initial_rate=initial_rate, max_rate=max_rate, burst=self.workers)
+        self.circuit_breaker = CircuitBreaker()
+        self.fetcher = HttpArticleFetcher(pool_size=self.workers)
+
+    async def _acquire(self, url: str) -> None:
+        """与抓取引擎相同：等待熔断器和限速器都允许后再发出请求"""
+        while True:
+            await self.circuit_breaker.wait_ready()
+            await self.rate_limiter.acquire(host_of(url))
+            # 等待令牌期间可能已经熔断
+            if self.circuit_breaker.time_until_ready() <= 0:
+                self.circuit_breaker.on_request(url)
+                return
+
+    async def _check(self, url: str) -> Dict:
+        await self._acquire(url)
+        result = await asyncio.to_thread(check_url, self.fetcher, url)
+        if result['status'] == BLOCKED:
+            reason = 'anti_bot'
+        elif result['status'] == UNKNOWN:
+            reason = classify_outcome(error=result['reason'])
+        else:
+            reason = None
+        self.rate_limiter.record(host_of(url), reason)
+        self.circuit_breaker.record(reason, url)
+        return result
+
+    async def _run(self, urls: List[str]) -> Dict[str, Dict]:
+        results: Dict[str, Dict] = {}
+        queue: asyncio.Queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+
+        async def worker():
+            while True:
+                try:
+                    url = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results[url] = await self._check(url)
+                done = len(results)
+                if done % 100 == 0 or done == len(urls):
+                    dead = sum(1 for result in results.values() if result['status'] == DEAD)
+                    print(f"    🔍 已检测 {done}/{len(urls)}，失效 {dead}")
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(urls)))))
+        return results
+
+    def check(self, urls: List[str]) -> Dict[str, Dict]:
+        """检测链接（重复的链接只请求一次），返回 {url: check_url 的结果}"""
+        urls = list(dict.fromkeys(url for url in urls if url))
+        if not urls:
+            return {}
+        return asyncio.run(self._run(urls))
+
+    def close(self) -> None:
+        self.fetcher.close()
+
+def prune_list(list_file: str, checker: LivenessChecker, output_dir: str, in_place: bool = False) -> Dict:
+    """
+    检测一个列表文件，写出去掉失效链接的列表和失效链接报告（<列表名>.dead.json）
+    返回统计信息
+    """
+    with open(list_file, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    list_name = os.path.splitext(os.path.basename(list_file))[0]
+    print(f"\n📋 {list_name}: {len(items)} 篇文章")
+    results = checker.check([item_url(item) for item in items])
+
+    kept, dead, unsure = [], [], []
+    for item in items:
+        url = item_url(item)
+        result = results.get(url)
+        if result and result['status'] == DEAD:
+            dead.append({'url': url, 'title': item.get('title', ''),
+                         'reason': result['reason'], 'http_status': result['http_status']})
+            continue
+        kept.append(item)
+        if result and result['status'] in (BLOCKED, UNKNOWN):
+            unsure.append({'url': url, 'title': item.get('title', ''), 'status': result['status'],
+                           'reason': result['reason'], 'http_status': result['http_status']})
+
+    stats = {'articles': len(items), 'checked': len(results), 'kept': len(kept), 'dead': len(dead),
+             'blocked': sum(1 for result in results.values() if result['status'] == BLOCKED),
+             'unknown': sum(1 for result in results.values() if result['status'] == UNKNOWN)}
+
+    os.makedirs(output_dir, exist_ok=True)
+    if in_place:
+        pruned_file = list_file
+        os.replace(list_file, list_file + '.bak')
+    else:
+        pruned_file = os.path.join(output_dir, os.path.basename(list_file))
+    tmp_file = pruned_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(kept, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, pruned_file)
+
+    report_file = os.path.join(output_dir, f"{list_name}.dead.json")
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'list_file': os.path.abspath(list_file),
+            'pruned_file': os.path.abspath(pruned_file),
+            'checked_time': datetime.now().isoformat(),
+            'stats': stats,
+            'dead': dead,
+            # 无法判断的链接仍保留在列表中，供人工复查
+            'unsure': unsure,
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"    ✅ 保留 {stats['kept']} 篇，失效 {stats['dead']} 篇"
+          f"（无法判断 {stats['blocked'] + stats['unknown']} 篇，已保留）")
+    print(f"    📁 列表: {pruned_file}")
+    print(f"    📄 报告: {report_file}")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='批量检测文章链接是否仍然有效，剔除已删除的文章')
+    parser.add_argument('list_files', nargs='*', help='文章列表 JSON 文件')
+    parser.add_argument('--all', action='store_true', help='检测 ArticleList 目录下的所有列表文件')
+    parser.add_argument('--workers', type=int, default=DEFAULT_CHECK_WORKERS,
+                        help=f'同时进行的请求数 (默认: {DEFAULT_CHECK_WORKERS})')
+    parser.add_argument('--initial-rate', type=float, default=DEFAULT_CHECK_INITIAL_RATE,
+                        help=f'初始请求速率，次/秒 (默认: {DEFAULT_CHECK_INITIAL_RATE})')
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_CHECK_MAX_RATE,
+                        help=f'请求速率上限，次/秒 (默认: {DEFAULT_CHECK_MAX_RATE})')
+    parser.add_argument('--output-dir', default=None,
+                        help=f'去掉失效链接的列表和报告的输出目录 (默认: ArticleList/{PRUNED_DIR_NAME})')
+    parser.add_argument('--in-place', action='store_true',
+                        help='直接替换原列表文件（原文件保留为 .bak），报告仍写入输出目录')
+    args = parser.parse_args()
+
+    article_list_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ArticleList")
+    list_files = list(args.list_files)
+    if args.all and os.path.isdir(article_list_dir):
+        list_files.extend(
+            os.path.join(article_list_dir, name) for name in sorted(os.listdir(article_list_dir))
+            if name.endswith('.json') and os.path.isfile(os.path.join(article_list_dir, name))
+        )
+    if not list_files:
+        parser.print_help()
+        return
+    output_dir = args.output_dir or os.path.join(article_list_dir, PRUNED_DIR_NAME)
+
+    start = datetime.now()
+    checker = LivenessChecker(args.workers, args.initial_rate, args.max_rate)
+    totals = {'articles': 0, 'kept': 0, 'dead': 0}
+    try:
+        for list_file in list_files:
+            try:
+                stats = prune_list(list_file, checker, output_dir, args.in_place)
+            except (OSError, ValueError) as e:
+                print(f"❌ 处理 {list_file} 失败: {e}")
+                continue
+            for key in totals:
+                totals[key] += stats[key]
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 检测到用户中断，当前列表未写出")
+    finally:
+        checker.close()
+    seconds = (datetime.now() - start).total_seconds()
+    print(f"\n✨ 检测 {totals['articles']} 篇，保留 {totals['kept']} 篇，失效 {totals['dead']} 篇，用时 {seconds:.1f} 秒")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+"""
+离线 HTML -> Markdown 转换器
+
+与 html_to_markdown.MARKDOWN_CONVERTER_JS（页面内转换脚本）保持相同的规则，
+不需要浏览器，可以在进程池中并行处理已保存的正文 HTML
+
+与浏览器转换结果对比:
+    python -m utils.markdown_converter --compare 样例目录
+"""
+import os
+import sys
+import time
+import argparse
+import difflib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence
+from urllib.parse import urljoin
+import lxml.html
+from lxml import etree
+
+from .html_to_markdown import finalize_markdown
+
+# JavaScript String.prototype.trim 去除的空白字符（与 Python str.strip 略有不同）
+_JS_WHITESPACE = (
+    '\t\n\v\f\r \u00a0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006'
+    '\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff'
+)
+
+def _js_trim(text: str) -> str:
+    return text.strip(_JS_WHITESPACE)
+
+def _child_nodes(element) -> List:
+    """按 DOM 顺序返回子节点：文本节点用 str 表示，元素/注释用 lxml 节点表示"""
+    nodes = []
+    if element.text:
+        nodes.append(element.text)
+    for child in element:
+        nodes.append(child)
+        if child.tail:
+            nodes.append(child.tail)
+    return nodes
+
+def _tag_name(node) -> Optional[str]:
+    """元素的小写标签名，注释等非元素节点返回 None"""
+    tag = node.tag
+    if not isinstance(tag, str):
+        return None
+    return tag.rsplit('}', 1)[-1].lower()
+
+class _Converter:
+    """逐节点转换，规则与页面内的 getMarkdown 一一对应"""
+
+    def __init__(self, base_url: str = '', save_images: bool = False):
+        self.base_url = base_url
+        self.save_images = save_images
+
+    def convert(self, node) -> str:
+        # 处理文本节点
+        if isinstance(node, str):
+            return _js_trim(node)
+
+        node_name = _tag_name(node)
+        if node_name is None:
+            return ''
+
+        # 跳过样式和脚本标签
+        if node_name in ('style', 'script'):
+            return ''
+
+        # 获取所有子节点的内容
+        child_content = _js_trim(' '.join(
+            text for text in (self.convert(child) for child in _child_nodes(node)) if text
+        ))
+
+        # 与脚本一致：没有子内容的元素（包括 img、br）直接返回空
+        if not child_content:
+            return ''
+
+        if node_name == 'h1':
+            return f"\n# {child_content}\n"
+        if node_name == 'h2':
+            return f"\n## {child_content}\n"
+        if node_name == 'h3':
+            return f"\n### {child_content}\n"
+        if node_name == 'h4':
+            return f"\n#### {child_content}\n"
+        if node_name == 'p':
+            return f"\n{child_content}\n"
+        if node_name in ('strong', 'b'):
+            return f"**{child_content}**"
+        if node_name in ('em', 'i'):
+            return f"*{child_content}*"
+        if node_name == 'code':
+            return f"`{child_content}`"
+        if node_name == 'pre':
+            return f"\n```\n{child_content}\n```\n"
+        if node_name == 'blockquote':
+            return f"\n> {child_content}\n"
+        if node_name == 'a':
+            return f"[{child_content}]({self._href(node)})"
+        if node_name == 'img':
+            if not self.save_images:
+                return ''
+            src = node.get('src') or node.get('data-src')
+            alt = node.get('alt') or '图片'
+            return f"\n![{alt}]({src})\n" if src else ''
+        if node_name == 'ul':
+            return '\n' + '\n'.join(
+                f"- {self.convert(li).strip(_JS_WHITESPACE)}" for li in node if _tag_name(li)
+            ) + '\n'
+        if node_name == 'ol':
+            items = [li for li in node if _tag_name(li)]
+            return '\n' + '\n'.join(
+                f"{i + 1}. {self.convert(li).strip(_JS_WHITESPACE)}" for i, li in enumerate(items)
+            ) + '\n'
+        if node_name == 'br':
+            return '\n'
+        return child_content
+
+    def _href(self, node) -> str:
+        """对应 DOM 的 a.href：相对链接按文章地址补全"""
+        href = node.get('href')
+        if href is None:
+            return ''
+        href = _js_trim(href)
+        return urljoin(self.base_url, href) if self.base_url else href
+
+def _content_root(html: str):
+    """解析 HTML，返回正文根节点（#js_content，没有时为整个片段）"""
+    root = lxml.html.fragment_fromstring(html, create_parent='div')
+    found = root.xpath(".//div[@id='js_content']")
+    return found[0] if found else root
+
+def convert_html_to_markdown(html: str, base_url: str = '', save_images: bool = False) -> str:
+    """
+    把正文 HTML 转换为 Markdown（与浏览器内转换结果一致）
+    html: #js_content 的 HTML 或其内部片段
+    base_url: 文章地址，用于补全相对链接
+    """
+    if not html:
+        return ''
+    root = _content_root(html)
+    return finalize_markdown(_Converter(base_url, save_images).convert(root))
+
+def extract_content_payload(html: str, base_url: str = '', save_images: bool = False) -> Dict:
+    """
+    离线生成与 page_extractor.extract_article_payload 相同结构的正文数据
+    返回: {'has_content', 'markdown', 'markdown_error', 'text', 'images'}
+    """
+    payload = {'has_content': False, 'markdown': None, 'markdown_error': None, 'text': '', 'images': []}
+    if not html:
+        return payload
+    try:
+        root = _content_root(html)
+    except (etree.ParserError, ValueError) as e:
+        payload['markdown_error'] = str(e)
+        return payload
+
+    payload['has_content'] = True
+    if save_images:
+        payload['images'] = [{
+            'data_src': img.get('data-src'),
+            'src': img.get('src'),
+            'alt': img.get('alt'),
+        } for img in root.iter('img')]
+    try:
+        payload['markdown'] = finalize_markdown(_Converter(base_url, save_images).convert(root))
+    except Exception as e:
+        payload['markdown_error'] = str(e)
+    # 与页面内的 innerText 一致，不包含脚本和样式的内容
+    for element in root.xpath('.//script | .//style'):
+        element.drop_tree()
+    payload['text'] = root.text_content().strip()
+    return payload
+
+def _convert_job(args) -> str:
+    html, base_url, save_images = args
+    try:
+        return convert_html_to_markdown(html, base_url, save_images)
+    except Exception as e:
+        print(f"    ⚠️ Markdown转换出错: {e}")
+        return ''
+
+def convert_many(html_list: Sequence[str], base_urls: Optional[Sequence[str]] = None,
+                 save_images: bool = False, workers: Optional[int] = None) -> List[str]:
+    """
+    在进程池中批量转换，结果顺序与输入一致
+    workers: 进程数，None 表示使用全部 CPU 核心
+    """
+    base_urls = base_urls or [''] * len(html_list)
+    jobs = [(html, base_url, save_images) for html, base_url in zip(html_list, base_urls)]
+    if not jobs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        return [_convert_job(job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_convert_job, jobs, chunksize=chunksize))
+
+async def _convert_in_browser(html_list: Sequence[str], save_images: bool) -> List[str]:
+    """用浏览器内的转换脚本转换，作为对照基准"""
+    from .browser_pool import BrowserPool
+    from .html_to_markdown import MARKDOWN_CONVERTER_JS
+
+    results = []
+    async with BrowserPool(resource_profile='text') as pool:
+        page = await pool.acquire_page()
+        try:
+            for html in html_list:
+                await page.set_content(html, wait_until='domcontentloaded')
+                element = await page.query_selector('div#js_content') or await page.query_selector('body')
+                results.append(finalize_markdown(await element.evaluate(MARKDOWN_CONVERTER_JS, save_images)))
+        finally:
+            await pool.release_page(page)
+    return results
+
+def compare_with_browser(fixture_dir: str, save_images: bool = False, workers: Optional[int] = None) -> bool:
+    """
+    在样例目录（*.html）上对比离线转换和浏览器内转换的结果
+    返回: 是否全部一致
+    """
+    import asyncio
+
+    files = sorted(f for f in os.listdir(fixture_dir) if f.endswith('.html'))
+    if not files:
+        print(f"❌ 在 {fixture_dir} 中没有找到 .html 样例")
+        return False
+    html_list = []
+    for name in files:
+        with open(os.path.join(fixture_dir, name), 'r', encoding='utf-8') as f:
+            html_list.append(f.read())
+
+    start = time.perf_counter()
+    offline = convert_many(html_list, save_images=save_images, workers=workers)
+    offline_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    browser = asyncio.run(_convert_in_browser(html_list, save_images))
+    browser_seconds = time.perf_counter() - start
+
+    mismatches = 0
+    for name, expected, actual in zip(files, browser, offline):
+        if expected != actual:
+            mismatches += 1
+            print(f"\n❌ 不一致: {name}")
+            diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(),
+                                        'browser', 'offline', lineterm='', n=1)
+            for line in list(diff)[:40]:
+                print(f"   {line}")
+
+    print(f"\n📊 对比完成: {len(files)} 个样例，{len(files) - mismatches} 个一致，{mismatches} 个不一致")
+    print(f"   离线转换: {offline_seconds:.2f} 秒 ({len(files) / max(offline_seconds, 1e-6):.1f} 篇/秒)")
+    print(f"   浏览器转换: {browser_seconds:.2f} 秒 ({len(files) / max(browser_seconds, 1e-6):.1f} 篇/秒)")
+    return mismatches == 0
+
+def main():
+    parser = argparse.ArgumentParser(description='离线 HTML -> Markdown 转换器')
+    parser.add_argument('--compare', metavar='DIR', help='在样例目录 (*.html) 上与浏览器内转换结果对比')
+    parser.add_argument('--save-images', action='store_true', help='转换时保留图片 (与抓取时的选项一致)')
+    parser.add_argument('--workers', type=int, default=None, help='进程数 (默认: 全部 CPU 核心)')
+    args = parser.parse_args()
+
+    if args.compare:
+        ok = compare_with_browser(args.compare, args.save_images, args.workers)
+        sys.exit(0 if ok else 1)
+    parser.print_help()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,178 @@
+"""
+只刷新已保存文章的阅读量和点赞量
+
+发布后几天内阅读量、点赞量还在变化，重新完整抓取（正文转换、图片下载）代价太高。
+这里只打开页面读取计数器：不等待正文稳定、不转换 Markdown、拦截图片等资源，
+结果直接写回各批次的 articles_detailed.json：
+    python -m utils.metrics_refresher Output/某个批次文件夹
+    python -m utils.metrics_refresher --all --days 7 --concurrency 4
+"""
+import os
+import json
+import argparse
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from .crawl_engine import CrawlEngine, DEFAULT_CONCURRENCY
+from .circuit_breaker import CircuitBreaker
+from .date_utils import parse_date
+from .rate_limiter import AimdRateLimiter, DEFAULT_INITIAL_RATE, DEFAULT_MAX_RATE
+
+# 写回结果的间隔（篇），中断时最多丢失这么多篇的刷新结果
+SAVE_EVERY = 100
+
+def _publish_date(article: Dict) -> Optional[datetime]:
+    """发布时间可能带有时分（2024-01-01 12:00），只取日期部分"""
+    return parse_date((article.get('publish_time') or '').split(' ')[0])
+
+class MetricsRefresher:
+    """
+    收集批次中成功抓取的文章，按链接去重后只刷新计数器
+    同一篇文章从文章库复制到多个批次时，所有副本一起更新
+    """
+
+    def __init__(self, batch_folders: List[str], days: Optional[int] = None):
+        self.batch_folders = batch_folders
+        self.articles: Dict[str, List[Dict]] = {}
+        # 链接 -> [(批次文件夹, 文章在列表中的序号), ...]
+        self.targets: Dict[str, List[Tuple[str, int]]] = {}
+        self._dirty = set()
+        self._unsaved = 0
+        self.stats = {'articles': 0, 'updated': 0, 'changed': 0, 'deleted': 0, 'failed': 0}
+
+        since = datetime.now() - timedelta(days=days) if days else None
+        for batch_folder in batch_folders:
+            articles_file = os.path.join(batch_folder, "articles_detailed.json")
+            try:
+                with open(articles_file, 'r', encoding='utf-8') as f:
+                    articles = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ 读取 {articles_file} 失败: {e}")
+                continue
+            self.articles[batch_folder] = articles
+            for index, article in enumerate(articles):
+                url = article.get('url')
+                if not url or not article.get('title'):
+                    continue
+                published = _publish_date(article)
+                if since and published and published < since:
+                    continue
+                self.targets.setdefault(url, []).append((batch_folder, index))
+                self.stats['articles'] += 1
+
+    def handle_result(self, url: str, data: Dict) -> None:
+        if data.get('status') == 'deleted':
+            # 文章已被删除，保留原有数据，只做标记
+            self.stats['deleted'] += 1
+            self._update(url, {'deleted_time': datetime.now().isoformat()})
+            print(f"    🗑️ 已删除或违规")
+            return
+        if not data.get('title'):
+            self.handle_error(url, data.get('error') or "未获取到标题")
+            return
+
+        self.stats['updated'] += 1
+        changed = self._update(url, {
+            'read_count': data.get('read_count', ''),
+            'like_count': data.get('like_count', ''),
+        }, data.get('metadata', {}).get('metrics_time'))
+        if changed:
+            self.stats['changed'] += 1
+        print(f"    ✅ 阅读 {data.get('read_count') or '-'}，点赞 {data.get('like_count') or '-'}")
+
+    def handle_error(self, url: str, error: str, error_class: Optional[str] = None) -> None:
+        self.stats['failed'] += 1
+        print(f"    ❌ 刷新失败: {error}")
+
+    def _update(self, url: str, fields: Dict, metrics_time: Optional[str] = None) -> bool:
+        """更新该链接在所有批次中的记录，返回计数是否有变化"""
+        changed = False
+        for batch_folder, index in self.targets.get(url, []):
+            article = self.articles[batch_folder][index]
+            metadata = article.setdefault('metadata', {})
+            if 'deleted_time' in fields:
+                metadata['deleted_time'] = fields['deleted_time']
+            else:
+                changed = changed or any(article.get(key) != value for key, value in fields.items())
+                article.update(fields)
+                metadata['metrics_updated_time'] = metrics_time or datetime.now().isoformat()
+                # HTTP 快速抓取时没有拿到的计数器已经补齐
+                metadata.pop('metrics_pending', None)
+            self._dirty.add(batch_folder)
+
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self.save()
+        return changed
+
+    def save(self) -> None:
+        """把有变化的批次写回 articles_detailed.json（先写临时文件再替换）"""
+        for batch_folder in self._dirty:
+            articles_file = os.path.join(batch_folder, "articles_detailed.json")
+            tmp_file = articles_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.articles[batch_folder], f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, articles_file)
+        self._dirty.clear()
+        self._unsaved = 0
+
+    def run(self, concurrency: int = DEFAULT_CONCURRENCY,
+            initial_rate: float = DEFAULT_INITIAL_RATE,
+            max_rate: float = DEFAULT_MAX_RATE) -> Dict:
+        urls = list(self.targets)
+        print(f"📊 刷新 {len(urls)} 篇文章的阅读量和点赞量（{len(self.articles)} 个批次，共 {self.stats['articles']} 条记录）")
+        engine = CrawlEngine(
+            batch_folder='',
+            concurrency=concurrency,
+            rate_limiter=AimdRateLimiter(initial_rate=initial_rate, max_rate=max_rate),
+            circuit_breaker=CircuitBreaker(),
+            # 计数器由页面脚本加载，不能关闭 JavaScript；图片、样式等全部拦截
+            pool_options={'resource_profile': 'text'},
+            on_result=self.handle_result,
+            on_error=self.handle_error,
+            metrics_only=True,
+        )
+        try:
+            engine.crawl(urls)
+        finally:
+            self.save()
+        return self.stats
+
+def main():
+    parser = argparse.ArgumentParser(description='只刷新已保存文章的阅读量和点赞量')
+    parser.add_argument('batch_folders', nargs='*', help='批次文件夹路径')
+    parser.add_argument('--all', action='store_true', help='刷新 Output 目录下的所有批次')
+    parser.add_argument('--days', type=int, default=None,
+                        help='只刷新最近 N 天内发布的文章 (默认: 全部)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'同时打开的页面数 (默认: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--initial-rate', type=float, default=DEFAULT_INITIAL_RATE,
+                        help=f'初始请求速率，次/秒 (默认: {DEFAULT_INITIAL_RATE})')
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_MAX_RATE,
+                        help=f'请求速率上限，次/秒 (默认: {DEFAULT_MAX_RATE})')
+    args = parser.parse_args()
+
+    batch_folders = list(args.batch_folders)
+    if args.all:
+        output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Output")
+        if os.path.isdir(output_dir):
+            batch_folders.extend(
+                os.path.join(output_dir, name) for name in sorted(os.listdir(output_dir))
+                if os.path.isfile(os.path.join(output_dir, name, 'articles_detailed.json'))
+            )
+    if not batch_folders:
+        parser.print_help()
+        return
+
+    start = datetime.now()
+    refresher = MetricsRefresher(batch_folders, args.days)
+    try:
+        stats = refresher.run(args.concurrency, args.initial_rate, args.max_rate)
+    except KeyboardInterrupt:
+        print("\n\n⚠️ 检测到用户中断，已保存刷新结果")
+        stats = refresher.stats
+    seconds = (datetime.now() - start).total_seconds()
+    print(f"\n✨ 刷新 {stats['updated']} 篇（计数有变化 {stats['changed']} 篇），"
+          f"已删除 {stats['deleted']} 篇，失败 {stats['failed']} 篇，用时 {seconds:.1f} 秒")
+
+if __name__ == '__main__':
+    main()
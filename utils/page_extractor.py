@@ -0,0 +1,132 @@
+import re
+from typing import Dict
+from .html_to_markdown import MARKDOWN_CONVERTER_JS, finalize_markdown
+
+# 在页面内一次性提取文章的所有字段：元数据、图片列表和正文 Markdown
+# 每个字段单独 try/catch，某个字段失败不影响其他字段（与逐个 query_selector 时的容错一致）
+EXTRACT_ARTICLE_JS = """({shouldSaveImages, collectImages, collectHtml}) => {
+    const convert = %s;
+
+    function textOf(selector) {
+        try {
+            const el = document.querySelector(selector);
+            return el ? el.innerText.trim() : '';
+        } catch (e) {
+            return '';
+        }
+    }
+
+    const payload = {
+        title: textOf('h1.rich_media_title'),
+        author: textOf('a#js_name'),
+        publish_time: textOf('em#publish_time'),
+        read_text: textOf('span#js_read_area'),
+        like_text: textOf('span#like_area'),
+        has_content: false,
+        markdown: null,
+        markdown_error: null,
+        text: '',
+        images: [],
+        html: null
+    };
+
+    const content = document.querySelector('div#js_content');
+    if (!content) return payload;
+    payload.has_content = true;
+
+    if (collectImages) {
+        try {
+            payload.images = Array.from(content.querySelectorAll('img')).map(img => ({
+                data_src: img.getAttribute('data-src'),
+                src: img.getAttribute('src'),
+                alt: img.getAttribute('alt')
+            }));
+        } catch (e) {
+            payload.images = [];
+        }
+    }
+
+    try {
+        payload.markdown = convert(content, shouldSaveImages);
+    } catch (e) {
+        payload.markdown_error = String(e);
+    }
+
+    try {
+        payload.text = content.innerText.trim();
+    } catch (e) {
+        payload.text = '';
+    }
+
+    if (collectHtml) {
+        try {
+            payload.html = content.outerHTML;
+        } catch (e) {
+            payload.html = null;
+        }
+    }
+
+    return payload;
+}""" % MARKDOWN_CONVERTER_JS
+
+# 只刷新阅读量/点赞量时使用：不转换正文，只读取计数器（以及用于判断页面是否正常的标题）
+EXTRACT_METRICS_JS = """() => {
+    function textOf(selector) {
+        try {
+            const el = document.querySelector(selector);
+            return el ? el.innerText.trim() : '';
+        } catch (e) {
+            return '';
+        }
+    }
+    return {
+        title: textOf('h1.rich_media_title'),
+        read_text: textOf('span#js_read_area'),
+        like_text: textOf('span#like_area')
+    };
+}"""
+
+# 计数器由页面脚本异步填充，等待其中出现数字（超时则读取当时的值）
+WAIT_FOR_METRICS_JS = """() => /\\d/.test((document.querySelector('span#js_read_area') || {}).innerText || '')"""
+
+def extract_count(text: str) -> str:
+    """从阅读量/点赞量文本中提取数字"""
+    match = re.search(r'(\d+)', text or '')
+    return match.group(1) if match else ''
+
+async def extract_article_payload(page, save_images: bool = False, collect_html: bool = False) -> Dict:
+    """
+    通过一次 page.evaluate 提取文章全部字段
+    返回: {'title', 'author', 'publish_time', 'read_count', 'like_count',
+           'has_content', 'markdown', 'markdown_error', 'text', 'images', 'html'}
+    markdown 为 None 表示页面内转换失败，调用方应退回纯文本
+    collect_html: 同时返回正文的原始 HTML（用于归档）
+    """
+    payload = await page.evaluate(EXTRACT_ARTICLE_JS, {
+        "shouldSaveImages": save_images,
+        "collectImages": save_images,
+        "collectHtml": collect_html,
+    })
+    payload['read_count'] = extract_count(payload.pop('read_text', ''))
+    payload['like_count'] = extract_count(payload.pop('like_text', ''))
+    if payload.get('markdown') is not None:
+        payload['markdown'] = finalize_markdown(payload['markdown'])
+    return payload
+
+async def extract_article_metrics(page, wait_ms: int = 3000) -> Dict:
+    """
+    只提取阅读量和点赞量，最多等待 wait_ms 毫秒让页面脚本填充计数器
+    返回: {'title', 'read_count', 'like_count'}
+    """
+    if wait_ms > 0:
+        try:
+            await page.wait_for_function(WAIT_FOR_METRICS_JS, timeout=wait_ms)
+        except Exception:
+            # 部分文章不显示阅读量，超时不算失败
+            pass
+    payload = await page.evaluate(EXTRACT_METRICS_JS)
+    return {
+        'title': payload.get('title') or '',
+        'read_count': extract_count(payload.get('read_text', '')),
+        'like_count': extract_count(payload.get('like_text', '')),
+    }
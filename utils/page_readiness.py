@@ -0,0 +1,80 @@
+from typing import Dict
+
+# 正文在这段时间内没有任何 DOM 变化即视为稳定（毫秒）
+DEFAULT_QUIET_MS = 500
+# 最长等待时间（毫秒），与旧版固定等待 5 秒保持一致
+DEFAULT_MAX_WAIT_MS = 5000
+
+# 在页面内监听 #js_content 的 DOM 变化和懒加载图片的 src 替换，
+# 连续 quietMs 毫秒没有变化或达到 maxMs 上限时返回
+WAIT_FOR_STABLE_JS = """({quietMs, maxMs}) => new Promise(resolve => {
+    const start = performance.now();
+    const root = document.querySelector('#js_content');
+    let mutations = 0;
+    let lastChange = start;
+
+    function pendingImages() {
+        if (!root) return 0;
+        return Array.from(root.querySelectorAll('img[data-src]'))
+            .filter(img => !img.getAttribute('src') || (img.getAttribute('src') !== img.dataset.src && !img.complete))
+            .length;
+    }
+
+    let lastPending = pendingImages();
+
+    function finish(stable) {
+        if (observer) observer.disconnect();
+        clearInterval(timer);
+        resolve({
+            waited_ms: Math.round(performance.now() - start),
+            stable: stable,
+            mutations: mutations,
+            pending_images: pendingImages()
+        });
+    }
+
+    const observer = root ? new MutationObserver(records => {
+        mutations += records.length;
+        lastChange = performance.now();
+    }) : null;
+    if (observer) {
+        observer.observe(root, {
+            childList: true,
+            subtree: true,
+            characterData: true,
+            attributes: true,
+            attributeFilter: ['src', 'data-src', 'style', 'class']
+        });
+    }
+
+    const timer = setInterval(() => {
+        const now = performance.now();
+        // 懒加载图片数量仍在变化，说明图片还在替换中
+        const pending = pendingImages();
+        if (pending !== lastPending) {
+            lastPending = pending;
+            lastChange = now;
+        }
+        if (now - lastChange >= quietMs) {
+            finish(true);
+        } else if (now - start >= maxMs) {
+            finish(false);
+        }
+    }, 50);
+})"""
+
+async def wait_for_content_stable(page, quiet_ms: int = DEFAULT_QUIET_MS,
+                                  max_ms: int = DEFAULT_MAX_WAIT_MS) -> Dict:
+    """
+    等待正文内容稳定：#js_content 连续 quiet_ms 毫秒没有 DOM 变化、
+    懒加载图片不再替换时立即返回，最长等待 max_ms 毫秒
+
+    返回: {'waited_ms', 'stable', 'mutations', 'pending_images'}
+    """
+    try:
+        return await page.evaluate(WAIT_FOR_STABLE_JS, {"quietMs": quiet_ms, "maxMs": max_ms})
+    except Exception as e:
+        # 页面脚本执行失败时退回固定等待
+        print(f"    ⚠️ 内容稳定检测失败，改为固定等待: {e}")
+        await page.wait_for_timeout(max_ms)
+        return {"waited_ms": max_ms, "stable": False, "mutations": 0, "pending_images": None}
@@ -2,26 +2,45 @@ import os
 import json
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+from .errors import PERMANENT_ERROR_CLASSES
+
+# 续传时需要继续抓取的状态（retrying 表示在延迟重试队列中，到 next_eligible_at 后再抓取）
+PENDING_STATUSES = ('pending', 'failed', 'retrying')
+
+def is_pending(data: Dict) -> bool:
+    """续传时是否需要继续抓取（链接无效等永久性错误不再重试）"""
+    return data['status'] in PENDING_STATUSES and data.get('error_class') not in PERMANENT_ERROR_CLASSES
 
 class ProgressManager:
     def __init__(self, batch_folder: str):
         self.batch_folder = batch_folder
         self.progress_file = os.path.join(batch_folder, "progress.json")
         
-    def create_progress_file(self, urls: List[str]) -> None:
-        """创建新的进度文件"""
+    def create_progress_file(self, urls: List[str], completed_urls: Optional[List[str]] = None) -> None:
+        """
+        创建新的进度文件
+        completed_urls: 不需要抓取、直接标记为完成的文章（例如从文章库复制的）
+        """
+        completed_urls = completed_urls or []
+        articles = {url: {'status': 'pending', 'attempts': 0} for url in urls}
+        articles.update({url: {'status': 'completed', 'attempts': 0} for url in completed_urls})
         progress_data = {
             'batch_start_time': datetime.now().isoformat(),
-            'total_urls': len(urls),
-            'completed_count': 0,
-            'articles': {url: {'status': 'pending', 'attempts': 0} for url in urls}
+            'total_urls': len(articles),
+            'completed_count': len(completed_urls),
+            'articles': articles
         }
         
         with open(self.progress_file, 'w', encoding='utf-8') as f:
             json.dump(progress_data, f, ensure_ascii=False, indent=2)
             
-    def update_progress(self, url: str, status: str, error: str = None) -> None:
-        """更新文章爬取状态"""
+    def update_progress(self, url: str, status: str, error: str = None,
+                        next_eligible_at: str = None, error_class: str = None) -> None:
+        """
+        更新文章爬取状态
+        next_eligible_at: 状态为 retrying 时，下一次允许重试的时间（ISO 格式）
+        error_class: 失败的错误分类（network/timeout/not_found/deleted/blocked/parse）
+        """
         try:
             with open(self.progress_file, 'r', encoding='utf-8') as f:
                 progress_data = json.load(f)
@@ -33,6 +52,14 @@ class ProgressManager:
                 article_data['attempts'] = article_data.get('attempts', 0) + 1
                 if error:
                     article_data['last_error'] = error
+                if next_eligible_at:
+                    article_data['next_eligible_at'] = next_eligible_at
+                else:
+                    article_data.pop('next_eligible_at', None)
+                if error_class:
+                    article_data['error_class'] = error_class
+                else:
+                    article_data.pop('error_class', None)
                 
                 if status == 'completed':
                     progress_data['completed_count'] += 1
@@ -64,7 +91,7 @@ def find_incomplete_batch() -> Optional[str]:
                     
                 # 检查是否有未完成的文章
                 pending_articles = [url for url, data in progress_data['articles'].items() 
-                                 if data['status'] in ['pending', 'failed']]
+                                 if is_pending(data)]
                                  
                 if pending_articles:
                     return batch_path
@@ -85,9 +112,20 @@ def get_pending_articles(batch_folder: str) -> Tuple[List[str], Dict]:
             progress_data = json.load(f)
             
         pending_urls = [url for url, data in progress_data['articles'].items() 
-                       if data['status'] in ['pending', 'failed']]
+                       if is_pending(data)]
         
         return pending_urls, progress_data
     except Exception as e:
         print(f"⚠️ 读取进度文件失败: {e}")
-        return [], {} 
\ No newline at end of file
+        return [], {} 
+
+def get_retry_state(progress_data: Dict) -> Dict[str, Dict]:
+    """
+    从进度数据中取出仍在延迟重试中的文章
+    返回: {url: {'attempts', 'next_eligible_at'}}
+    """
+    return {
+        url: {'attempts': data.get('attempts', 0), 'next_eligible_at': data.get('next_eligible_at')}
+        for url, data in progress_data.get('articles', {}).items()
+        if data.get('status') == 'retrying'
+    }
@@ -0,0 +1,200 @@
+import time
+import queue
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from .invalid_page import ANTI_BOT_ERROR_PREFIX
+from .errors import DEADLINE_ERROR_PREFIX
+
+# 初始速率（每秒请求数），相当于旧版每篇文章之间固定等待 5 秒
+DEFAULT_INITIAL_RATE = 0.2
+# 速率下限/上限（每秒请求数）
+DEFAULT_MIN_RATE = 0.05
+DEFAULT_MAX_RATE = 2.0
+# 每次成功后增加的速率（加性增加）
+DEFAULT_INCREASE_STEP = 0.02
+# 失败后速率乘以的系数（乘性减少）
+DEFAULT_DECREASE_FACTOR = 0.5
+# crawl_info.json 中最多保留的退避事件数
+MAX_BACKOFF_EVENTS = 100
+
+def host_of(url: str) -> str:
+    """按域名分别限速"""
+    return urlparse(url).netloc or url
+
+def classify_outcome(article_data: Optional[Dict] = None, error: Optional[str] = None) -> Optional[str]:
+    """
+    根据抓取结果判断是否需要退避
+    返回: None 表示正常（包括已删除的文章），否则返回退避原因；
+          'deadline' 表示单篇文章的时间预算已用完（该步骤的请求可能没有发出）
+    """
+    if error is not None:
+        if ANTI_BOT_ERROR_PREFIX in error:
+            return 'anti_bot'
+        if DEADLINE_ERROR_PREFIX in error:
+            return 'deadline'
+        text = error.lower()
+        return 'timeout' if ('timeout' in text or '超时' in text) else 'error'
+    if not article_data:
+        return 'error'
+    if article_data.get('title') or article_data.get('status') == 'deleted':
+        return None
+    if article_data.get('status') == 'blocked':
+        return 'anti_bot'
+    if DEADLINE_ERROR_PREFIX in (article_data.get('error') or ''):
+        return 'deadline'
+    error_text = (article_data.get('error') or '').lower()
+    if 'timeout' in error_text or '超时' in error_text:
+        return 'timeout'
+    return 'empty_title'
+
+class _HostBucket:
+    """单个域名的令牌桶和 AIMD 速率"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.last_backoff = 0.0
+        self.successes = 0
+        self.failures = 0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class AimdRateLimiter:
+    """
+    按域名的自适应令牌桶限速器（AIMD）
+    抓取成功时速率加性增加，超时、标题为空或反爬页面时速率乘性减少
+    只在一个进程中维护状态：多进程抓取时由协调进程持有，
+    工作进程通过 RemoteRateLimiter 向协调进程申请令牌
+    """
+
+    def __init__(self, initial_rate: float = DEFAULT_INITIAL_RATE,
+                 min_rate: float = DEFAULT_MIN_RATE,
+                 max_rate: float = DEFAULT_MAX_RATE,
+                 increase_step: float = DEFAULT_INCREASE_STEP,
+                 decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+                 burst: float = 1.0):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.initial_rate = min(max(initial_rate, self.min_rate), self.max_rate)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.burst = max(1.0, burst)
+        self._buckets: Dict[str, _HostBucket] = {}
+        self.backoff_events: List[Dict] = []
+        self.backoff_count = 0
+
+    def _bucket(self, host: str) -> _HostBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _HostBucket(self.initial_rate, self.burst)
+        return bucket
+
+    def try_acquire(self, host: str) -> float:
+        """
+        尝试取一个令牌（不阻塞）
+        返回: 0 表示已取得令牌，否则返回还需等待的秒数
+        """
+        bucket = self._bucket(host)
+        bucket.refill(time.monotonic())
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return 0.0
+        return (1 - bucket.tokens) / bucket.rate
+
+    async def acquire(self, host: str, url: Optional[str] = None) -> None:
+        """等待直到可以向该域名发出下一个请求（url 只在多进程时由协调进程使用）"""
+        while True:
+            wait = self.try_acquire(host)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def record(self, host: str, reason: Optional[str] = None) -> None:
+        """
+        记录一次抓取结果并调整速率
+        reason: None 表示成功，否则为退避原因
+        """
+        bucket = self._bucket(host)
+        bucket.refill(time.monotonic())
+        if reason is None:
+            bucket.successes += 1
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase_step)
+            return
+
+        bucket.failures += 1
+        now = time.monotonic()
+        # 退避后的一个请求间隔内，并发中的其他失败视为同一次拥塞，不重复减速
+        if now - bucket.last_backoff < 1 / bucket.rate:
+            return
+        rate_before = bucket.rate
+        bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+        bucket.tokens = min(bucket.tokens, 0.0)
+        bucket.last_backoff = now
+        self.backoff_count += 1
+        self.backoff_events.append({
+            'time': datetime.now().isoformat(),
+            'host': host,
+            'reason': reason,
+            'rate_before': round(rate_before, 3),
+            'rate_after': round(bucket.rate, 3),
+        })
+        del self.backoff_events[:-MAX_BACKOFF_EVENTS]
+        print(f"    🐢 限速退避 ({reason}): {rate_before:.2f} → {bucket.rate:.2f} 次/秒")
+
+    def record_result(self, url: str, article_data: Dict) -> None:
+        self.record(host_of(url), classify_outcome(article_data))
+
+    def record_error(self, url: str, error: str) -> None:
+        self.record(host_of(url), classify_outcome(error=error))
+
+    def get_stats(self) -> Dict:
+        """当前速率和退避事件，写入 crawl_info.json"""
+        return {
+            'initial_rate': self.initial_rate,
+            'min_rate': self.min_rate,
+            'max_rate': self.max_rate,
+            'hosts': {
+                host: {
+                    'current_rate': round(bucket.rate, 3),
+                    'current_interval_seconds': round(1 / bucket.rate, 2),
+                    'successes': bucket.successes,
+                    'failures': bucket.failures,
+                } for host, bucket in self._buckets.items()
+            },
+            'backoff_count': self.backoff_count,
+            'backoff_events': self.backoff_events,
+        }
+
+class RemoteRateLimiter:
+    """
+    工作进程使用的限速器代理：向协调进程申请令牌，
+    抓取结果本来就会发给协调进程，由协调进程调整速率
+    """
+
+    def __init__(self, worker_id: int, request_queue, grant_queue):
+        self.worker_id = worker_id
+        self.request_queue = request_queue
+        self.grant_queue = grant_queue
+
+    async def acquire(self, host: str, url: Optional[str] = None) -> None:
+        # 附带链接，协调进程据此识别熔断器的探测请求
+        self.request_queue.put(("acquire", self.worker_id, host, url))
+        while True:
+            try:
+                # 带超时轮询，便于中断时线程及时退出
+                await asyncio.to_thread(self.grant_queue.get, True, 1)
+                return
+            except queue.Empty:
+                continue
+
+    def record_result(self, url: str, article_data: Dict) -> None:
+        pass
+
+    def record_error(self, url: str, error: str) -> None:
+        pass
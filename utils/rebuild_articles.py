@@ -0,0 +1,124 @@
+"""
+从批次的原始 HTML 归档重新生成 articles_detailed.json
+
+改进了 Markdown 转换或摘要逻辑后，不需要重新抓取，直接在本地重建：
+    python -m utils.rebuild_articles Output/某个批次文件夹
+    python -m utils.rebuild_articles --all
+"""
+import os
+import json
+import shutil
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from .html_archive import RawHtmlArchive, load_archived_html
+from .markdown_converter import convert_html_to_markdown
+from .text_utils import extract_summary
+
+def _rebuild_job(args) -> Tuple[int, Optional[str], Optional[str], Optional[str]]:
+    """
+    工作进程：读取归档、转换 Markdown、提取摘要
+    返回: (文章序号, 正文, 摘要, 错误信息)
+    """
+    index, path, url, save_images = args
+    try:
+        html = load_archived_html(path)
+        if html is None:
+            return index, None, None, "归档不存在"
+        content = convert_html_to_markdown(html, url, save_images)
+        if not content:
+            return index, None, None, "内容转换后为空"
+        return index, content, extract_summary(content), None
+    except Exception as e:
+        return index, None, None, str(e)
+
+def rebuild_batch(batch_folder: str, workers: Optional[int] = None) -> Dict:
+    """
+    重建单个批次的 articles_detailed.json（原文件备份为 .bak）
+    只替换有归档的文章的正文和摘要，其他字段保持不变
+    返回统计信息
+    """
+    articles_file = os.path.join(batch_folder, "articles_detailed.json")
+    stats = {'batch': os.path.basename(batch_folder), 'total': 0, 'rebuilt': 0, 'missing': 0, 'failed': 0}
+    if not os.path.exists(articles_file):
+        print(f"❌ 没有找到 {articles_file}")
+        return stats
+
+    with open(articles_file, 'r', encoding='utf-8') as f:
+        articles = json.load(f)
+    stats['total'] = len(articles)
+
+    archive = RawHtmlArchive(batch_folder)
+    jobs = []
+    for index, article in enumerate(articles):
+        url = article.get('url')
+        if not url or not article.get('title'):
+            continue
+        # 从文章库复制来的文章沿用原批次的归档文件名
+        raw_html = article.get('metadata', {}).get('raw_html')
+        path = os.path.join(batch_folder, raw_html) if raw_html else archive.path_for(url)
+        if not os.path.exists(path):
+            stats['missing'] += 1
+            continue
+        jobs.append((index, path, url, article.get('images') is not None))
+
+    if not jobs:
+        print(f"⚠️ {stats['batch']}: 没有可重建的归档")
+        return stats
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    rebuild_time = datetime.now().isoformat()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for index, content, summary, error in executor.map(_rebuild_job, jobs, chunksize=chunksize):
+            if error:
+                stats['failed'] += 1
+                print(f"    ⚠️ 第 {index + 1} 篇重建失败: {error}")
+                continue
+            article = articles[index]
+            article['content'] = content
+            article['summary'] = summary
+            article['content_format'] = 'markdown'
+            metadata = article.setdefault('metadata', {})
+            metadata['markdown_enabled'] = True
+            metadata['rebuilt_time'] = rebuild_time
+            stats['rebuilt'] += 1
+
+    shutil.copyfile(articles_file, articles_file + '.bak')
+    with open(articles_file, 'w', encoding='utf-8') as f:
+        json.dump(articles, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ {stats['batch']}: 重建 {stats['rebuilt']} 篇，缺少归档 {stats['missing']} 篇，失败 {stats['failed']} 篇")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='从原始 HTML 归档重建 articles_detailed.json')
+    parser.add_argument('batch_folders', nargs='*', help='批次文件夹路径')
+    parser.add_argument('--all', action='store_true', help='重建 Output 目录下的所有批次')
+    parser.add_argument('--workers', type=int, default=None, help='进程数 (默认: 全部 CPU 核心)')
+    args = parser.parse_args()
+
+    batch_folders = list(args.batch_folders)
+    if args.all:
+        output_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Output")
+        if os.path.isdir(output_dir):
+            batch_folders.extend(
+                os.path.join(output_dir, name) for name in sorted(os.listdir(output_dir))
+                if os.path.isdir(os.path.join(output_dir, name, 'raw_html'))
+            )
+    if not batch_folders:
+        parser.print_help()
+        return
+
+    start = datetime.now()
+    totals = {'rebuilt': 0, 'missing': 0, 'failed': 0}
+    for batch_folder in batch_folders:
+        stats = rebuild_batch(batch_folder, args.workers)
+        for key in totals:
+            totals[key] += stats[key]
+    seconds = (datetime.now() - start).total_seconds()
+    print(f"\n✨ 共重建 {totals['rebuilt']} 篇文章，用时 {seconds:.1f} 秒")
+
+if __name__ == '__main__':
+    main()
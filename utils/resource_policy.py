@@ -0,0 +1,125 @@
+from typing import Dict, Optional
+
+# 各档位需要拦截的资源类型
+#   full: 不拦截任何请求（保存图片时使用）
+#   text: 只抓文本，拦截图片、视频、字体、样式表和统计上报
+#   lite: 在 text 基础上关闭 JavaScript，适用于正文由服务端直接渲染的页面
+PROFILE_BLOCKED_TYPES = {
+    "full": set(),
+    "text": {"image", "media", "font", "stylesheet", "texttrack", "manifest"},
+    "lite": {"image", "media", "font", "stylesheet", "texttrack", "manifest", "script"},
+}
+RESOURCE_PROFILES = tuple(PROFILE_BLOCKED_TYPES)
+
+# 统计上报/监控类请求（URL 片段），在 text 和 lite 档位下拦截
+TRACKER_PATTERNS = (
+    "mp.weixin.qq.com/mp/jsmonitor",
+    "mp.weixin.qq.com/mp/appmsgreport",
+    "mp.weixin.qq.com/mp/webcommreport",
+    "mp.weixin.qq.com/mp/wapcommreport",
+    "badjs.weixinbridge.com",
+    "report.url.cn",
+    "btrace.qq.com",
+    "pingtas.qq.com",
+    "aegis.qq.com",
+)
+
+# 被拦截资源的平均大小估计（字节），仅用于估算节省的流量
+ESTIMATED_BYTES = {
+    "image": 80 * 1024,
+    "media": 500 * 1024,
+    "font": 60 * 1024,
+    "stylesheet": 30 * 1024,
+    "script": 80 * 1024,
+    "tracker": 1024,
+}
+DEFAULT_ESTIMATED_BYTES = 10 * 1024
+
+def resolve_profile(profile: Optional[str], save_images: bool) -> str:
+    """
+    根据用户选择和是否保存图片确定实际使用的档位
+    profile 为 None 或 'auto' 时：保存图片用 full，否则用 text
+    """
+    if not profile or profile == "auto":
+        return "full" if save_images else "text"
+    if profile not in PROFILE_BLOCKED_TYPES:
+        raise ValueError(f"未知的资源拦截档位: {profile}")
+    if save_images and profile != "full":
+        # 保存图片时不能拦截图片请求
+        print(f"⚠️ 保存图片时不能使用 {profile} 档位，已改为 full")
+        return "full"
+    return profile
+
+class ResourcePolicy:
+    """
+    请求拦截策略：挂在浏览器 context 上，按资源类型和 URL 中止不需要的请求，
+    并按页面统计拦截的请求数和估算节省的流量
+    """
+
+    def __init__(self, profile: str = "text"):
+        if profile not in PROFILE_BLOCKED_TYPES:
+            raise ValueError(f"未知的资源拦截档位: {profile}")
+        self.profile = profile
+        self.blocked_types = PROFILE_BLOCKED_TYPES[profile]
+        self.block_trackers = profile != "full"
+        self._page_stats: Dict[int, Dict] = {}
+
+    @property
+    def javascript_enabled(self) -> bool:
+        """lite 档位关闭页面 JavaScript"""
+        return self.profile != "lite"
+
+    @property
+    def active(self) -> bool:
+        """是否需要注册路由（full 档位不拦截任何请求）"""
+        return bool(self.blocked_types) or self.block_trackers
+
+    def classify(self, resource_type: str, url: str) -> Optional[str]:
+        """返回请求被拦截的类别，不拦截时返回 None"""
+        if self.block_trackers and any(pattern in url for pattern in TRACKER_PATTERNS):
+            return "tracker"
+        if resource_type in self.blocked_types:
+            return resource_type
+        return None
+
+    async def attach(self, context) -> None:
+        """在 context 上注册拦截路由"""
+        if self.active:
+            await context.route("**/*", self.handle_route)
+
+    async def handle_route(self, route) -> None:
+        """路由回调：拦截不需要的请求，其余请求交给后续路由或网络"""
+        request = route.request
+        category = self.classify(request.resource_type, request.url)
+        if category is None:
+            await route.fallback()
+            return
+
+        self._record(request, category)
+        await route.abort("blockedbyclient")
+
+    def _record(self, request, category: str) -> None:
+        """记录拦截的请求（按所属页面统计）"""
+        try:
+            page_key = id(request.frame.page)
+        except Exception:
+            # Service Worker 等请求没有所属页面
+            page_key = 0
+        stats = self._page_stats.setdefault(page_key, {"requests": 0, "bytes": 0, "by_type": {}})
+        stats["requests"] += 1
+        stats["bytes"] += ESTIMATED_BYTES.get(category, DEFAULT_ESTIMATED_BYTES)
+        stats["by_type"][category] = stats["by_type"].get(category, 0) + 1
+
+    def reset_page(self, page) -> None:
+        """开始抓取新文章前清空该页面的统计"""
+        self._page_stats.pop(id(page), None)
+
+    def pop_page_stats(self, page) -> Dict:
+        """取出并清空某个页面的拦截统计"""
+        stats = self._page_stats.pop(id(page), None) or {"requests": 0, "bytes": 0, "by_type": {}}
+        return {
+            "profile": self.profile,
+            "blocked_requests": stats["requests"],
+            "est_bytes_saved": stats["bytes"],
+            "blocked_by_type": stats["by_type"],
+        }
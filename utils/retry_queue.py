@@ -0,0 +1,73 @@
+import time
+import heapq
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+# 每篇文章最多尝试的次数（与旧版同一页面内重试 5 次一致）
+DEFAULT_MAX_ATTEMPTS = 5
+# 第一次重试前的等待时间（秒），之后每次翻倍
+DEFAULT_RETRY_BASE_DELAY = 3
+# 重试等待时间上限（秒）
+DEFAULT_RETRY_MAX_DELAY = 300
+
+def retry_delay(attempts: int, base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+                max_delay: float = DEFAULT_RETRY_MAX_DELAY) -> float:
+    """第 attempts 次失败后的等待时间（指数退避）"""
+    return min(max_delay, base_delay * 2 ** max(0, attempts - 1))
+
+def to_timestamp(value: Optional[str]) -> float:
+    """把进度文件中的 ISO 时间转换为时间戳，无法解析时视为立即可重试"""
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return 0.0
+
+def to_isoformat(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat()
+
+class RetryQueue:
+    """
+    延迟重试队列：失败的链接按 next_eligible_at 排队，
+    到期前不占用抓取页面，其他链接可以继续抓取
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 base_delay: float = DEFAULT_RETRY_BASE_DELAY,
+                 max_delay: float = DEFAULT_RETRY_MAX_DELAY):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def can_retry(self, attempts: int) -> bool:
+        """已经尝试 attempts 次后是否还可以重试"""
+        return attempts < self.max_attempts
+
+    def schedule(self, url: str, attempts: int) -> float:
+        """按已尝试次数安排下一次重试，返回 next_eligible_at 时间戳"""
+        eligible_at = time.time() + retry_delay(attempts, self.base_delay, self.max_delay)
+        self.push(url, eligible_at)
+        return eligible_at
+
+    def push(self, url: str, eligible_at: float) -> None:
+        """按指定时间加入队列（续传时恢复进度文件中的 next_eligible_at）"""
+        self._counter += 1
+        heapq.heappush(self._heap, (eligible_at, self._counter, url))
+
+    def pop_ready(self) -> Optional[str]:
+        """取出一个已到期的链接，没有则返回 None"""
+        if self._heap and self._heap[0][0] <= time.time():
+            return heapq.heappop(self._heap)[2]
+        return None
+
+    def next_wait(self) -> Optional[float]:
+        """距离最早一个链接到期的秒数，队列为空时返回 None"""
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - time.time())
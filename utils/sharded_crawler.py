@@ -0,0 +1,231 @@
+import os
+import queue
+from collections import deque
+import multiprocessing
+from typing import Callable, Dict, List, Optional
+from .crawl_engine import CrawlEngine, DEFAULT_CONCURRENCY
+from .rate_limiter import AimdRateLimiter, RemoteRateLimiter, classify_outcome
+from .circuit_breaker import CircuitBreaker
+from .errors import DEFAULT_ARTICLE_DEADLINE
+
+def split_into_shards(urls: List[str], shard_count: int) -> List[List[str]]:
+    """按轮询方式把链接分成 shard_count 份，保证各分片的时间分布相近"""
+    shard_count = max(1, min(shard_count, len(urls)))
+    shards = [[] for _ in range(shard_count)]
+    for i, url in enumerate(urls):
+        shards[i % shard_count].append(url)
+    return shards
+
+def merge_pool_stats(stats_list: List[Dict]) -> Dict:
+    """合并各工作进程的浏览器池统计"""
+    merged = {
+        "launch_count": 0,
+        "pages_served": 0,
+        "startup_seconds": 0.0,
+        "per_url_launch_estimate_seconds": 0.0,
+        "saved_seconds_estimate": 0.0,
+        "restart_reasons": [],
+    }
+    for stats in stats_list:
+        for key in ("launch_count", "pages_served", "startup_seconds",
+                    "per_url_launch_estimate_seconds", "saved_seconds_estimate"):
+            merged[key] += stats.get(key, 0)
+        merged["restart_reasons"].extend(stats.get("restart_reasons", []))
+        if stats.get("asset_cache"):
+            cache_stats = merged.setdefault("asset_cache", {})
+            for key in ("hits", "misses", "stored", "evicted", "bytes_served", "bytes_fetched"):
+                cache_stats[key] = cache_stats.get(key, 0) + stats["asset_cache"].get(key, 0)
+        if stats.get("har"):
+            har_stats = merged.setdefault("har", {"mode": stats["har"]["mode"], "dir": stats["har"]["dir"]})
+            for key in ("recorded", "replayed", "missing"):
+                har_stats[key] = har_stats.get(key, 0) + stats["har"].get(key, 0)
+        if stats.get("autoscale"):
+            merged.setdefault("autoscale", []).append(stats["autoscale"])
+        merged.setdefault("max_pages_per_browser", stats.get("max_pages_per_browser"))
+        merged.setdefault("max_rss_mb", stats.get("max_rss_mb"))
+
+    launch_count = merged["launch_count"]
+    merged["avg_startup_seconds"] = round(merged["startup_seconds"] / launch_count, 2) if launch_count else 0.0
+    for key in ("startup_seconds", "per_url_launch_estimate_seconds", "saved_seconds_estimate"):
+        merged[key] = round(merged[key], 2)
+    if merged.get("asset_cache"):
+        requests = merged["asset_cache"]["hits"] + merged["asset_cache"]["misses"]
+        merged["asset_cache"]["hit_rate"] = round(merged["asset_cache"]["hits"] / requests, 3) if requests else None
+    merged["workers"] = len(stats_list)
+    return merged
+
+def _worker_main(worker_id: int, urls: List[str], batch_folder: str, save_images: bool,
+                 concurrency: int, pool_options: Dict, result_queue, grant_queue,
+                 http_first: bool = False, archive_html: bool = False,
+                 retry_state: Optional[Dict[str, Dict]] = None,
+                 capture_images: bool = False,
+                 article_deadline: Optional[float] = DEFAULT_ARTICLE_DEADLINE,
+                 autoscale: Optional[Dict] = None) -> None:
+    """
+    工作进程入口：使用独立的浏览器抓取分配到的链接，
+    结果通过队列交给协调进程，工作进程本身不读写 progress.json
+    每次请求前通过 grant_queue 向协调进程申请令牌，所有进程共用一个限速器
+    失败的链接留在本进程的延迟重试队列中，重试状态发给协调进程写入进度
+    """
+    engine = CrawlEngine(
+        batch_folder, save_images,
+        concurrency=concurrency,
+        pool_options=pool_options,
+        rate_limiter=RemoteRateLimiter(worker_id, result_queue, grant_queue),
+        on_result=lambda url, article_data: result_queue.put(("result", url, article_data)),
+        on_error=lambda url, error, error_class: result_queue.put(("error", url, error, error_class)),
+        on_retry=lambda url, error, attempts, eligible_at, error_class: result_queue.put(
+            ("retry", url, error, attempts, eligible_at, error_class)),
+        http_first=http_first,
+        archive_html=archive_html,
+        capture_images=capture_images,
+        article_deadline=article_deadline,
+        autoscale=autoscale,
+    )
+    try:
+        engine.crawl(urls, retry_state)
+    except KeyboardInterrupt:
+        # 中断由协调进程统一处理
+        pass
+    finally:
+        result_queue.put(("done", worker_id, engine.get_stats(len(urls))))
+
+def crawl_sharded(urls: List[str], batch_folder: str, save_images: bool = False,
+                  workers: Optional[int] = None,
+                  concurrency: int = DEFAULT_CONCURRENCY,
+                  pool_options: Optional[Dict] = None,
+                  on_result: Optional[Callable[[str, Dict], None]] = None,
+                  on_error: Optional[Callable[[str, str, str], None]] = None,
+                  http_first: bool = False,
+                  archive_html: bool = False,
+                  rate_limiter: Optional[AimdRateLimiter] = None,
+                  circuit_breaker: Optional[CircuitBreaker] = None,
+                  on_retry: Optional[Callable[[str, str, int, str, str], None]] = None,
+                  retry_state: Optional[Dict[str, Dict]] = None,
+                  capture_images: bool = False,
+                  article_deadline: Optional[float] = DEFAULT_ARTICLE_DEADLINE,
+                  autoscale: Optional[Dict] = None) -> Dict:
+    """
+    多进程分片抓取：把链接分给多个工作进程，每个进程使用自己的浏览器，
+    当前进程作为协调者接收结果并调用回调（写进度、合并结果）
+
+    Args:
+        urls: 待抓取的链接
+        batch_folder: 批次输出文件夹
+        save_images: 是否保存图片
+        workers: 工作进程数，None 表示使用全部 CPU 核心
+        concurrency: 每个工作进程内同时抓取的页面数
+        pool_options: 传给 BrowserPool 的参数
+        on_result: 抓取完成回调 on_result(url, article_data)
+        on_error: 抓取异常回调 on_error(url, error_message, error_class)
+        http_first: 是否先用 HTTP 快速抓取，失败时再使用浏览器
+        archive_html: 是否随结果传回正文原始 HTML，由协调进程统一归档
+        rate_limiter: 所有工作进程共用的限速器（保存在协调进程中），None 时使用默认参数
+        circuit_breaker: 所有工作进程共用的反爬熔断器，熔断期间协调进程暂停发放令牌
+        on_retry: 失败后进入重试队列的回调 on_retry(url, error_message, attempts, next_eligible_at, error_class)
+        retry_state: 续传时恢复的重试状态 {url: {'attempts', 'next_eligible_at'}}
+        capture_images: 工作进程直接把浏览器收到的图片响应写入图片库，协调进程只登记索引
+        article_deadline: 单篇文章的时间预算（秒），各次尝试共用
+        autoscale: 每个工作进程各自自动调整页面数（concurrency 为上限），None 表示固定页面数
+
+    Returns:
+        合并后的浏览器池统计
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = split_into_shards(urls, workers)
+    if not urls:
+        return merge_pool_stats([])
+
+    # Playwright 不支持 fork 后复用，统一使用 spawn 启动工作进程
+    ctx = multiprocessing.get_context("spawn")
+    result_queue = ctx.Queue()
+    grant_queues = [ctx.Queue() for _ in shards]
+    rate_limiter = rate_limiter or AimdRateLimiter()
+    processes = []
+    for worker_id, shard in enumerate(shards):
+        process = ctx.Process(
+            target=_worker_main,
+            args=(worker_id, shard, batch_folder, save_images, concurrency,
+                  pool_options or {}, result_queue, grant_queues[worker_id],
+                  http_first, archive_html,
+                  {url: retry_state[url] for url in shard if url in (retry_state or {})},
+                  capture_images, article_deadline, autoscale),
+            daemon=True,
+        )
+        process.start()
+        processes.append(process)
+    print(f"🧩 已启动 {len(processes)} 个工作进程，每个进程 {concurrency} 个并发页面")
+
+    worker_stats = {}
+    # 等待令牌的请求 (worker_id, host, url)，按到达顺序发放
+    pending_acquires = deque()
+
+    def dispatch(message) -> None:
+        kind = message[0]
+        if kind == "acquire":
+            pending_acquires.append((message[1], message[2], message[3]))
+        elif kind == "result":
+            rate_limiter.record_result(message[1], message[2])
+            if circuit_breaker:
+                circuit_breaker.record(classify_outcome(message[2]), message[1])
+            if on_result:
+                on_result(message[1], message[2])
+        elif kind == "error":
+            rate_limiter.record_error(message[1], message[2])
+            if circuit_breaker:
+                circuit_breaker.record(classify_outcome(error=message[2]), message[1])
+            if on_error:
+                on_error(*message[1:])
+        elif kind == "retry":
+            rate_limiter.record_error(message[1], message[2])
+            if circuit_breaker:
+                circuit_breaker.record(classify_outcome(error=message[2]), message[1])
+            if on_retry:
+                on_retry(*message[1:])
+        elif kind == "done":
+            worker_stats[message[1]] = message[2]
+
+    def grant_tokens() -> float:
+        """尽量发放令牌，返回下一个令牌还需等待的秒数"""
+        while pending_acquires:
+            worker_id, host, url = pending_acquires[0]
+            # 熔断期间不发放令牌，半开状态下只放行一个探测请求
+            if circuit_breaker:
+                wait = circuit_breaker.time_until_ready()
+                if wait > 0:
+                    return wait
+            wait = rate_limiter.try_acquire(host)
+            if wait > 0:
+                return wait
+            if circuit_breaker:
+                circuit_breaker.on_request(url)
+            pending_acquires.popleft()
+            grant_queues[worker_id].put(True)
+        return 1.0
+
+    try:
+        while len(worker_stats) < len(processes):
+            timeout = min(1.0, grant_tokens())
+            try:
+                dispatch(result_queue.get(timeout=max(timeout, 0.01)))
+            except queue.Empty:
+                # 工作进程异常退出时不再等待它的结果
+                alive = [p for i, p in enumerate(processes)
+                         if i not in worker_stats and p.is_alive()]
+                if not alive:
+                    break
+    except KeyboardInterrupt:
+        # 收集中断前已经完成的结果，再交给调用方保存
+        while True:
+            try:
+                dispatch(result_queue.get(timeout=2))
+            except queue.Empty:
+                break
+        raise
+    finally:
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+
+    return merge_pool_stats(list(worker_stats.values()))
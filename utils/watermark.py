@@ -0,0 +1,127 @@
+import os
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from .date_utils import parse_date
+
+# 增量抓取状态，位于 Output 目录下，按文章列表文件分别记录
+STATE_DIR_NAME = '.state'
+WATERMARK_FILE_NAME = 'watermarks.json'
+DATE_FORMAT = '%Y-%m-%d'
+
+def item_url(item: Dict) -> Optional[str]:
+    """文章列表条目中的链接"""
+    return item.get('link') or item.get('url')
+
+class WatermarkStore:
+    """
+    每个文章列表文件的增量抓取水位线: Output/.state/watermarks.json
+    {列表名: {'latest_date', 'latest_ids', 'undated_ids', 'failed_urls', 'updated_time'}}
+    latest_date 为已处理文章的最新日期；同一天可能还会发布新文章，所以同时记录当天已处理的文章标识
+    """
+
+    def __init__(self, output_dir: str):
+        self.state_file = os.path.join(output_dir, STATE_DIR_NAME, WATERMARK_FILE_NAME)
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.watermarks: Dict[str, Dict] = json.load(f)
+        except (OSError, ValueError):
+            self.watermarks = {}
+
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+            tmp_file = self.state_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.watermarks, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            print(f"⚠️ 保存增量抓取水位线失败: {e}")
+
+    def get(self, source: str) -> Dict:
+        return self.watermarks.get(source) or {}
+
+    def select_delta(self, source: str, items: List[Dict], all_items: List[Dict],
+                     key_for: Callable[[str], Optional[str]]) -> Tuple[List[Dict], Dict]:
+        """
+        选出需要抓取的条目：比水位线新的、水位线当天尚未处理的、没有日期且未处理过的，
+        以及上次失败的（不受时间范围限制，从 all_items 中查找）
+        返回: (条目列表, 统计信息)
+        """
+        mark = self.get(source)
+        latest_date = parse_date(mark.get('latest_date', ''))
+        latest_ids = set(mark.get('latest_ids', []))
+        undated_ids = set(mark.get('undated_ids', []))
+        failed_urls = set(mark.get('failed_urls', []))
+
+        selected, selected_urls = [], set()
+        stats = {'watermark': mark.get('latest_date'), 'new': 0, 'failed_retry': 0, 'skipped': 0}
+        for item in items:
+            url = item_url(item)
+            if not url:
+                continue
+            article_id = key_for(url) or url
+            date = parse_date(item.get('date', ''))
+            if latest_date is None:
+                is_new = True
+            elif date is None:
+                is_new = article_id not in undated_ids
+            else:
+                is_new = date > latest_date or (date == latest_date and article_id not in latest_ids)
+            if is_new:
+                stats['new'] += 1
+            elif url in failed_urls:
+                stats['failed_retry'] += 1
+            else:
+                stats['skipped'] += 1
+                continue
+            selected.append(item)
+            selected_urls.add(url)
+
+        # 上次失败的文章即使已经不在本次的时间范围内也重新抓取
+        for item in all_items:
+            url = item_url(item)
+            if url in failed_urls and url not in selected_urls:
+                selected.append(item)
+                selected_urls.add(url)
+                stats['failed_retry'] += 1
+        return selected, stats
+
+    def update(self, source: str, items: Iterable[Dict], failed: Set[str],
+               key_for: Callable[[str], Optional[str]]) -> None:
+        """
+        本次抓取结束后推进水位线
+        items: 本次选中的条目；failed: 其中仍未成功的链接（下次增量抓取时重试）
+        """
+        mark = self.get(source)
+        latest_date = parse_date(mark.get('latest_date', ''))
+        latest_ids = set(mark.get('latest_ids', []))
+        undated_ids = set(mark.get('undated_ids', []))
+        failed_urls = set(mark.get('failed_urls', []))
+
+        for item in items:
+            url = item_url(item)
+            if not url:
+                continue
+            if url in failed:
+                failed_urls.add(url)
+                continue
+            failed_urls.discard(url)
+            article_id = key_for(url) or url
+            date = parse_date(item.get('date', ''))
+            if date is None:
+                undated_ids.add(article_id)
+            elif latest_date is None or date > latest_date:
+                latest_date = date
+                latest_ids = {article_id}
+            elif date == latest_date:
+                latest_ids.add(article_id)
+
+        self.watermarks[source] = {
+            'latest_date': latest_date.strftime(DATE_FORMAT) if latest_date else None,
+            'latest_ids': sorted(latest_ids),
+            'undated_ids': sorted(undated_ids),
+            'failed_urls': sorted(failed_urls),
+            'updated_time': datetime.now().isoformat(),
+        }
+        self.save()
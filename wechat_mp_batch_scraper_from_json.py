@@ -1,16 +1,44 @@
 import os
 import json
 import time
+import argparse
 from datetime import datetime
 from utils.date_utils import get_preset_date_range, get_custom_date_range
 from utils.text_utils import filter_articles_by_date, get_latest_n_articles
 from utils.ui_utils import show_time_range_menu, show_crawl_options, get_custom_article_count
-from utils.article_scraper import fetch_article_content
-from utils.progress_manager import ProgressManager, find_incomplete_batch, get_pending_articles
+from utils.browser_pool import DEFAULT_MAX_PAGES_PER_BROWSER, DEFAULT_MAX_RSS_MB
+from utils.crawl_engine import CrawlEngine, DEFAULT_CONCURRENCY
+from utils.sharded_crawler import crawl_sharded
+from utils.resource_policy import RESOURCE_PROFILES, resolve_profile
+from utils.html_archive import RawHtmlArchive, ARCHIVE_DIR_NAME
+from utils.rate_limiter import AimdRateLimiter, DEFAULT_INITIAL_RATE, DEFAULT_MIN_RATE, DEFAULT_MAX_RATE
+from utils.circuit_breaker import CircuitBreaker, DEFAULT_TRIP_THRESHOLD, DEFAULT_COOLDOWN_SECONDS
+from utils.link_resolver import LinkResolver, CACHE_DIR_NAME
+from utils.article_store import ArticleStore
+from utils.watermark import WatermarkStore
+from utils.image_downloader import ImageDownloader, DEFAULT_IMAGE_WORKERS, DEFAULT_MAX_IMAGE_BYTES
+from utils.image_store import ImageStore
+from utils.errors import DEFAULT_ARTICLE_DEADLINE, classify_error
+from utils.asset_cache import ASSET_CACHE_DIR_NAME, DEFAULT_ASSET_CACHE_MB
+from utils.har_replay import HAR_RECORD, HAR_REPLAY
+from utils.progress_manager import ProgressManager, find_incomplete_batch, get_pending_articles, get_retry_state
 
 def process_single_list(json_file: str, output_base_dir: str, 
                      start_date=None, end_date=None, save_images=False, 
-                     latest_n=None, resume_batch=None) -> None:
+                     latest_n=None, resume_batch=None,
+                     max_pages_per_browser=DEFAULT_MAX_PAGES_PER_BROWSER,
+                     max_browser_rss_mb=DEFAULT_MAX_RSS_MB,
+                     concurrency=DEFAULT_CONCURRENCY, workers=1,
+                     resource_profile=None, http_first=False, archive_html=True,
+                     initial_rate=DEFAULT_INITIAL_RATE, min_rate=DEFAULT_MIN_RATE,
+                     max_rate=DEFAULT_MAX_RATE,
+                     breaker_threshold=DEFAULT_TRIP_THRESHOLD,
+                     breaker_cooldown=DEFAULT_COOLDOWN_SECONDS,
+                     link_resolver=None, article_store=None, refresh=False,
+                     watermark_store=None, image_workers=DEFAULT_IMAGE_WORKERS,
+                     max_image_bytes=DEFAULT_MAX_IMAGE_BYTES, capture_images=True,
+                     article_deadline=DEFAULT_ARTICLE_DEADLINE, autoscale=None,
+                     asset_cache_mb=DEFAULT_ASSET_CACHE_MB, har_mode=None, har_dir=None) -> None:
     """
     处理单个文章列表文件
     Args:
@@ -21,9 +49,38 @@ def process_single_list(json_file: str, output_base_dir: str,
         save_images: 是否保存图片
         latest_n: 如果设置，则只处理最新的N篇文章
         resume_batch: 如果不为None，则继续处理该批次
+        max_pages_per_browser: 浏览器处理多少个页面后重启
+        max_browser_rss_mb: 浏览器内存上限（MB），超过后重启
+        concurrency: 同时抓取的页面数（多进程模式下为每个进程的页面数）
+        workers: 工作进程数，大于1时按进程分片抓取，由当前进程统一写入进度和结果
+        resource_profile: 请求拦截档位（auto/full/text/lite），None 或 auto 时根据是否保存图片自动选择
+        http_first: 是否先用 HTTP 快速抓取，字段缺失或需要 JavaScript 时再使用浏览器（拿不到阅读量和点赞量）
+        archive_html: 是否在批次文件夹的 raw_html 目录下归档正文原始 HTML（可用 utils.rebuild_articles 重建结果）
+        initial_rate: 初始请求速率（次/秒），之后根据抓取结果自动调整
+        min_rate: 退避时的最低速率（次/秒）
+        max_rate: 加速时的最高速率（次/秒）
+        breaker_threshold: 连续多少次遇到反爬验证页面后暂停所有抓取
+        breaker_cooldown: 熔断后暂停的秒数，之后由一个探测请求决定是否恢复
+        link_resolver: 链接解析器（LinkResolver），传入时抓取前先解析短链接并去重
+        article_store: 跨批次文章库（ArticleStore），已保存的文章直接复制到新批次，不再抓取
+        refresh: 为 True 时忽略文章库，重新抓取所有文章
+        watermark_store: 增量抓取水位线（WatermarkStore），传入时只抓取比上次更新的文章和上次失败的文章
+        image_workers: 同时下载的图片数（图片在独立的下载阶段中下载，不阻塞文本抓取）
+        max_image_bytes: 单张图片的大小上限（字节）
+        capture_images: 直接保存浏览器加载页面时收到的图片，只有未加载的懒加载图片才重新下载
+        article_deadline: 单篇文章的时间预算（秒），页面跳转、加载和各项等待共用，重试使用剩余的预算
+        autoscale: 自动调整并发页面数（ConcurrencyAutoscaler 的参数），concurrency 作为上限；None 表示固定页面数
+        asset_cache_mb: 微信静态资源（JS/CSS/字体）磁盘缓存的大小上限（MB），0 或 None 表示不缓存
+        har_mode: 'record' 时把每篇文章的完整网络交互录制为 HAR，'replay' 时从 HAR 回放（不访问网络）
+        har_dir: HAR 文件目录
     """
     print(f"\n处理文章列表: {os.path.basename(json_file)}")
     
+    link_stats = None
+    delta_stats = None
+    reused = []
+    key_for = link_resolver.key_for if link_resolver else (lambda url: None)
+
     # 如果是继续上次的批次
     if resume_batch:
         batch_folder = resume_batch
@@ -39,6 +96,10 @@ def process_single_list(json_file: str, output_base_dir: str,
         
         # 使用现有的进度管理器
         progress_manager = ProgressManager(batch_folder)
+        # 仍在延迟重试中的文章按进度文件里的 next_eligible_at 继续排队
+        retry_state = get_retry_state(progress_data)
+        if retry_state:
+            print(f"   ⏳ 延迟重试中: {len(retry_state)} 篇")
         
     else:
         # 读取文章列表文件
@@ -63,17 +124,53 @@ def process_single_list(json_file: str, output_base_dir: str,
             filtered_articles = get_latest_n_articles(filtered_articles, latest_n)
             date_range = f"(最新 {latest_n} 篇)"
 
+        # 增量模式：只保留比水位线新的文章和上次失败的文章
+        list_name = os.path.splitext(os.path.basename(json_file))[0]
+        if watermark_store:
+            filtered_articles, delta_stats = watermark_store.select_delta(
+                list_name, filtered_articles, all_articles, key_for)
+            print(f"📈 增量抓取 (水位线: {delta_stats['watermark'] or '无'}): 新文章 {delta_stats['new']} 篇，"
+                  f"重试上次失败 {delta_stats['failed_retry']} 篇，跳过 {delta_stats['skipped']} 篇")
+
         print(f"📝 符合条件的文章数量: {len(filtered_articles)} {date_range}")
         
         if len(filtered_articles) == 0:
             print("❌ 没有找到符合条件的文章，跳过此文件")
             return
         
-        print(f"\n🚀 开始爬取 {len(filtered_articles)} 篇文章...")
+        # 提取所有链接
+        urls = []
+        for item in filtered_articles:
+            if 'link' in item:
+                urls.append(item['link'])
+            elif 'url' in item:
+                urls.append(item['url'])
+
+        # 解析短链接并按文章规范标识去重（包括本次运行中其他列表文件里已经出现的文章）
+        if link_resolver:
+            urls, link_stats = link_resolver.dedupe(urls)
+            duplicate_count = link_stats['duplicates_in_list'] + link_stats['duplicates_across_lists']
+            if duplicate_count:
+                print(f"🔁 跳过重复文章 {duplicate_count} 篇（列表内 {link_stats['duplicates_in_list']} 篇，"
+                      f"其他列表 {link_stats['duplicates_across_lists']} 篇）")
+            if link_stats['unresolved']:
+                print(f"⚠️ {link_stats['unresolved']} 个链接无法解析，按原链接去重")
+            if not urls:
+                print("✅ 所有文章都已经在本次运行中抓取过，跳过此文件")
+                if watermark_store:
+                    watermark_store.update(list_name, filtered_articles, set(), key_for)
+                return
+
+        # 文章库中已有的文章直接复制，不再抓取
+        if article_store and not refresh:
+            urls, reused = article_store.partition(urls, need_images=save_images)
+            if reused:
+                print(f"📚 文章库中已有 {len(reused)} 篇，直接复制到新批次（使用 --refresh 重新抓取）")
+
+        print(f"\n🚀 开始爬取 {len(urls)} 篇文章...")
 
         # 在Output文件夹下创建输出子文件夹
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        list_name = os.path.splitext(os.path.basename(json_file))[0]
         batch_folder = os.path.join(output_base_dir, f"{list_name}_batch_{timestamp}")
         
         # 确保文件夹名称唯一
@@ -83,92 +180,185 @@ def process_single_list(json_file: str, output_base_dir: str,
             batch_folder = f"{original_folder_name}_{counter}"
             counter += 1
         
-        # 创建主文件夹和图片文件夹
+        # 创建主文件夹（图片保存在 Output 下共享的图片库中）
         os.makedirs(batch_folder, exist_ok=True)
-        if save_images:
-            batch_images_dir = os.path.join(batch_folder, 'images')
-            os.makedirs(batch_images_dir, exist_ok=True)
         
         print(f"📁 创建输出文件夹: {batch_folder}")
-        if save_images:
-            print(f"📁 创建图片文件夹: {batch_images_dir}")
 
-        # 提取所有链接
-        urls = []
-        for item in filtered_articles:
-            if 'link' in item:
-                urls.append(item['link'])
-            elif 'url' in item:
-                urls.append(item['url'])
-                
         # 创建进度管理器和进度文件
         progress_manager = ProgressManager(batch_folder)
-        progress_manager.create_progress_file(urls)
+        progress_manager.create_progress_file(urls, [url for url, _, _ in reused])
         pending_urls = urls
+        retry_state = {}
 
-    # 批量抓取文章
-    articles = []
+    # 批量抓取文章（整个批次共用一个浏览器池，最多 concurrency 个页面并发）
+    articles = [article_store.copy_into_batch(url, source_batch, article, batch_folder)
+                for url, source_batch, article in reused]
+    retry_stats = {'scheduled': 0, 'recovered': 0, 'exhausted': 0}
+    # 进入过延迟重试队列的文章，用于统计重试后成功的数量
+    retried_urls = set()
+    html_archive = RawHtmlArchive(batch_folder) if archive_html else None
+    # 抓取流程只记录图片链接，由独立的下载线程池并发下载到按内容寻址的图片库
+    image_store = ImageStore(os.path.dirname(os.path.normpath(batch_folder))) if save_images else None
+    image_downloader = ImageDownloader(image_store, image_workers, max_image_bytes) if save_images else None
+    image_stats = None
+
+    def handle_result(url, article_data):
+        """处理单篇文章的抓取结果"""
+        # 归档正文原始 HTML，只在结果里记录归档文件的相对路径
+        raw_html = article_data.pop('_raw_html', None)
+        if html_archive and raw_html:
+            archive_path = html_archive.save(url, raw_html)
+            if archive_path:
+                article_data.setdefault('metadata', {})['raw_html'] = archive_path
+
+        articles.append(article_data)
+        
+        # 显示抓取结果
+        if article_data.get('title'):
+            print(f"    ✅ 成功: {article_data['title'][:50]}...")
+            progress_manager.update_progress(url, 'completed')
+            if article_store:
+                article_store.add(batch_folder, article_data)
+            if url in retried_urls:
+                retry_stats['recovered'] += 1
+            if image_downloader:
+                queued = image_downloader.enqueue(article_data)
+                if queued:
+                    print(f"       📸 {queued} 张图片已加入下载队列")
+        elif article_data.get('status') == 'deleted':
+            # 已确认删除的文章不会在续传时重试
+            print(f"    🗑️ 已删除或违规: {article_data.get('error', '')}")
+            progress_manager.update_progress(url, 'deleted', article_data.get('error'), error_class='deleted')
+        else:
+            print(f"    ❌ 失败: 未获取到标题")
+            article_data['error_class'] = classify_error(article_data=article_data)
+            progress_manager.update_progress(url, 'failed', article_data.get('error') or "未获取到标题",
+                                             error_class=article_data['error_class'])
+            retry_stats['exhausted'] += 1
+        
+        report_images_dir()
+
+    def handle_retry(url, error, attempts, next_eligible_at, error_class=None):
+        """失败的文章进入延迟重试队列，记录下一次允许重试的时间，续传时沿用"""
+        retried_urls.add(url)
+        retry_stats['scheduled'] += 1
+        progress_manager.update_progress(url, 'retrying', error, next_eligible_at, error_class)
+
+    def handle_error(url, error, error_class=None):
+        """处理抓取过程中抛出的异常"""
+        error_class = error_class or classify_error(error)
+        print(f"    ❌ 抓取异常 ({error_class}): {error}")
+        progress_manager.update_progress(url, 'failed', error, error_class=error_class)
+        retry_stats['exhausted'] += 1
+        articles.append({
+            'url': url,
+            'title': '',
+            'author': '',
+            'publish_time': '',
+            'read_count': '',
+            'like_count': '',
+            'content': '',
+            'summary': '',
+            'error': error,
+            'error_class': error_class,
+            'content_format': 'plain',
+            'images': [],
+            'metadata': {
+                'crawl_time': datetime.now().isoformat(),
+                'markdown_enabled': False,
+                'images_saved': False,
+                'image_count': 0,
+                'version': '1.0'
+            }
+        })
+        report_images_dir()
+
+    def report_images_dir():
+        """检查图片库（仅在保存图片时）"""
+        if image_store:
+            print(f"    📁 图片库状态: 已收录 {len(image_store.urls)} 个图片链接")
+
+    resource_profile = resolve_profile(resource_profile, save_images)
+    pool_options = {
+        'max_pages_per_browser': max_pages_per_browser,
+        'max_rss_mb': max_browser_rss_mb,
+        'resource_profile': resource_profile,
+        # 所有批次共用的静态资源缓存
+        'asset_cache_dir': os.path.join(os.path.dirname(os.path.normpath(batch_folder)), ASSET_CACHE_DIR_NAME)
+                           if asset_cache_mb else None,
+        'asset_cache_mb': asset_cache_mb or DEFAULT_ASSET_CACHE_MB,
+        'har_mode': har_mode,
+        'har_dir': har_dir,
+    }
+    if har_mode:
+        # 录制和回放都要经过浏览器，HTTP 快速抓取的请求不会进入 HAR
+        http_first = False
+        print(f"🎞️ HAR {'录制' if har_mode == HAR_RECORD else '回放'}: {har_dir}")
+    if har_mode == HAR_REPLAY:
+        # 回放不访问网络，不需要限速
+        initial_rate = max_rate = 1000.0
+    if resource_profile != 'full':
+        print(f"🚫 请求拦截档位: {resource_profile}")
+    if concurrency > 1 and autoscale is None:
+        print(f"⚡ 并发抓取: 同时打开 {concurrency} 个页面")
+    # 所有页面和工作进程共用一个自适应限速器，替代每篇文章后固定等待 5 秒
+    rate_limiter = AimdRateLimiter(initial_rate, min_rate, max_rate)
+    # 遇到验证页面时暂停所有页面和工作进程，而不是让每篇文章各自重试
+    circuit_breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+
+    def update_watermark():
+        """推进增量水位线，未完成的文章留到下次增量抓取时重试"""
+        if watermark_store and not resume_batch:
+            failed_urls, _ = get_pending_articles(batch_folder)
+            watermark_store.update(list_name, filtered_articles, set(failed_urls), key_for)
+
+    crawl_started = time.monotonic()
     try:
-        for idx, url in enumerate(pending_urls, 1):
-            print(f"\n[{idx}/{len(pending_urls)}] 正在抓取: {url}")
-            
-            try:
-                # 确保每篇文章都使用正确的图片保存路径
-                article_data = fetch_article_content(url, batch_folder, save_images)
-                
-                # 添加调试信息（仅在保存图片时显示）
-                if save_images and article_data.get('metadata', {}).get('images_saved'):
-                    print(f"    图片保存目录: {os.path.join(batch_folder, 'images')}")
-                    print(f"    文章图片数量: {len(article_data.get('images', []))}")
-                
-                articles.append(article_data)
-                
-                # 显示抓取结果
-                if article_data.get('title'):
-                    print(f"    ✅ 成功: {article_data['title'][:50]}...")
-                    progress_manager.update_progress(url, 'completed')
-                    if save_images and article_data.get('metadata', {}).get('images_saved'):
-                        print(f"       📸 已保存 {article_data.get('metadata', {}).get('image_count', 0)} 张图片")
-                else:
-                    print(f"    ❌ 失败: 未获取到标题")
-                    progress_manager.update_progress(url, 'failed', "未获取到标题")
-                
-            except Exception as e:
-                print(f"    ❌ 抓取异常: {e}")
-                progress_manager.update_progress(url, 'failed', str(e))
-                articles.append({
-                    'url': url,
-                    'title': '',
-                    'author': '',
-                    'publish_time': '',
-                    'read_count': '',
-                    'like_count': '',
-                    'content': '',
-                    'summary': '',
-                    'error': str(e),
-                    'content_format': 'plain',
-                    'images': [],
-                    'metadata': {
-                        'crawl_time': datetime.now().isoformat(),
-                        'markdown_enabled': False,
-                        'images_saved': False,
-                        'image_count': 0,
-                        'version': '1.0'
-                    }
-                })
-            
-            # 检查图片文件夹（仅在保存图片时）
-            if save_images:
-                images_dir = os.path.join(batch_folder, 'images')
-                if os.path.exists(images_dir):
-                    image_files = os.listdir(images_dir)
-                    print(f"    📁 图片文件夹状态: {len(image_files)} 个文件")
-            
-            # 防止过快被封，每次抓取间隔 5 秒
-            time.sleep(5)
+        if workers > 1:
+            # 多进程分片模式：当前进程作为协调者，独占 progress.json 和结果文件
+            pool_stats = crawl_sharded(pending_urls, batch_folder, save_images,
+                                       workers=workers,
+                                       concurrency=concurrency,
+                                       pool_options=pool_options,
+                                       on_result=handle_result,
+                                       on_error=handle_error,
+                                       on_retry=handle_retry,
+                                       retry_state=retry_state,
+                                       http_first=http_first,
+                                       archive_html=archive_html,
+                                       capture_images=capture_images,
+                                       article_deadline=article_deadline,
+                                       autoscale=autoscale,
+                                       rate_limiter=rate_limiter,
+                                       circuit_breaker=circuit_breaker)
+        else:
+            engine = CrawlEngine(batch_folder, save_images,
+                                 concurrency=concurrency,
+                                 pool_options=pool_options,
+                                 on_result=handle_result,
+                                 on_error=handle_error,
+                                 on_retry=handle_retry,
+                                 http_first=http_first,
+                                 archive_html=archive_html,
+                                 capture_images=capture_images,
+                                 article_deadline=article_deadline,
+                                 autoscale=autoscale,
+                                 rate_limiter=rate_limiter,
+                                 circuit_breaker=circuit_breaker)
+            engine.crawl(pending_urls, retry_state)
+            pool_stats = engine.get_stats(len(articles))
+        crawl_seconds = time.monotonic() - crawl_started
 
     except KeyboardInterrupt:
         print("\n\n⚠️ 检测到用户中断，正在保存当前进度...")
+        if image_downloader:
+            # 尚未开始的图片不再下载，条目保留 pending 状态；
+            # 等待正在进行的下载结束，避免保存时下载线程仍在修改图片条目
+            image_downloader.close(cancel_pending=True)
+        if article_store:
+            article_store.save()
+        update_watermark()
         # 保存当前结果
         output_file = os.path.join(batch_folder, "articles_detailed.json")
         with open(output_file, "w", encoding="utf-8") as f:
@@ -177,10 +367,17 @@ def process_single_list(json_file: str, output_base_dir: str,
         print("👉 下次运行时将自动继续未完成的文章")
         return
 
+    # 等待图片下载完成，图片条目和 metadata 由下载线程更新
+    if image_downloader:
+        image_stats = image_downloader.close()
+
     # 保存结果文件
     output_file = os.path.join(batch_folder, "articles_detailed.json")
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump(articles, f, ensure_ascii=False, indent=2)
+    if article_store:
+        article_store.save()
+    update_watermark()
 
     # 统计结果
     success_count = sum(1 for article in articles if article.get('title'))
@@ -192,10 +389,41 @@ def process_single_list(json_file: str, output_base_dir: str,
     deleted_articles = [article for article in articles if article.get('status') == 'deleted']
     error_analysis = {}
     
+    error_classes = {}
     for article in failed_articles:
         error_msg = article.get('error', '未知错误')
         error_analysis[error_msg] = error_analysis.get(error_msg, 0) + 1
+        error_class = article.get('error_class') or classify_error(article_data=article)
+        error_classes[error_class] = error_classes.get(error_class, 0) + 1
     
+    # 正文稳定等待耗时统计
+    content_waits = [article.get('metadata', {}).get('content_wait_ms') for article in articles]
+    content_waits = [wait for wait in content_waits if wait is not None]
+    content_wait_stats = {
+        "avg_ms": round(sum(content_waits) / len(content_waits)) if content_waits else None,
+        "max_ms": max(content_waits) if content_waits else None,
+    }
+
+    # 请求拦截统计
+    policy_stats = [article.get('metadata', {}).get('resource_policy') for article in articles]
+    policy_stats = [stats for stats in policy_stats if stats]
+    blocked_requests = sum(stats['blocked_requests'] for stats in policy_stats)
+    est_bytes_saved = sum(stats['est_bytes_saved'] for stats in policy_stats)
+    resource_policy_stats = {
+        "profile": resource_profile,
+        "blocked_requests": blocked_requests,
+        "est_bytes_saved": est_bytes_saved,
+        "avg_blocked_requests_per_article": round(blocked_requests / len(policy_stats), 1) if policy_stats else 0,
+        "avg_est_bytes_saved_per_article": round(est_bytes_saved / len(policy_stats)) if policy_stats else 0,
+    }
+
+    # 抓取方式统计（HTTP 快速抓取 / 浏览器）
+    fetch_modes = {}
+    for article in articles:
+        mode = article.get('metadata', {}).get('fetch_mode')
+        if mode:
+            fetch_modes[mode] = fetch_modes.get(mode, 0) + 1
+
     # 保存抓取信息
     info_file = os.path.join(batch_folder, "crawl_info.json")
     crawl_info = {
@@ -210,10 +438,41 @@ def process_single_list(json_file: str, output_base_dir: str,
         "success_rate": f"{success_rate:.1f}%",
         "source_file": os.path.basename(json_file),
         "error_analysis": error_analysis,
+        "error_classes": error_classes,
+        "article_deadline_seconds": article_deadline,
+        "concurrency": concurrency,
+        "workers": workers,
+        "autoscale": pool_stats.pop("autoscale", None),
+        "asset_cache": pool_stats.pop("asset_cache", None),
+        "har": pool_stats.pop("har", None),
+        # 抓取阶段的耗时和吞吐量（不含图片下载），用于对比 HAR 回放的基准测试结果
+        "crawl_seconds": round(crawl_seconds, 2),
+        "articles_per_minute": round(len(pending_urls) / crawl_seconds * 60, 2) if crawl_seconds else None,
+        "browser_pool": pool_stats,
+        "content_wait": content_wait_stats,
+        "resource_policy": resource_policy_stats,
+        "fetch_modes": fetch_modes,
+        "rate_limiter": rate_limiter.get_stats(),
+        "retry_queue": retry_stats,
+        "circuit_breaker": circuit_breaker.get_stats(),
+        "link_resolution": link_stats,
+        "delta": delta_stats,
+        "image_download": image_stats,
+        "article_store": {
+            "reused_count": len(reused),
+            "refresh": refresh,
+            "indexed_articles": len(article_store.articles) if article_store else None,
+        },
+        "raw_html_archive": {
+            "enabled": bool(html_archive),
+            "dir": ARCHIVE_DIR_NAME,
+            "saved_count": html_archive.saved_count if html_archive else 0,
+            "saved_bytes": html_archive.saved_bytes if html_archive else 0,
+        },
         "format_version": "1.0",
         "markdown_enabled": True,
         "image_support": True,
-        "images_dir": "images"
+        "images_dir": os.path.relpath(image_store.root, batch_folder) if image_store else None
     }
     
     with open(info_file, "w", encoding="utf-8") as f:
@@ -222,9 +481,124 @@ def process_single_list(json_file: str, output_base_dir: str,
     print(f"\n📁 结果已保存到文件夹: {batch_folder}")
     print(f"   📄 文章数据: {output_file}")
     print(f"   📋 抓取信息: {info_file}")
-    print(f"   🖼️  图片目录: {os.path.join(batch_folder, 'images')}")
+    if image_store:
+        print(f"   🖼️  图片库: {image_store.root}")
+    if image_stats:
+        print(f"   🖼️  图片下载: 从页面响应直接保存 {image_stats['captured']} 张，下载成功 {image_stats['downloaded']} 张（图库中已有 {image_stats['cached']} 张，"
+              f"内容重复 {image_stats['deduplicated']} 张），失败 {image_stats['failed']} 张，"
+              f"共下载 {image_stats['bytes'] / 1024 / 1024:.1f} MB")
+    if html_archive:
+        print(f"   🗄️  原始 HTML: {os.path.join(batch_folder, ARCHIVE_DIR_NAME)} "
+              f"({html_archive.saved_count} 篇，{html_archive.saved_bytes / 1024 / 1024:.1f} MB)")
+    print(f"\n⏱️ 抓取耗时: {crawl_info['crawl_seconds']} 秒，每分钟 {crawl_info['articles_per_minute']} 篇")
+    if crawl_info["har"]:
+        har_stats = crawl_info["har"]
+        print(f"   🎞️ HAR: 录制 {har_stats['recorded']} 篇，回放 {har_stats['replayed']} 篇，缺少录制 {har_stats['missing']} 篇")
+    print(f"\n🧭 浏览器启动开销:")
+    print(f"   启动次数: {pool_stats['launch_count']} 次，共 {pool_stats['startup_seconds']} 秒")
+    print(f"   按每篇文章启动一次估算: {pool_stats['per_url_launch_estimate_seconds']} 秒")
+    print(f"   节省约: {pool_stats['saved_seconds_estimate']} 秒")
+    asset_stats = crawl_info["asset_cache"]
+    if asset_stats and asset_stats['hits'] + asset_stats['misses']:
+        print(f"\n📦 静态资源缓存: 命中 {asset_stats['hits']} 次，未命中 {asset_stats['misses']} 次"
+              f"（命中率 {asset_stats['hit_rate']:.0%}），从缓存读取 {asset_stats['bytes_served'] / 1024 / 1024:.1f} MB")
+    rate_stats = rate_limiter.get_stats()
+    print(f"\n🚦 自适应限速:")
+    for host, host_stats in rate_stats['hosts'].items():
+        print(f"   {host}: 当前 {host_stats['current_rate']} 次/秒 (间隔 {host_stats['current_interval_seconds']} 秒)")
+    print(f"   退避次数: {rate_stats['backoff_count']}")
+    if circuit_breaker.trip_count:
+        print(f"\n⛔ 反爬熔断: {circuit_breaker.trip_count} 次，共暂停 {circuit_breaker.paused_seconds:.0f} 秒")
+    if retry_stats['scheduled']:
+        print(f"\n⏳ 延迟重试: 共 {retry_stats['scheduled']} 次，重试后成功 {retry_stats['recovered']} 篇，"
+              f"用完重试次数 {retry_stats['exhausted']} 篇")
+    if resource_profile != 'full':
+        print(f"\n🚫 请求拦截 ({resource_profile}):")
+        print(f"   共拦截 {blocked_requests} 个请求，估算节省 {est_bytes_saved / 1024 / 1024:.1f} MB")
+        print(f"   平均每篇: {resource_policy_stats['avg_blocked_requests_per_article']} 个请求，"
+              f"{resource_policy_stats['avg_est_bytes_saved_per_article'] / 1024:.0f} KB")
+
+def parse_args(argv=None):
+    """解析命令行参数（交互式菜单之外的高级选项）"""
+    parser = argparse.ArgumentParser(description='微信公众号文章批量抓取工具 (JSON 版)')
+    parser.add_argument('--max-pages-per-browser', type=int, default=DEFAULT_MAX_PAGES_PER_BROWSER,
+                        help=f'浏览器处理多少个页面后重启 (默认: {DEFAULT_MAX_PAGES_PER_BROWSER}，0 表示不限制)')
+    parser.add_argument('--max-browser-rss-mb', type=int, default=DEFAULT_MAX_RSS_MB,
+                        help=f'浏览器内存上限 MB，超过后重启 (默认: {DEFAULT_MAX_RSS_MB}，0 表示不限制，需要 psutil)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'同时抓取的页面数，越大越快但越容易被限流 (默认: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--asset-cache-mb', type=float, default=DEFAULT_ASSET_CACHE_MB,
+                        help=f'微信静态资源 (JS/CSS/字体) 磁盘缓存的大小上限 MB (默认: {DEFAULT_ASSET_CACHE_MB}，0 表示不缓存)')
+    har_group = parser.add_mutually_exclusive_group()
+    har_group.add_argument('--har-record', metavar='DIR', default=None,
+                           help='把每篇文章的完整网络交互录制为 HAR 文件，保存到 DIR')
+    har_group.add_argument('--har-replay', metavar='DIR', default=None,
+                           help='从 DIR 中录制的 HAR 文件回放，不访问网络，用于离线基准测试和回归测试')
+    parser.add_argument('--autoscale', action='store_true',
+                        help='根据 CPU、可用内存、单页内存和最近的失败率、耗时自动调整并发页面数，--concurrency 作为上限 (CPU 和内存指标需要 psutil)')
+    parser.add_argument('--min-concurrency', type=int, default=1,
+                        help='自动调整时的最少页面数，也是起步页面数 (默认: 1)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='工作进程数，每个进程使用独立的浏览器 (默认: 1，0 表示使用全部 CPU 核心)')
+    parser.add_argument('--resource-profile', choices=('auto',) + RESOURCE_PROFILES, default='auto',
+                        help='请求拦截档位: auto=不保存图片时使用 text; full=不拦截; '
+                             'text=拦截图片/视频/字体/样式/统计上报; lite=在 text 基础上关闭 JavaScript (默认: auto)')
+    parser.add_argument('--http-first', action=argparse.BooleanOptionalAction, default=False,
+                        help='先用 HTTP 直接解析页面，字段缺失或需要 JavaScript 时再启用浏览器；'
+                             '更快，但拿不到阅读量和点赞量，可之后用 utils.metrics_refresher 补齐 (默认: 关闭)')
+    parser.add_argument('--initial-rate', type=float, default=DEFAULT_INITIAL_RATE,
+                        help=f'初始请求速率 (次/秒)，之后成功时逐步加速、超时或被限流时减半 (默认: {DEFAULT_INITIAL_RATE})')
+    parser.add_argument('--min-rate', type=float, default=DEFAULT_MIN_RATE,
+                        help=f'退避时的最低请求速率 (次/秒) (默认: {DEFAULT_MIN_RATE})')
+    parser.add_argument('--max-rate', type=float, default=DEFAULT_MAX_RATE,
+                        help=f'加速时的最高请求速率 (次/秒) (默认: {DEFAULT_MAX_RATE})')
+    parser.add_argument('--breaker-threshold', type=int, default=DEFAULT_TRIP_THRESHOLD,
+                        help=f'连续多少次遇到反爬验证页面后暂停所有抓取 (默认: {DEFAULT_TRIP_THRESHOLD})')
+    parser.add_argument('--breaker-cooldown', type=float, default=DEFAULT_COOLDOWN_SECONDS,
+                        help=f'熔断后暂停的秒数，之后发送一个探测请求决定是否恢复 (默认: {DEFAULT_COOLDOWN_SECONDS})')
+    parser.add_argument('--resolve-links', action=argparse.BooleanOptionalAction, default=True,
+                        help='抓取前解析短链接，按文章标识 (__biz/mid/idx) 去除列表内和列表间的重复文章 (默认: 开启)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='忽略文章库，重新抓取已经保存过的文章 (默认: 文章库中已有的文章直接复制到新批次)')
+    parser.add_argument('--delta', action='store_true',
+                        help='增量抓取: 只抓取比上次记录的最新日期更新的文章和上次失败的文章 (水位线按文章列表文件记录)')
+    parser.add_argument('--image-workers', type=int, default=DEFAULT_IMAGE_WORKERS,
+                        help=f'同时下载的图片数，图片在独立的下载阶段中下载，不阻塞文本抓取 (默认: {DEFAULT_IMAGE_WORKERS})')
+    parser.add_argument('--max-image-mb', type=float, default=DEFAULT_MAX_IMAGE_BYTES / 1024 / 1024,
+                        help=f'单张图片的大小上限 MB，超过时放弃下载 (默认: {DEFAULT_MAX_IMAGE_BYTES // 1024 // 1024})')
+    parser.add_argument('--capture-images', action=argparse.BooleanOptionalAction, default=True,
+                        help='保存图片时直接使用浏览器加载页面时收到的图片，只有未加载的懒加载图片才重新下载 (默认: 开启)')
+    parser.add_argument('--article-deadline', type=float, default=DEFAULT_ARTICLE_DEADLINE,
+                        help=f'单篇文章的时间预算 (秒)，页面跳转、加载和各项等待共用，重试使用剩余的预算 (默认: {DEFAULT_ARTICLE_DEADLINE}，0 表示不限制)')
+    parser.add_argument('--archive-html', action=argparse.BooleanOptionalAction, default=True,
+                        help='在批次文件夹中归档压缩后的正文 HTML，可用 python -m utils.rebuild_articles 重建结果 (默认: 开启)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    crawl_options = {
+        'max_pages_per_browser': args.max_pages_per_browser,
+        'max_browser_rss_mb': args.max_browser_rss_mb or None,
+        'concurrency': max(1, args.concurrency),
+        'workers': args.workers if args.workers > 0 else (os.cpu_count() or 1),
+        'resource_profile': args.resource_profile,
+        'http_first': args.http_first,
+        'archive_html': args.archive_html,
+        'initial_rate': args.initial_rate,
+        'min_rate': args.min_rate,
+        'max_rate': args.max_rate,
+        'breaker_threshold': args.breaker_threshold,
+        'breaker_cooldown': args.breaker_cooldown,
+        'image_workers': max(1, args.image_workers),
+        'max_image_bytes': int(args.max_image_mb * 1024 * 1024),
+        'capture_images': args.capture_images,
+        'article_deadline': args.article_deadline or None,
+        'autoscale': {'min_pages': args.min_concurrency} if args.autoscale else None,
+        'asset_cache_mb': args.asset_cache_mb,
+        'har_mode': HAR_RECORD if args.har_record else HAR_REPLAY if args.har_replay else None,
+        'har_dir': args.har_record or args.har_replay,
+    }
 
-def main():
     print("微信公众号文章批量抓取工具 (JSON 版)")
     print("从 ArticleList 文件夹读取文章列表并批量抓取")
     
@@ -242,7 +616,7 @@ def main():
         
         if choice == 'y':
             # 继续上次的批次
-            process_single_list(None, None, resume_batch=incomplete_batch)
+            process_single_list(None, None, resume_batch=incomplete_batch, **crawl_options)
             return
     
     # 检查必要的文件夹
@@ -252,6 +626,19 @@ def main():
     # 确保文件夹存在
     os.makedirs(article_list_dir, exist_ok=True)
     os.makedirs(output_dir, exist_ok=True)
+
+    # 所有列表文件共用一个链接解析器，跨列表去重
+    # 回放时不访问网络，短链接只使用已缓存的解析结果
+    link_resolver = LinkResolver(os.path.join(output_dir, CACHE_DIR_NAME),
+                                 offline=crawl_options['har_mode'] == HAR_REPLAY)
+    if args.resolve_links:
+        crawl_options['link_resolver'] = link_resolver
+    # 跨批次文章库：已经抓取过的文章不再重复抓取
+    crawl_options['article_store'] = ArticleStore(output_dir, link_resolver)
+    # 录制和回放时每篇文章都要经过浏览器，不使用文章库中已有的结果
+    crawl_options['refresh'] = args.refresh or bool(crawl_options['har_mode'])
+    if args.delta:
+        crawl_options['watermark_store'] = WatermarkStore(output_dir)
     
     # 获取所有JSON文件
     json_files = [f for f in os.listdir(article_list_dir) 
@@ -362,7 +749,8 @@ def main():
         print(f"{'='*50}")
         
         full_path = os.path.join(article_list_dir, json_file)
-        process_single_list(full_path, output_dir, start_date, end_date, save_images, latest_n)
+        process_single_list(full_path, output_dir, start_date, end_date, save_images, latest_n,
+                            **crawl_options)
     
     print("\n✨ 所有文件处理完成")
     print(f"📁 所有结果已保存到: {output_dir}")